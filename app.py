@@ -1,13 +1,146 @@
-from dash import Dash, html, dcc, callback, Output, Input, State
+import dash
+from dash import Dash, html, dcc, callback, ctx, Output, Input, State
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import uuid
+import zlib
+from urllib.parse import parse_qs
 import numpy as np
-from scipy.spatial import Voronoi
+from scipy.ndimage import distance_transform_edt
+from scipy.spatial import QhullError, Voronoi
 import plotly.graph_objects as go
 from dash.exceptions import PreventUpdate
+from flask import Response, request, send_file
 import pandas as pd
+try:
+    import numba
+except ImportError:
+    numba = None
+try:
+    import h5py
+except ImportError:
+    h5py = None
 
 ELECTRON_SCHRODINGER_CONSTANT = 0.262468423640825284
 COUNT_LIMIT = 200
 ZONE_COEFFICENTS = (np.indices((3, 3, 3)) - 1).reshape((3, 27))
+# Number of voxels along the longest axis of the first Brillouin zone, and the largest coverage tolerance (1/Å)
+COVERAGE_RESOLUTION = 64
+COVERAGE_MAX_TOLERANCE = 0.5
+SYMMETRY_MODES = ('off', 'on')
+# Bulk plans fold into the 3D first Brillouin zone; surface plans fold only the momentum parallel
+# to the sample surface into the 2D surface Brillouin zone
+ZONE_MODES = ('bulk', 'surface')
+SURFACE_ZONE_COEFFICIENTS = (np.indices((3, 3)) - 1).reshape((2, 9))
+# Largest deviation from orthogonality (relative) for a lattice map to count as a point-group operation,
+# loose enough for lattice vectors typed with a few digits
+SYMMETRY_TOLERANCE = 1e-3
+ENERGY_COUNT_LIMIT = 50
+# Analyzer slit orientations and what the second angle range scans, see geometry_emission_factors.
+# A horizontal slit lies along the slit direction; polar turns the sample about the vertical (y)
+# axis, tilt about the horizontal (x) axis and azimuth about the sample normal
+SLIT_ORIENTATIONS = ('horizontal', 'vertical')
+SCAN_AXES = ('deflector', 'polar', 'tilt', 'azimuth')
+DEFAULT_GEOMETRY = ('horizontal', 'deflector')
+SCAN_AXIS_LABELS = {'deflector': 'Deflector Angle', 'polar': 'Polar Angle', 'tilt': 'Tilt Angle', 'azimuth': 'Azimuth Angle'}
+ANGLE_SAMPLINGS = ('uniform', 'adaptive')
+RESOLUTION_MODES = ('off', 'on')
+# Angles per axis at which the adaptive sampler evaluates the angle-to-k Jacobian
+ADAPTIVE_PROBE_POINTS = 361
+# Momentum precision needed for planning (1/Å); float32 is only used when it stays within this
+FLOAT32_TOLERANCE = 1e-4
+# Upper bound on points evaluated at once when filling a binding-energy volume
+VOLUME_CHUNK_POINTS = 200_000
+# Use the compiled kernel for exact runs in either precision when numba is installed, optionally with fastmath,
+# once a warm-up has compiled it and checked it against NumPy to within JIT_TOLERANCE (1/Å)
+ENGINE_JIT = os.environ.get('ENGINE_JIT', 'true').lower() == 'true'
+ENGINE_FASTMATH = os.environ.get('ENGINE_FASTMATH', 'false').lower() == 'true'
+JIT_TOLERANCE = 1e-9
+# Material presets with precomputed zone data, see write_preset_library
+PRESET_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "presets")
+# Computed plans kept in memory for shared links
+PLAN_CACHE_SIZE = 32
+# Plans computed at the same time; further requests queue and may be superseded while they wait
+PLAN_COMPUTE_SLOTS = int(os.environ.get('PLAN_COMPUTE_SLOTS', 2))
+# Angle grids whose trig the factorized engine keeps, see emission_directions
+EMISSION_CACHE_SIZE = 8
+# Parsed CIF cells kept in memory, see parse_cif
+CIF_CACHE_SIZE = 32
+# Random candidates per optimizer run, candidates per vectorized batch, best candidates refined further,
+# and angle grid points per axis and binding energies used to score them
+OPTIMIZER_CANDIDATES = 1024
+OPTIMIZER_BATCH_SIZE = 64
+OPTIMIZER_REFINE_PARENTS = 8
+OPTIMIZER_GRID_SIZE = 31
+OPTIMIZER_ENERGY_COUNT = 3
+# Computed plans are memory-mapped from here, one directory per plan hash; the least recently used
+# beyond RESULT_CACHE_SIZE are deleted
+RESULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+RESULT_CACHE_SIZE = 64
+# Partial results older than this (seconds) belong to a worker that died mid-plan and are deleted on eviction
+PARTIAL_RESULT_MAX_AGE = 3600
+# Plans with more grid points than this first render a preview on every stride-th slit and deflector
+# angle, sized to about PREVIEW_POINTS; the full grid is refined in the background and polled for
+# every REFINE_POLL_MS, giving up after REFINE_MAX_POLLS
+PROGRESSIVE_MIN_POINTS = 100_000
+PREVIEW_POINTS = 10_000
+REFINE_POLL_MS = 500
+REFINE_MAX_POLLS = 600
+# Band models for the overlay, one JSON file of tight-binding hoppings each; evaluated band energies are
+# kept per model and computed plan
+MODEL_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+BAND_CACHE_SIZE = 8
+# Measured ARPES files (HDF5/NeXus, Igor .ibw) whose angle ranges can be overlaid; only their axes and
+# metadata are read. Each overlaid scan is sampled on up to MEASURED_OVERLAY_ANGLES per angle axis at
+# up to MEASURED_OVERLAY_ENERGIES of the plan's binding energies
+MEASUREMENT_DIRECTORY = os.environ.get(
+    'MEASUREMENT_DIRECTORY', os.path.join(os.path.dirname(os.path.abspath(__file__)), "measurements")
+)
+MEASURED_OVERLAY_ANGLES = 24
+MEASURED_OVERLAY_ENERGIES = 4
+# Batch momentum API (POST /api/momentum): per-point columns and their defaults, which are the UI's, in the
+# order the columns of an unnamed (n, k) binary payload are read; shared settings and their defaults, read from
+# the query string; the largest batch per request and how many batches are computed at the same time, apart
+# from the UI's plans; responses are stored like plans, in their own directory with their own LRU budget
+API_POINT_COLUMNS = (
+    ("slit-angle", 0.0), ("deflector-angle", 0.0), ("binding-energy", 0.0), ("photon-energy", 21.2),
+    ("inner-potential", 13.0), ("work-function", 4.5), ("offset-along-slit", 0.0), ("offset-perpendicular-slit", 0.0),
+)
+API_SETTINGS = {
+    "sample-normal": "0,0,1", "slit-direction": "1,0,0", "b1-vec": "1,0,0", "b2-vec": "0,1,0", "b3-vec": "0,0,1",
+    "slit-orientation": "horizontal", "scan-axis": "deflector", "zone-mode": "bulk",
+}
+API_MAX_POINTS = 1_000_000
+API_COMPUTE_SLOTS = int(os.environ.get('API_COMPUTE_SLOTS', 1))
+API_RESULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api-results")
+API_RESULT_CACHE_SIZE = 64
+
+def band_model_names():
+    """Band model files in MODEL_DIRECTORY, without the .json suffix"""
+    try:
+        return sorted(name[:-len(".json")] for name in os.listdir(MODEL_DIRECTORY) if name.endswith(".json"))
+    except FileNotFoundError:
+        return []
+
+@lru_cache(maxsize=1)
+def preset_library():
+    """Preset index from PRESET_DIRECTORY, read on first use"""
+    try:
+        with open(os.path.join(PRESET_DIRECTORY, "index.json")) as f:
+            return {preset['slug']: preset for preset in json.load(f)}
+    except FileNotFoundError:
+        return {}
 
 # Custom CSS styles
 external_stylesheets = [{
@@ -16,6 +149,8 @@ external_stylesheets = [{
 }]
 
 app = Dash(__name__, external_stylesheets=external_stylesheets)
+# WSGI entry point, e.g. for gunicorn app:server
+server = app.server
 
 
 app.index_string = '''
@@ -539,6 +674,118 @@ app.layout = html.Div([
                 'marginBottom': '20px'
             }, className='config-row'),
             
+            html.H4("Geometry", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Slit Orientation", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Horizontal: the slit lies along the slit direction. Vertical: it lies along sample normal x slit direction. Slit angles sweep along the slit.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="slit-orientation",
+                        options=[
+                            {'label': 'Horizontal', 'value': 'horizontal'},
+                            {'label': 'Vertical', 'value': 'vertical'},
+                        ],
+                        value='horizontal',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Scan Axis", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="What the second angle range scans. Deflector sweeps the acceptance perpendicular to the slit. Polar turns the sample about the vertical (y) axis, tilt about the horizontal (x) axis, azimuth about the sample normal.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="scan-axis",
+                        options=[
+                            {'label': 'Deflector', 'value': 'deflector'},
+                            {'label': 'Polar', 'value': 'polar'},
+                            {'label': 'Tilt', 'value': 'tilt'},
+                            {'label': 'Azimuth', 'value': 'azimuth'},
+                        ],
+                        value='deflector',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            
             html.H4("Slit Angles", style={
                 'color': '#000000',
                 'fontSize': '1.1rem',
@@ -678,7 +925,7 @@ app.layout = html.Div([
                 'marginBottom': '20px'
             }, className='config-row'),
             
-            html.H4("Deflector (Polar) Angles", style={
+            html.H4("Deflector / Scan Angles", style={
                 'color': '#000000',
                 'fontSize': '1.1rem',
                 'fontWeight': '600',
@@ -817,7 +1064,7 @@ app.layout = html.Div([
                 'marginBottom': '20px'
             }, className='config-row'),
             
-            html.H4("Primitive Reciprocal Lattice Vectors", style={
+            html.H4("Angle Sampling", style={
                 'color': '#000000',
                 'fontSize': '1.1rem',
                 'fontWeight': '600',
@@ -829,12 +1076,12 @@ app.layout = html.Div([
             html.Div([
                 html.Div([
                     html.Div([
-                        html.Label("b1 (kx,ky,kz) (1/Å)", style={
+                        html.Label("Sampling", style={
                             'display': 'inline-block',
                             'fontWeight': '600',
                             'color': '#000000',
                             'marginBottom': '8px',
-                            'fontSize': '0.9rem',
+                            'fontSize': '0.8rem',
                             'textTransform': 'uppercase',
                             'letterSpacing': '0.05em',
                             'fontFamily': 'Inter, sans-serif'
@@ -847,9 +1094,113 @@ app.layout = html.Div([
                             'color': '#1e40af',
                             'position': 'relative',
                             'display': 'inline-block'
-                        }, title="First primitive reciprocal lattice vector in units of inverse Angstroms. Defines the crystal structure. In the crystal coordinate system.")
+                        }, title="Uniform steps in angle, or angles placed from the Jacobian of the angle-to-k transform so neighbouring points are about the target Δk apart; adaptive sampling ignores the angle counts")
                     ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
-                    dcc.Input(id="b1-vec", type="text", value="1,0,0", debounce=True, style={
+                    dcc.RadioItems(
+                        id="angle-sampling",
+                        options=[
+                            {'label': 'Uniform', 'value': 'uniform'},
+                            {'label': 'Adaptive', 'value': 'adaptive'},
+                        ],
+                        value='uniform',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Target Δk (1/Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Largest momentum step between neighbouring angles in adaptive sampling, at the highest kinetic energy of the plan")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="k-spacing", type="number", value=0.02, min=0, step=0.001, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            
+            html.H4("Binding Energy", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Start (eV)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Lowest binding energy to calculate, in eV below the Fermi level. 0 is the Fermi level.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="binding-energy-start", type="number", value=0, debounce=True, style={
                         'width': '100%',
                         'padding': '12px',
                         'border': '2px solid #000000',
@@ -870,12 +1221,12 @@ app.layout = html.Div([
                 }),
                 html.Div([
                     html.Div([
-                        html.Label("b2 (kx,ky,kz) (1/Å)", style={
+                        html.Label("End (eV)", style={
                             'display': 'inline-block',
                             'fontWeight': '600',
                             'color': '#000000',
                             'marginBottom': '8px',
-                            'fontSize': '0.9rem',
+                            'fontSize': '0.8rem',
                             'textTransform': 'uppercase',
                             'letterSpacing': '0.05em',
                             'fontFamily': 'Inter, sans-serif'
@@ -888,9 +1239,9 @@ app.layout = html.Div([
                             'color': '#1e40af',
                             'position': 'relative',
                             'display': 'inline-block'
-                        }, title="Second primitive reciprocal lattice vector in units of inverse Angstroms. Defines the crystal structure. In the crystal coordinate system.")
+                        }, title="Highest binding energy to calculate, in eV below the Fermi level.")
                     ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
-                    dcc.Input(id="b2-vec", type="text", value="0,1,0", debounce=True, style={
+                    dcc.Input(id="binding-energy-end", type="number", value=0, debounce=True, style={
                         'width': '100%',
                         'padding': '12px',
                         'border': '2px solid #000000',
@@ -911,12 +1262,12 @@ app.layout = html.Div([
                 }),
                 html.Div([
                     html.Div([
-                        html.Label("b3 (kx,ky,kz)", style={
+                        html.Label("Count", style={
                             'display': 'inline-block',
                             'fontWeight': '600',
                             'color': '#000000',
                             'marginBottom': '8px',
-                            'fontSize': '0.9rem',
+                            'fontSize': '0.8rem',
                             'textTransform': 'uppercase',
                             'letterSpacing': '0.05em',
                             'fontFamily': 'Inter, sans-serif'
@@ -929,9 +1280,9 @@ app.layout = html.Div([
                             'color': '#1e40af',
                             'position': 'relative',
                             'display': 'inline-block'
-                        }, title="Third primitive reciprocal lattice vector in units of inverse Angstroms. Defines the crystal structure. In the crystal coordinate system.")
+                        }, title="Number of binding energies between start and end. 1 calculates only the start energy. Max 50 because every energy multiplies the number of points.")
                     ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
-                    dcc.Input(id="b3-vec", type="text", value="0,0,1", debounce=True, style={
+                    dcc.Input(id="binding-energy-count", type="number", value=1, min=1, max=ENERGY_COUNT_LIMIT, step=1, debounce=True, style={
                         'width': '100%',
                         'padding': '12px',
                         'border': '2px solid #000000',
@@ -954,87 +1305,2121 @@ app.layout = html.Div([
                 'flexDirection': 'row',
                 'flexWrap': 'wrap',
                 'marginBottom': '20px'
-            })
+            }, className='config-row'),
             
-        ], style={
-            'background': '#f8fafc',
-            'border': '4px solid #000000',
-            'padding': 'clamp(20px, 4vw, 30px)',
-            'marginBottom': '20px',
-            'boxShadow': '4px 4px 0px #000000'
-        }, className='config-section'),
-        
-        # Download Button Section
-        html.Div([
-            html.Button("Download CSV", id="download-btn", style={
-                'background': '#fbbf24',
+            html.H4("Momentum Resolution", style={
                 'color': '#000000',
-                'border': '3px solid #000000',
-                'padding': '15px 30px',
-                'fontSize': '1rem',
+                'fontSize': '1.1rem',
                 'fontWeight': '600',
+                'margin': '25px 0 15px 0',
                 'textTransform': 'uppercase',
                 'letterSpacing': '0.05em',
-                'cursor': 'pointer',
-                'boxShadow': '4px 4px 0px #000000',
                 'fontFamily': 'Inter, sans-serif'
-            })
-        ], style={
-            'textAlign': 'center',
-            'marginBottom': '20px'
-        }),
-        
-        # Plot Section
-        html.Div([
-            # Absolute Coordinates Plot
-            html.Div([
-                dcc.Graph(id="absolute-plot")
-            ], style={
-                'background': '#f8fafc',
-                'border': '3px solid #000000',
-                'padding': '20px',
-                'marginBottom': '20px',
-                'boxShadow': '4px 4px 0px #000000',
-                'flex': '1',
-                'marginRight': '10px'
             }),
-            
-            # Projected Coordinates Plot
             html.Div([
-                dcc.Graph(id="projected-plot")
-            ], style={
-                'background': '#f8fafc',
-                'border': '3px solid #000000',
-                'padding': '20px',
-                'marginBottom': '20px',
-                'boxShadow': '4px 4px 0px #000000',
-                'flex': '1'
-            })
-        ], style={
-            'display': 'flex',
-            'flexDirection': 'row',
-            'flexWrap': 'wrap'
-        }, className='plot-container'),
-        
-        dcc.Download(id="download-csv"),
-        dcc.Store(id='calculated-data-store')
-        
-            ], style={
-            'padding': 'clamp(15px, 3vw, 30px)',
-            'maxWidth': '1400px',
-            'margin': '0 auto'
-        }, className='main-container')
-    
-], style={
-    'background': '#ffffff',
-    'color': '#000000',
-    'margin': '0',
-    'padding': '0',
-    'fontFamily': 'Inter, sans-serif',
-    'minHeight': '100vh'
-})
-
-def parse_text_input(input_str, is_matrix=False):
+                html.Div([
+                    html.Div([
+                        html.Label("Resolution Channel", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Propagate the instrument resolution to a k-space resolution ellipsoid at every point; colors the plots by its largest FWHM and adds the three principal FWHMs to the CSV export")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="resolution-mode",
+                        options=[
+                            {'label': 'Off', 'value': 'off'},
+                            {'label': 'On', 'value': 'on'},
+                        ],
+                        value='off',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Angular Resolution (°)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Analyzer angular resolution (FWHM), applied to the slit and the scan angle")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="angular-resolution", type="number", value=0.1, min=0, step=0.01, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Energy Resolution (meV)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Analyzer energy resolution (FWHM)")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="energy-resolution", type="number", value=10, min=0, step=1, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Photon Bandwidth (meV)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Photon energy bandwidth (FWHM); adds in quadrature to the energy resolution")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="photon-bandwidth", type="number", value=5, min=0, step=1, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            
+            html.H4("Band Overlay", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Band Model", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Tight-binding model from the models directory, evaluated on every computed k-point; points where one of its bands lies within the energy window of the point's binding energy are marked")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Dropdown(
+                        id="band-model",
+                        options=[{'label': name, 'value': name} for name in band_model_names()],
+                        placeholder="No overlay",
+                        style={
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Energy Window (eV)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Largest difference between a model band and the binding energy of a point for the point to count as a crossing")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="band-window", type="number", value=0.05, min=0, step=0.01, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            
+            html.H4("Measured Data", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Measured Scans", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="HDF5/NeXus and Igor .ibw files from the measurements directory. Their angle and energy axes are read without the intensity data and converted with this plan's sample settings to show what was actually covered")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Dropdown(
+                        id="measured-scans",
+                        multi=True,
+                        placeholder="No measured data",
+                        style={
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            
+            html.H4("Lattice Builder", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Preset", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Common materials with precomputed Brillouin zones and high-symmetry points. Picking one fills in the lattice below.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Dropdown(
+                        id="lattice-preset",
+                        options=[{'label': preset['label'], 'value': slug} for slug, preset in preset_library().items()],
+                        placeholder="Custom lattice",
+                        style={
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("a (Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Real-space lattice constant a of the conventional cell.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="lattice-a", type="number", value=3.5, min=0, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("b (Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Real-space lattice constant b of the conventional cell.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="lattice-b", type="number", value=3.5, min=0, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("c (Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Real-space lattice constant c of the conventional cell.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="lattice-c", type="number", value=3.5, min=0, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("α (deg)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Angle between the b and c axes of the conventional cell.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="lattice-alpha", type="number", value=90, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("β (deg)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Angle between the a and c axes of the conventional cell.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="lattice-beta", type="number", value=90, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("γ (deg)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Angle between the a and b axes of the conventional cell.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="lattice-gamma", type="number", value=90, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Centering", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Lattice centering of the conventional cell. The primitive cell is built from it before taking the reciprocal lattice.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Dropdown(
+                        id="lattice-centering",
+                        options=[
+                            {'label': 'P (primitive)', 'value': 'P'},
+                            {'label': 'I (body centered)', 'value': 'I'},
+                            {'label': 'F (face centered)', 'value': 'F'},
+                            {'label': 'C (base centered)', 'value': 'C'},
+                            {'label': 'A (base centered)', 'value': 'A'},
+                            {'label': 'B (base centered)', 'value': 'B'},
+                            {'label': 'R (rhombohedral, hexagonal axes)', 'value': 'R'},
+                        ],
+                        value='P',
+                        clearable=False,
+                        style={
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("CIF File", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Load a CIF file from your computer. Its cell parameters and lattice centering fill the fields above and are applied right away.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Upload(
+                        id="cif-upload",
+                        children=html.Div(["Drop or ", html.A("select a CIF file", style={'textDecoration': 'underline', 'cursor': 'pointer'})]),
+                        multiple=False,
+                        style={
+                            'width': '100%',
+                            'padding': '12px',
+                            'border': '2px dashed #000000',
+                            'background': '#ffffff',
+                            'fontSize': '1rem',
+                            'fontWeight': '500',
+                            'textAlign': 'center',
+                            'boxSizing': 'border-box',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            html.Div([
+                html.Button("Apply Lattice", id="apply-lattice-btn", style={
+                    'background': '#fbbf24',
+                    'color': '#000000',
+                    'border': '3px solid #000000',
+                    'padding': '12px 24px',
+                    'fontSize': '0.9rem',
+                    'fontWeight': '600',
+                    'textTransform': 'uppercase',
+                    'letterSpacing': '0.05em',
+                    'cursor': 'pointer',
+                    'boxShadow': '3px 3px 0px #000000',
+                    'fontFamily': 'Inter, sans-serif'
+                }),
+                html.Div(id="lattice-status", style={
+                    'marginLeft': '15px',
+                    'fontSize': '0.9rem',
+                    'fontWeight': '500',
+                    'fontFamily': 'Inter, sans-serif'
+                })
+            ], style={
+                'display': 'flex',
+                'alignItems': 'center',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }),
+            
+            html.H4("Primitive Reciprocal Lattice Vectors", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("b1 (kx,ky,kz) (1/Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.9rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="First primitive reciprocal lattice vector in units of inverse Angstroms. Defines the crystal structure. In the crystal coordinate system.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="b1-vec", type="text", value="1,0,0", debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("b2 (kx,ky,kz) (1/Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.9rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Second primitive reciprocal lattice vector in units of inverse Angstroms. Defines the crystal structure. In the crystal coordinate system.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="b2-vec", type="text", value="0,1,0", debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("b3 (kx,ky,kz)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.9rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Third primitive reciprocal lattice vector in units of inverse Angstroms. Defines the crystal structure. In the crystal coordinate system.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="b3-vec", type="text", value="0,0,1", debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }),
+
+            html.H4("Brillouin Zone Coverage", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Tolerance (1/Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Radius around each projected momentum point that counts as covered. Roughly the momentum resolution of the measurement.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="coverage-tolerance", type="number", value=0.02, min=0, max=COVERAGE_MAX_TOLERANCE, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("kz Plane (1/Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Optional kz value in the first Brillouin zone. When set, coverage is reported for this constant-kz plane instead of the whole zone.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="coverage-kz-plane", type="number", debounce=True, placeholder="Whole zone", style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Symmetry", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Fold points into the irreducible wedge of the lattice point group (detected from b1, b2, b3); coverage then counts symmetry-equivalent momenta once and the zone plot shows only the wedge")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="symmetry-reduction",
+                        options=[
+                            {'label': 'Off', 'value': 'off'},
+                            {'label': 'On', 'value': 'on'},
+                        ],
+                        value='off',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+
+            html.H4("Optimizer", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Targets", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Momentum points the plan should cover, separated by semicolons. Use high-symmetry labels of a preset (e.g. Γ; X; L) or kx,ky,kz in 1/Å.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="optimizer-targets", type="text", placeholder="Γ; X; 0.5,0.5,0", debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("hν Min (eV)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Lowest photon energy the optimizer may choose.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="optimizer-hv-min", type="number", value=15, min=0, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("hν Max (eV)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Highest photon energy the optimizer may choose.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="optimizer-hv-max", type="number", value=120, min=0, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Max Offset (deg)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Largest sample normal offset along or perpendicular to the slit the optimizer may choose.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="optimizer-max-offset", type="number", value=10, min=0, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            html.Div([
+                html.Button("Optimize", id="optimize-btn", style={
+                    'background': '#fbbf24',
+                    'color': '#000000',
+                    'border': '3px solid #000000',
+                    'padding': '12px 24px',
+                    'fontSize': '0.9rem',
+                    'fontWeight': '600',
+                    'textTransform': 'uppercase',
+                    'letterSpacing': '0.05em',
+                    'cursor': 'pointer',
+                    'boxShadow': '3px 3px 0px #000000',
+                    'fontFamily': 'Inter, sans-serif'
+                }),
+                html.Div(id="optimizer-summary", style={
+                    'marginLeft': '15px',
+                    'fontSize': '0.9rem',
+                    'fontWeight': '500',
+                    'fontFamily': 'Inter, sans-serif'
+                })
+            ], style={
+                'display': 'flex',
+                'alignItems': 'center',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }),
+
+            html.H4("Display", style={
+                'color': '#000000',
+                'fontSize': '1.1rem',
+                'fontWeight': '600',
+                'margin': '25px 0 15px 0',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("View", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="3D shows the momentum coordinates in space. 2D Cut projects them onto the cut plane below and shows the Brillouin zone cross-section in that plane.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="view-mode",
+                        options=[
+                            {'label': '3D', 'value': '3d'},
+                            {'label': '2D Cut', 'value': 'cut'},
+                        ],
+                        value='3d',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Render Mode", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Markers draws every calculated point. Surface draws the slit/deflector grid as a sheet with iso-angle lines, which is much lighter for large grids.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="render-mode",
+                        options=[
+                            {'label': 'Markers', 'value': 'markers'},
+                            {'label': 'Surface', 'value': 'surface'},
+                        ],
+                        value='markers',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Precision", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Float32 halves memory and the data sent to the browser while staying well within the 1e-4 Å⁻¹ needed for planning. Float64 is used automatically if float32 would exceed that.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="precision",
+                        options=[
+                            {'label': 'Float32', 'value': 'float32'},
+                            {'label': 'Float64', 'value': 'float64'},
+                        ],
+                        value='float32',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+            
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Zone", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Bulk folds momenta into the 3D first Brillouin zone. Surface projects the reciprocal lattice onto the sample surface (sample normal) and folds only the in-plane momentum into the 2D surface Brillouin zone, plotted in the surface plane; for 2D and layered materials")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.RadioItems(
+                        id="zone-mode",
+                        options=[
+                            {'label': 'Bulk 3D', 'value': 'bulk'},
+                            {'label': 'Surface 2D', 'value': 'surface'},
+                        ],
+                        value='bulk',
+                        inline=True,
+                        inputStyle={'marginRight': '6px'},
+                        labelStyle={'marginRight': '20px', 'fontWeight': '500'},
+                        style={
+                            'padding': '12px 0',
+                            'fontSize': '1rem',
+                            'fontFamily': 'Inter, sans-serif'
+                        }
+                    )
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row'),
+
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Label("Cut Plane Normal (x,y,z)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Normal of the plane the 2D Cut view shows the momentum coordinates near, projected onto it. In the crystal coordinate system.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="cut-plane-normal", type="text", value="0,0,1", debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Cut Plane Offset (1/Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Distance of the cut plane from the Γ point along its normal. Sets which points the 2D Cut view shows and which cross-section of the first Brillouin zone is drawn.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="cut-plane-offset", type="number", value=0, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginRight': '10px',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                }),
+                html.Div([
+                    html.Div([
+                        html.Label("Cut Plane Thickness (1/Å)", style={
+                            'display': 'inline-block',
+                            'fontWeight': '600',
+                            'color': '#000000',
+                            'marginBottom': '8px',
+                            'fontSize': '0.8rem',
+                            'textTransform': 'uppercase',
+                            'letterSpacing': '0.05em',
+                            'fontFamily': 'Inter, sans-serif'
+                        }),
+                        html.Div("ⓘ", style={
+                            'marginLeft': '8px',
+                            'marginBottom': '8px',
+                            'cursor': 'help',
+                            'fontSize': '1.2rem',
+                            'color': '#1e40af',
+                            'position': 'relative',
+                            'display': 'inline-block'
+                        }, title="Width of the slab around the cut plane whose points the 2D Cut view shows. Points farther than half of it from the plane are left out.")
+                    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+                    dcc.Input(id="cut-plane-thickness", type="number", value=0.1, min=0, step=0.01, debounce=True, style={
+                        'width': '100%',
+                        'padding': '12px',
+                        'border': '2px solid #000000',
+                        'background': '#ffffff',
+                        'fontSize': '1rem',
+                        'fontWeight': '500',
+                        'boxSizing': 'border-box',
+                        'fontFamily': 'Inter, sans-serif'
+                    })
+                ], style={
+                    'flex': '1',
+                    'marginBottom': '10px',
+                    'background': '#ffffff',
+                    'border': '2px solid #000000',
+                    'padding': '15px',
+                    'boxShadow': '3px 3px 0px #000000'
+                })
+            ], style={
+                'display': 'flex',
+                'flexDirection': 'row',
+                'flexWrap': 'wrap',
+                'marginBottom': '20px'
+            }, className='config-row')
+
+        ], style={
+            'background': '#f8fafc',
+            'border': '4px solid #000000',
+            'padding': 'clamp(20px, 4vw, 30px)',
+            'marginBottom': '20px',
+            'boxShadow': '4px 4px 0px #000000'
+        }, className='config-section'),
+        
+        # Download Button Section
+        html.Div([
+            html.Button("Download CSV", id="download-btn", style={
+                'background': '#fbbf24',
+                'color': '#000000',
+                'border': '3px solid #000000',
+                'padding': '15px 30px',
+                'fontSize': '1rem',
+                'fontWeight': '600',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'cursor': 'pointer',
+                'boxShadow': '4px 4px 0px #000000',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.A("Link to this plan", id="share-link", href="", style={
+                'display': 'inline-block',
+                'marginLeft': '20px',
+                'color': '#1e40af',
+                'fontSize': '1rem',
+                'fontWeight': '600',
+                'textDecoration': 'underline',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div(id="plan-link-status", style={
+                'marginTop': '15px',
+                'color': '#b91c1c',
+                'fontSize': '1rem',
+                'fontWeight': '600',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div(id="coverage-summary", style={
+                'marginTop': '15px',
+                'fontSize': '1rem',
+                'fontWeight': '600',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            }),
+            html.Div(id="sampling-summary", style={
+                'marginTop': '10px',
+                'fontSize': '1rem',
+                'fontWeight': '600',
+                'textTransform': 'uppercase',
+                'letterSpacing': '0.05em',
+                'fontFamily': 'Inter, sans-serif'
+            })
+        ], style={
+            'textAlign': 'center',
+            'marginBottom': '20px'
+        }),
+        
+        # Plot Section
+        html.Div([
+            # Absolute Coordinates Plot
+            html.Div([
+                dcc.Graph(id="absolute-plot")
+            ], style={
+                'background': '#f8fafc',
+                'border': '3px solid #000000',
+                'padding': '20px',
+                'marginBottom': '20px',
+                'boxShadow': '4px 4px 0px #000000',
+                'flex': '1',
+                'marginRight': '10px'
+            }),
+            
+            # Projected Coordinates Plot
+            html.Div([
+                dcc.Graph(id="projected-plot")
+            ], style={
+                'background': '#f8fafc',
+                'border': '3px solid #000000',
+                'padding': '20px',
+                'marginBottom': '20px',
+                'boxShadow': '4px 4px 0px #000000',
+                'flex': '1'
+            })
+        ], style={
+            'display': 'flex',
+            'flexDirection': 'row',
+            'flexWrap': 'wrap'
+        }, className='plot-container'),
+        
+        dcc.Download(id="download-csv"),
+        dcc.Location(id="url", refresh=False),
+        dcc.Store(id='calculated-data-store'),
+        dcc.Store(id='session-id', storage_type='session'),
+        dcc.Interval(id='refine-interval', interval=REFINE_POLL_MS, disabled=True)
+        
+            ], style={
+            'padding': 'clamp(15px, 3vw, 30px)',
+            'maxWidth': '1400px',
+            'margin': '0 auto'
+        }, className='main-container')
+    
+], style={
+    'background': '#ffffff',
+    'color': '#000000',
+    'margin': '0',
+    'padding': '0',
+    'fontFamily': 'Inter, sans-serif',
+    'minHeight': '100vh'
+})
+
+# Components whose values define a plan, in compute_plan argument order
+PLAN_INPUTS = [
+    "photon-energy",
+    "inner-potential",
+    "work-function",
+    "offset-along-slit",
+    "offset-perpendicular-slit",
+    "sample-normal",
+    "slit-direction",
+    "slit-angle-start",
+    "slit-angle-end",
+    "slit-angle-count",
+    "deflector-angle-start",
+    "deflector-angle-end",
+    "deflector-angle-count",
+    "binding-energy-start",
+    "binding-energy-end",
+    "binding-energy-count",
+    "b1-vec",
+    "b2-vec",
+    "b3-vec",
+    "render-mode",
+    "view-mode",
+    "precision",
+    "cut-plane-normal",
+    "cut-plane-offset",
+    "slit-orientation",
+    "scan-axis",
+    "angle-sampling",
+    "k-spacing",
+    "resolution-mode",
+    "angular-resolution",
+    "energy-resolution",
+    "photon-bandwidth",
+    "symmetry-reduction",
+    "zone-mode",
+    "band-model",
+    "band-window",
+    "measured-scans",
+    "cut-plane-thickness",
+]
+# Plan inputs that only change how computed momenta are drawn; plans differing only in these share a PlanResult
+DISPLAY_INPUTS = ("render-mode", "view-mode", "cut-plane-normal", "cut-plane-offset", "symmetry-reduction",
+                  "band-model", "band-window", "measured-scans", "cut-plane-thickness")
+# Upper bound on the decompressed size of a shared plan state
+PLAN_STATE_MAX_BYTES = 4096
+
+class SnapshotCache:
+    """Thread-safe LRU of computed values by key; every hit refreshes an entry so frequently used ones stay warm"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+PLAN_SNAPSHOTS = SnapshotCache(PLAN_CACHE_SIZE)
+EMISSION_DIRECTIONS = SnapshotCache(EMISSION_CACHE_SIZE)
+BAND_ENERGIES = SnapshotCache(BAND_CACHE_SIZE)
+
+class PlanRequests:
+    """Coalesces plan computations across requests.
+
+    Identical in-flight plans share one computation. A request still queued for a compute slot is
+    dropped once a newer request from the same session arrives, unless others are waiting on its plan.
+    """
+
+    def __init__(self, slots):
+        self.slots = threading.Semaphore(slots)
+        self.lock = threading.Lock()
+        self.in_flight = {} # plan key -> [future, requests waiting on it]
+        self.latest = {} # session -> [newest request number, requests in progress]
+        self.counter = 0
+
+    def run(self, session, key, compute):
+        with self.lock:
+            self.counter += 1
+            number = self.counter
+            session_entry = self.latest.setdefault(session, [number, 0])
+            session_entry[0] = number
+            session_entry[1] += 1
+            entry = self.in_flight.get(key)
+            leader = entry is None
+            if leader:
+                entry = self.in_flight[key] = [Future(), 0]
+            else:
+                entry[1] += 1
+        try:
+            if not leader:
+                return entry[0].result()
+            return self._lead(session, number, key, entry, compute)
+        finally:
+            with self.lock:
+                session_entry[1] -= 1
+                if session_entry[1] == 0 and self.latest.get(session) is session_entry:
+                    del self.latest[session]
+
+    def _lead(self, session, number, key, entry, compute):
+        future = entry[0]
+        with self.slots:
+            with self.lock:
+                superseded = session is not None and self.latest[session][0] != number and entry[1] == 0
+                if superseded:
+                    del self.in_flight[key]
+            if superseded:
+                future.set_exception(PreventUpdate())
+                raise PreventUpdate
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self.lock:
+                    del self.in_flight[key]
+        return future.result()
+
+PLAN_REQUESTS = PlanRequests(PLAN_COMPUTE_SLOTS)
+API_REQUESTS = PlanRequests(API_COMPUTE_SLOTS)
+# Full-resolution plans computed behind a preview, by plan key
+REFINEMENT_EXECUTOR = ThreadPoolExecutor(max_workers=PLAN_COMPUTE_SLOTS, thread_name_prefix='plan-refine')
+REFINEMENTS = {}
+REFINEMENTS_LOCK = threading.Lock()
+
+def run_plan(session, key, values, result_key, **options):
+    """Computes a plan through PLAN_REQUESTS and keeps it in PLAN_SNAPSHOTS if it is worth sharing"""
+    result = PLAN_REQUESTS.run(session, key, lambda: compute_plan(*values, result_key, **options))
+    # Only results worth sharing are kept; failed inputs return an empty store
+    if result[2]:
+        PLAN_SNAPSHOTS.put(key, result)
+    return result
+
+def snapshot_plan(key):
+    """PLAN_SNAPSHOTS entry for key while its stored result exists, which a hit keeps from eviction"""
+    result = PLAN_SNAPSHOTS.get(key)
+    if result is not None and PlanResult.open(result[2]['plan']) is None:
+        # Evicted from disk, so the export and coverage would find nothing; recompute instead
+        PLAN_SNAPSHOTS.pop(key)
+        return None
+    return result
+
+def start_refinement(session, key, values, result_key, preview):
+    """Computes the full plan in the background, reusing the points of the (result key, stride) preview"""
+    with REFINEMENTS_LOCK:
+        for done in [k for k, future in REFINEMENTS.items() if future.done() and k != key]:
+            del REFINEMENTS[done]
+        future = REFINEMENTS.get(key)
+        if future is None or future.done():
+            REFINEMENTS[key] = REFINEMENT_EXECUTOR.submit(run_plan, session, key, values, result_key, preview=preview)
+
+def preview_stride(values):
+    """Stride over the slit and deflector angles that brings a plan down to about PREVIEW_POINTS, 1 if it is small"""
+    plan = dict(zip(PLAN_INPUTS, values))
+    counts = [plan["slit-angle-count"], plan["deflector-angle-count"], plan["binding-energy-count"]]
+    if plan["angle-sampling"] == 'adaptive':
+        try:
+            slit_angles, deflector_angles, _ = adaptive_angle_axes(
+                plan["photon-energy"], plan["inner-potential"], plan["work-function"],
+                (plan["slit-angle-start"], plan["slit-angle-end"]), (plan["deflector-angle-start"], plan["deflector-angle-end"]),
+                (plan["binding-energy-start"], plan["binding-energy-end"]), plan["k-spacing"],
+                (plan["slit-orientation"], plan["scan-axis"]),
+                (plan["offset-along-slit"], plan["offset-perpendicular-slit"])
+            )
+        except (TypeError, ValueError):
+            return 1
+        counts[:2] = len(slit_angles), len(deflector_angles)
+    if not all(isinstance(count, int) and count > 0 for count in counts):
+        return 1
+    total = counts[0] * counts[1] * counts[2]
+    if total <= PROGRESSIVE_MIN_POINTS:
+        return 1
+    return int(np.ceil(np.sqrt(total / PREVIEW_POINTS)))
+
+def encode_plan_state(values):
+    """URL-safe compressed state of the plan inputs and the hash of it that keys PLAN_SNAPSHOTS.
+
+    The state is None when it would exceed PLAN_STATE_MAX_BYTES, which decode_plan_state refuses.
+    """
+    normalized = [re.sub(r"\s+", "", value) if isinstance(value, str) else value for value in values]
+    payload = json.dumps(normalized, separators=(",", ":"), ensure_ascii=False).encode()
+    key = hashlib.sha256(payload).hexdigest()[:16]
+    if len(payload) > PLAN_STATE_MAX_BYTES:
+        return None, key
+    return base64.urlsafe_b64encode(zlib.compress(payload, 9)).decode('ascii').rstrip("="), key
+
+def plan_link(state):
+    """href and text of the share link for an encode_plan_state state"""
+    if state is None:
+        return "", f"Plan too large to link (over {PLAN_STATE_MAX_BYTES} bytes)"
+    return f"?plan={state}", "Link to this plan"
+
+def plan_result_key(values):
+    """Hash of the plan inputs that affect the computed momenta, which keys the stored PlanResult"""
+    return encode_plan_state([None if component in DISPLAY_INPUTS else value
+                              for component, value in zip(PLAN_INPUTS, values)])[1]
+
+def decode_plan_state(state):
+    """Plan input values from encode_plan_state output, checked by validate_plan_values.
+
+    Raises ValueError saying why the state cannot be restored.
+    """
+    try:
+        compressed = base64.urlsafe_b64decode(state + "=" * (-len(state) % 4))
+        decompressor = zlib.decompressobj()
+        payload = decompressor.decompress(compressed, PLAN_STATE_MAX_BYTES)
+    except (ValueError, zlib.error):
+        raise ValueError("the link is damaged")
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"the plan is larger than {PLAN_STATE_MAX_BYTES} bytes")
+    try:
+        values = json.loads(payload)
+    except ValueError:
+        raise ValueError("the link is damaged")
+    if not isinstance(values, list) or len(values) != len(PLAN_INPUTS):
+        raise ValueError("the link is from an incompatible version")
+    return validate_plan_values(values)
+
+@lru_cache(maxsize=1)
+def plan_input_controls():
+    """Layout controls of PLAN_INPUTS by id, whose types, options and bounds also limit restored plans"""
+    return {component.id: component for component in app.layout._traverse()
+            if getattr(component, 'id', None) in PLAN_INPUTS}
+
+def validate_plan_values(values):
+    """Plan input values clamped to the bounds of their controls.
+
+    Raises ValueError naming the first value its control could not hold.
+    """
+    controls = plan_input_controls()
+    validated = []
+    for component, value in zip(PLAN_INPUTS, values):
+        control = controls[component]
+        if value is None:
+            pass
+        elif component == "measured-scans":
+            # Scans missing from this server's measurements directory are dropped, as in the overlay
+            if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+                raise ValueError(f"{component} is not a list of scan names")
+            scans = index_measurements()
+            value = [name for name in value if name in scans]
+        elif component == "band-model":
+            if value not in band_model_names():
+                raise ValueError(f"band model {value!r} is not available")
+        elif hasattr(control, 'options'):
+            if value not in [option['value'] for option in control.options]:
+                raise ValueError(f"{component} has no option {value!r}")
+        elif control.type == "text":
+            if not isinstance(value, str):
+                raise ValueError(f"{component} is not text")
+        else:
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+                raise ValueError(f"{component} is not a number")
+            if getattr(control, 'step', None) == 1:
+                if value != int(value):
+                    raise ValueError(f"{component} is not a whole number")
+                value = int(value)
+            if getattr(control, 'min', None) is not None:
+                value = max(value, control.min)
+            if getattr(control, 'max', None) is not None:
+                value = min(value, control.max)
+        validated.append(value)
+    return validated
+
+class PlanResult:
+    """Momenta of one computed plan, memory-mapped from RESULT_DIRECTORY/<plan hash>/.
+
+    absolute and projected are (energy, angle, 3) arrays; flat point rows run energy-major,
+    matching the plots and the CSV export.
+    """
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.slit_angles = np.load(os.path.join(path, "slit_angle.npy")) # (n,)
+        self.deflector_angles = np.load(os.path.join(path, "deflector_angle.npy")) # (n,)
+        self.binding_energies = np.load(os.path.join(path, "binding_energy.npy")) # (m,)
+        self.absolute = np.load(os.path.join(path, "absolute.npy"), mmap_mode=mode) # (m, n, 3)
+        self.projected = np.load(os.path.join(path, "projected.npy"), mmap_mode=mode) # (m, n, 3)
+        # Principal FWHMs of the k-space resolution, only stored for plans with the resolution channel on
+        resolution_path = os.path.join(path, "resolution.npy")
+        self.resolution = np.load(resolution_path, mmap_mode=mode) if os.path.exists(resolution_path) else None # (m, n, 3)
+
+    @classmethod
+    def open(cls, key, directory=None):
+        """Stored result for a plan hash, or None if it was never computed or has been evicted"""
+        path = os.path.join(directory or RESULT_DIRECTORY, key)
+        try:
+            result = cls(path)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return result
+
+    @classmethod
+    def create(cls, key, slit_values, deflector_values, binding_energies, dtype, resolution=False,
+               directory=None):
+        """Writable result in a private directory for the engine to fill; publish() makes it visible under key"""
+        directory = directory or RESULT_DIRECTORY
+        path = partial_result_directory(key, directory)
+        shape = (len(binding_energies), len(slit_values), 3)
+        for name, values in (("slit_angle", slit_values), ("deflector_angle", deflector_values),
+                             ("binding_energy", binding_energies)):
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(values, dtype=dtype))
+        for name in ("absolute", "projected") + (("resolution",) if resolution else ()):
+            np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode='w+', dtype=dtype, shape=shape).flush()
+        result = cls(path, mode='r+')
+        result.key, result.directory = key, directory
+        return result
+
+    def publish(self):
+        """Flush a result from create() to disk, move it into place and return it read-only"""
+        for volume in (self.absolute, self.projected, self.resolution):
+            if volume is not None:
+                volume.flush()
+        return PlanResult(store_result_directory(self.path, self.key, self.directory, RESULT_CACHE_SIZE))
+
+    def discard(self):
+        """Delete a result from create() that will not be published"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def chunks(self, chunk_points=VOLUME_CHUNK_POINTS):
+        """MomentumChunks of zero-copy views into the stored arrays, energy-major"""
+        energy_count, angle_count = self.absolute.shape[:2]
+        energy_step, angle_step = chunk_steps(angle_count, chunk_points)
+        for energy_start in range(0, energy_count, energy_step):
+            energies = slice(energy_start, energy_start + energy_step)
+            for angle_start in range(0, angle_count, angle_step):
+                angles = slice(angle_start, angle_start + angle_step)
+                yield MomentumChunk(energy_start, angle_start, self.slit_angles[angles], self.deflector_angles[angles],
+                                    self.binding_energies[energies], self.absolute[energies, angles],
+                                    self.projected[energies, angles],
+                                    None if self.resolution is None else self.resolution[energies, angles])
+
+def partial_result_directory(key, directory):
+    """New directory private to this thread, to be filled and then stored under key by store_result_directory"""
+    path = os.path.join(directory, f"{key}.{os.getpid()}.{threading.get_ident()}.partial")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def store_result_directory(path, key, directory, keep):
+    """Move a filled partial result directory into place under key, evict all but the keep most recently used
+    results in directory and return its new path"""
+    stored = os.path.join(directory, key)
+    try:
+        os.rename(path, stored)
+    except OSError:
+        # Another worker stored the same result first; its copy is identical
+        shutil.rmtree(path, ignore_errors=True)
+    evict_results(directory, keep)
+    return stored
+
+def evict_results(directory, keep):
+    """Delete all but the keep most recently used stored results, and partial results left by crashed workers"""
+    now = time.time()
+    for entry in os.scandir(directory):
+        if entry.is_dir() and entry.name.endswith(".partial") and now - entry.stat().st_mtime > PARTIAL_RESULT_MAX_AGE:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    entries = [entry for entry in os.scandir(directory) if entry.is_dir() and not entry.name.endswith(".partial")]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    # Open memory maps stay valid after their files are unlinked
+    for entry in entries[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+def parse_text_input(input_str, is_matrix=False):
     """Parse comma-separated values from text input"""
     if not input_str or input_str.strip() == "":
         return None
@@ -1048,309 +3433,2457 @@ def parse_text_input(input_str, is_matrix=False):
     except:
         return None
 
-@callback(
-    [Output("absolute-plot", "figure"),
-     Output("projected-plot", "figure"),
-     Output("calculated-data-store", "data")],
-    [Input("photon-energy", "value"),
-     Input("inner-potential", "value"),
-     Input("work-function", "value"),
-     Input("offset-along-slit", "value"),
-     Input("offset-perpendicular-slit", "value"),
-     Input("sample-normal", "value"),
-     Input("slit-direction", "value"),
-     Input("slit-angle-start", "value"),
-     Input("slit-angle-end", "value"),
-     Input("slit-angle-count", "value"),
-     Input("deflector-angle-start", "value"),
-     Input("deflector-angle-end", "value"),
-     Input("deflector-angle-count", "value"),
-     Input("b1-vec", "value"),
-     Input("b2-vec", "value"),
-     Input("b3-vec", "value")]
+@callback(
+    [Output("absolute-plot", "figure"),
+     Output("projected-plot", "figure"),
+     Output("calculated-data-store", "data"),
+     Output("share-link", "href"),
+     Output("share-link", "children"),
+     Output("refine-interval", "disabled"),
+     Output("refine-interval", "n_intervals")],
+    [Input(component, "value") for component in PLAN_INPUTS],
+    State("session-id", "data")
+)
+def update_plot(*args):
+    *values, session_id = args
+    state, key = encode_plan_state(values)
+    result = snapshot_plan(key)
+    if result is None:
+        result_key = plan_result_key(values)
+        stride = preview_stride(values)
+        if stride > 1 and PlanResult.open(result_key) is None:
+            # Answer with a strided preview first; refine_plot swaps in the full grid once it is done
+            preview_key = f"{key}-preview"
+            preview_result_key = f"{result_key}-preview"
+            result = (snapshot_plan(preview_key)
+                      or run_plan(session_id, preview_key, values, preview_result_key, angle_stride=stride))
+            if result[2]:
+                start_refinement(session_id, key, values, result_key, (preview_result_key, stride))
+                data_to_store = {**result[2], 'refining': key, 'state': state}
+                return result[0], result[1], data_to_store, *plan_link(state), False, 0
+        result = run_plan(session_id, key, values, result_key)
+    return *result, *plan_link(state), True, 0
+
+@callback(
+    [Output("absolute-plot", "figure", allow_duplicate=True),
+     Output("projected-plot", "figure", allow_duplicate=True),
+     Output("calculated-data-store", "data", allow_duplicate=True),
+     Output("refine-interval", "disabled", allow_duplicate=True)],
+    Input("refine-interval", "n_intervals"),
+    State("calculated-data-store", "data"),
+    prevent_initial_call=True
+)
+def refine_plot(n_intervals, data):
+    key = (data or {}).get('refining')
+    if not key:
+        return dash.no_update, dash.no_update, dash.no_update, True
+    future = REFINEMENTS.get(key)
+    if future is not None and not future.done():
+        raise PreventUpdate
+    result = snapshot_plan(key)
+    try:
+        values = decode_plan_state(data.get('state') or "")
+    except ValueError:
+        # Too large to store in the page, or naming a band model or option that is gone; only this worker's
+        # own refinement can complete it
+        values = None
+    if result is None and values is not None and PlanResult.open(plan_result_key(values)) is not None:
+        # Refined by another worker process; its stored volume makes the figures cheap to rebuild
+        result = run_plan(None, key, values, plan_result_key(values))
+    if result is None:
+        if future is None and n_intervals < REFINE_MAX_POLLS:
+            raise PreventUpdate
+        # The refinement was superseded or failed, so the preview stays
+        return dash.no_update, dash.no_update, {k: v for k, v in data.items() if k not in ('refining', 'state')}, True
+    return *result, True
+
+@callback(
+    Output("sampling-summary", "children"),
+    Input("calculated-data-store", "data"),
+)
+def show_sampling(data):
+    return (data or {}).get('sampling', "")
+
+@callback(
+    Output("session-id", "data"),
+    Input("session-id", "data"),
+)
+def assign_session(session_id):
+    # One id per browser tab, so newer requests from a tab can supersede its queued ones
+    if session_id:
+        raise PreventUpdate
+    return uuid.uuid4().hex
+
+@callback(
+    Output("measured-scans", "options"),
+    Input("url", "pathname"),
+)
+def list_measured_scans(pathname):
+    # Indexed on every page load; unchanged files are not read again
+    return [{'label': name, 'value': name} for name in sorted(index_measurements())]
+
+@callback(
+    [Output(component, "value", allow_duplicate=True) for component in PLAN_INPUTS],
+    Output("plan-link-status", "children"),
+    Input("url", "search"),
+    prevent_initial_call='initial_duplicate',
+)
+def restore_plan(search):
+    states = parse_qs((search or "").lstrip("?")).get("plan")
+    if not states:
+        raise PreventUpdate
+    try:
+        values = decode_plan_state(states[0])
+    except ValueError as error:
+        return *[dash.no_update] * len(PLAN_INPUTS), f"Could not open the plan link: {error}."
+    return *values, ""
+
+def compute_plan(photon_energy, inner_potential, work_function,
+                offset_along_slit, offset_perpendicular_slit,
+                sample_normal_str, slit_direction_str,
+                slit_start, slit_end, slit_count,
+                deflector_start, deflector_end, deflector_count,
+                binding_start, binding_end, binding_count,
+                b1_str, b2_str, b3_str, render_mode,
+                view_mode, precision, cut_normal_str, cut_offset,
+                slit_orientation, scan_axis, angle_sampling, k_spacing,
+                resolution_mode, angular_resolution, energy_resolution, photon_bandwidth,
+                symmetry_reduction, zone_mode, band_model, band_window, measured_scans, cut_thickness,
+                plan_key, angle_stride=1, preview=None):
+    
+    inputs = [photon_energy, inner_potential, work_function, offset_along_slit, offset_perpendicular_slit,
+              sample_normal_str, slit_direction_str, slit_start, slit_end, slit_count,
+              deflector_start, deflector_end, deflector_count, binding_start, binding_end, binding_count,
+              b1_str, b2_str, b3_str, render_mode,
+              view_mode, precision, cut_normal_str, cut_offset,
+              slit_orientation, scan_axis, angle_sampling, resolution_mode, symmetry_reduction, zone_mode]
+    if any(i is None for i in inputs):
+        raise PreventUpdate
+
+    if slit_orientation not in SLIT_ORIENTATIONS or scan_axis not in SCAN_AXES or angle_sampling not in ANGLE_SAMPLINGS:
+        return go.Figure(), go.Figure(), {}
+    if resolution_mode not in RESOLUTION_MODES or symmetry_reduction not in SYMMETRY_MODES or zone_mode not in ZONE_MODES:
+        return go.Figure(), go.Figure(), {}
+    resolved = resolution_mode == 'on'
+    widths = None
+    if resolved:
+        # The resolution fields only matter, and are only checked, with the resolution channel on
+        if any(width is None or width < 0 for width in (angular_resolution, energy_resolution, photon_bandwidth)):
+            return go.Figure(), go.Figure(), {}
+        widths = (angular_resolution, energy_resolution / 1000, photon_bandwidth / 1000)
+    if band_model and (band_window is None or band_window < 0):
+        return go.Figure(), go.Figure(), {}
+    # Checked before any grid is built, so oversized counts cannot allocate before they are rejected
+    if slit_count > COUNT_LIMIT or deflector_count > COUNT_LIMIT or binding_count > ENERGY_COUNT_LIMIT:
+        return go.Figure(), go.Figure(), {}
+    if angle_sampling == 'adaptive' and (k_spacing is None or not k_spacing > 0):
+        return go.Figure(), go.Figure(), {}
+    geometry = (slit_orientation, scan_axis)
+    scan_label = SCAN_AXIS_LABELS[scan_axis]
+
+    # Create angle grids
+    sampling_summary = None
+    if angle_sampling == 'adaptive':
+        try:
+            slit_angles, deflector_angles, uniform_points = adaptive_angle_axes(
+                photon_energy, inner_potential, work_function, (slit_start, slit_end), (deflector_start, deflector_end),
+                (binding_start, binding_end), k_spacing, geometry, (offset_along_slit, offset_perpendicular_slit)
+            )
+        except ValueError:
+            return go.Figure(), go.Figure(), {}
+        slit_count, deflector_count = len(slit_angles), len(deflector_angles)
+        adaptive_points = slit_count * deflector_count
+        sampling_summary = (f"Adaptive sampling: {slit_count} × {deflector_count} angles, {adaptive_points:,} points vs "
+                            f"{uniform_points:,} uniform at Δk ≤ {k_spacing:g} 1/Å "
+                            f"({100 * (1 - adaptive_points / uniform_points):.0f} % fewer)")
+    else:
+        slit_angles = np.linspace(slit_start, slit_end, slit_count)
+        deflector_angles = np.linspace(deflector_start, deflector_end, deflector_count)
+
+    slit_angles = slit_angles[::angle_stride]
+    deflector_angles = deflector_angles[::angle_stride]
+    slit_values_grid, deflector_values_grid = np.meshgrid(slit_angles, deflector_angles)
+    
+    slit_values = slit_values_grid.flatten()
+    deflector_values = deflector_values_grid.flatten()
+    binding_energies = np.linspace(binding_start, binding_end, binding_count)
+
+    # Scalar inputs are broadcast by the engine, no need to expand them for all points
+    sample_normal = parse_text_input(sample_normal_str)
+    slit_direction = parse_text_input(slit_direction_str)
+    
+    b1 = parse_text_input(b1_str)
+    b2 = parse_text_input(b2_str)
+    b3 = parse_text_input(b3_str)
+
+    if sample_normal is None or slit_direction is None or b1 is None or b2 is None or b3 is None:
+        return go.Figure(), go.Figure(), {}
+
+    sample_normal = sample_normal / np.linalg.norm(sample_normal)
+    slit_direction = slit_direction / np.linalg.norm(slit_direction)
+    reciprocal_lattice = np.array([b1, b2, b3])
+    surface_normal = sample_normal if zone_mode == 'surface' else None
+
+    try:
+        dtype = np.float64
+        if precision == 'float32' and float32_error_bound(reciprocal_lattice) <= FLOAT32_TOLERANCE:
+            dtype = np.float32
+
+        # (energy, angle, 3) volumes written straight to disk, then read back as flat energy-major views
+        result = PlanResult.open(plan_key)
+        if result is None:
+            result = PlanResult.create(plan_key, slit_values, deflector_values, binding_energies, dtype, resolved)
+            try:
+                # The compiled kernel outruns NumPy even with cached trig; without it, energy-only edits skip the trig
+                engine = 'exact' if JIT_READY.is_set() else 'factorized'
+                coarse = PlanResult.open(preview[0]) if preview is not None else None
+                if coarse is None or coarse.absolute.dtype != dtype:
+                    momentum_volume(
+                        photon_energy, slit_values, deflector_values, inner_potential, work_function,
+                        offset_along_slit, offset_perpendicular_slit,
+                        sample_normal, slit_direction, reciprocal_lattice, binding_energies, dtype=dtype,
+                        out=(result.absolute, result.projected), engine=engine, geometry=geometry,
+                        surface_normal=surface_normal
+                    )
+                    if resolved:
+                        resolution_volume(
+                            photon_energy, slit_values - offset_along_slit, deflector_values - offset_perpendicular_slit,
+                            inner_potential, work_function, binding_energies, *widths, geometry=geometry, dtype=dtype,
+                            out=result.resolution
+                        )
+                else:
+                    # The preview holds every stride-th slit and deflector angle of this grid; only the rest is computed
+                    stride = preview[1]
+                    subset = (np.arange(0, slit_count, stride)[None, :]
+                              + slit_count * np.arange(0, deflector_count, stride)[:, None]).ravel()
+                    remaining = np.ones(len(slit_values), dtype=bool)
+                    remaining[subset] = False
+                    remaining = np.flatnonzero(remaining)
+                    result.absolute[:, subset] = coarse.absolute
+                    result.projected[:, subset] = coarse.projected
+                    momentum_volume(
+                        photon_energy, slit_values[remaining], deflector_values[remaining], inner_potential,
+                        work_function, offset_along_slit, offset_perpendicular_slit,
+                        sample_normal, slit_direction, reciprocal_lattice, binding_energies, dtype=dtype,
+                        out=(result.absolute, result.projected), engine=engine, geometry=geometry,
+                        surface_normal=surface_normal, indices=remaining
+                    )
+                    if resolved:
+                        result.resolution[:, subset] = coarse.resolution
+                        resolution_volume(
+                            photon_energy, slit_values[remaining] - offset_along_slit,
+                            deflector_values[remaining] - offset_perpendicular_slit, inner_potential, work_function,
+                            binding_energies, *widths, geometry=geometry, dtype=dtype, out=result.resolution,
+                            indices=remaining
+                        )
+            except BaseException:
+                # A failed or superseded fill must not leave its full-size volumes on disk
+                result.discard()
+                raise
+            result = result.publish()
+        final_momentum_coords = result.absolute.reshape((-1, 3))
+        projected_coords = zone_coords = result.projected.reshape((-1, 3))
+        if symmetry_reduction == 'on' and surface_normal is None:
+            # Display only; the stored result keeps the momenta in the whole zone
+            projected_coords = fold_to_irreducible_wedge(projected_coords, reciprocal_lattice)
+        # Hover columns are filled in place, energy-major; the per-point values are views of them
+        hover_data = np.empty((binding_count, len(slit_values), 3), dtype=dtype)
+        hover_data[..., 0] = slit_values
+        hover_data[..., 1] = deflector_values
+        hover_data[..., 2] = binding_energies[:, None]
+        hover_data = hover_data.reshape((-1, 3))
+        slit_values, deflector_values, binding_energy_values = hover_data.T
+        if resolved:
+            color_values, color_title = result.resolution[..., 0].reshape(-1), 'Δk FWHM (1/Å)'
+        elif binding_count > 1:
+            color_values, color_title = binding_energy_values, 'Binding Energy (eV)'
+        else:
+            color_values, color_title = slit_values, 'Slit Angle (deg)'
+
+        # Only the plan hash goes to the browser; export and coverage read the stored result
+        data_to_store = {'plan': plan_key}
+        if sampling_summary:
+            data_to_store['sampling'] = sampling_summary
+
+        if surface_normal is not None:
+            absolute_fig, projected_fig = surface_zone_figures(
+                final_momentum_coords, projected_coords, color_values, color_title, hover_data,
+                slit_values_grid.shape, reciprocal_lattice, surface_normal, scan_label
+            )
+            plane_normal = surface_normal
+        elif view_mode == 'cut':
+            cut_normal = parse_text_input(cut_normal_str)
+            if (cut_normal is None or len(cut_normal) != 3 or not np.any(cut_normal)
+                    or cut_offset is None or cut_thickness is None or cut_thickness <= 0):
+                return go.Figure(), go.Figure(), data_to_store
+            absolute_fig, projected_fig = cut_view_figures(
+                final_momentum_coords, projected_coords, color_values, color_title, hover_data,
+                slit_values_grid.shape, reciprocal_lattice, cut_normal, cut_offset, cut_thickness, scan_label
+            )
+            plane_normal = cut_normal
+        else:
+            absolute_fig, projected_fig = volume_figures(
+                final_momentum_coords, projected_coords, color_values, color_title, hover_data,
+                reciprocal_lattice, render_mode, slit_values_grid.shape, symmetry_reduction, scan_label, zone_coords
+            )
+            plane_normal = None
+
+        if band_model:
+            # Band energies are cached per model and stored result, so only the window test runs per redraw
+            crossings = band_crossings(band_model, plan_key, final_momentum_coords, binding_energy_values,
+                                       reciprocal_lattice, band_window)
+            for figure, coords in ((absolute_fig, final_momentum_coords), (projected_fig, projected_coords)):
+                coords = coords[crossings]
+                if view_mode == 'cut' and surface_normal is None:
+                    coords = coords[within_cut(coords, cut_normal, cut_offset, cut_thickness)]
+                figure.add_trace(overlay_trace(coords, plane_normal, 'Band crossings',
+                                               dict(size=5, color='red', symbol='x')))
+        if measured_scans:
+            scans = index_measurements()
+            for i, name in enumerate(name for name in measured_scans if name in scans):
+                coverage = measured_coverage(
+                    scans[name], binding_energies, inner_potential, work_function, offset_along_slit,
+                    offset_perpendicular_slit, sample_normal, slit_direction, reciprocal_lattice, geometry, surface_normal
+                )
+                if coverage is None:
+                    continue
+                absolute, projected = coverage
+                if symmetry_reduction == 'on' and surface_normal is None:
+                    projected = fold_to_irreducible_wedge(projected, reciprocal_lattice)
+                marker = dict(size=3, color=MEASURED_COLORS[i % len(MEASURED_COLORS)], symbol='circle-open')
+                for figure, coords in ((absolute_fig, absolute), (projected_fig, projected)):
+                    if view_mode == 'cut' and surface_normal is None:
+                        coords = coords[within_cut(coords, cut_normal, cut_offset, cut_thickness)]
+                    figure.add_trace(overlay_trace(coords, plane_normal, name, marker))
+        return absolute_fig, projected_fig, data_to_store
+        
+    except Exception as e:
+        return go.Figure(), go.Figure(), {}
+
+@callback(
+    Output("download-csv", "data"),
+    Input("download-btn", "n_clicks"),
+    State("calculated-data-store", "data"),
+    prevent_initial_call=True,
+)
+def download_csv(n_clicks, data):
+    result = PlanResult.open(data['plan']) if data else None
+    if result is None:
+        raise PreventUpdate
+
+    def write_csv(buffer):
+        # A chunk at a time, so large plans never sit in memory as one DataFrame
+        for i, chunk in enumerate(result.chunks()):
+            pd.DataFrame(chunk_columns(chunk)).to_csv(buffer, header=i == 0, index=False)
+    return dcc.send_string(write_csv, "arpes_data.csv")
+
+@callback(
+    Output("coverage-summary", "children"),
+    [Input("calculated-data-store", "data"),
+     Input("coverage-tolerance", "value"),
+     Input("coverage-kz-plane", "value")],
+    [State("b1-vec", "value"),
+     State("b2-vec", "value"),
+     State("b3-vec", "value"),
+     State("symmetry-reduction", "value"),
+     State("zone-mode", "value"),
+     State("sample-normal", "value")]
+)
+def update_coverage(data, tolerance, kz_plane, b1_str, b2_str, b3_str, symmetry_reduction, zone_mode, sample_normal_str):
+    result = PlanResult.open(data['plan']) if data else None
+    if result is None or tolerance is None:
+        return ""
+    if not 0 <= tolerance <= COVERAGE_MAX_TOLERANCE:
+        return f"The coverage tolerance must be between 0 and {COVERAGE_MAX_TOLERANCE} Å⁻¹"
+    b1 = parse_text_input(b1_str)
+    b2 = parse_text_input(b2_str)
+    b3 = parse_text_input(b3_str)
+    if b1 is None or b2 is None or b3 is None:
+        return ""
+    if zone_mode == 'surface':
+        sample_normal = parse_text_input(sample_normal_str)
+        if sample_normal is None or len(sample_normal) != 3 or not np.any(sample_normal):
+            return ""
+        try:
+            coverage = SurfaceZoneCoverage(np.array([b1, b2, b3]), sample_normal, tolerance=tolerance)
+            for chunk in result.chunks():
+                coverage.add(chunk.projected.reshape((-1, 3)))
+            fraction = coverage.fraction()
+        except Exception:
+            return ""
+        return f"Surface Brillouin zone coverage: {100 * fraction:.1f} %"
+    try:
+        coverage = ZoneCoverage(np.array([b1, b2, b3]), tolerance=tolerance, symmetry=symmetry_reduction == 'on')
+        for chunk in result.chunks():
+            coverage.add(chunk.projected.reshape((-1, 3)))
+        fraction = coverage.fraction(kz_plane)
+    except Exception:
+        return ""
+    if np.isnan(fraction):
+        return f"kz = {kz_plane} Å⁻¹ does not intersect the first Brillouin zone"
+    if kz_plane is None:
+        return f"First Brillouin zone coverage: {100 * fraction:.1f} %"
+    return f"Coverage of the kz = {kz_plane} Å⁻¹ plane: {100 * fraction:.1f} %"
+
+@callback(
+    [Output("b1-vec", "value"),
+     Output("b2-vec", "value"),
+     Output("b3-vec", "value"),
+     Output("lattice-a", "value"),
+     Output("lattice-b", "value"),
+     Output("lattice-c", "value"),
+     Output("lattice-alpha", "value"),
+     Output("lattice-beta", "value"),
+     Output("lattice-gamma", "value"),
+     Output("lattice-centering", "value"),
+     Output("lattice-status", "children")],
+    [Input("apply-lattice-btn", "n_clicks"),
+     Input("cif-upload", "contents"),
+     Input("lattice-preset", "value")],
+    [State("cif-upload", "filename"),
+     State("lattice-a", "value"),
+     State("lattice-b", "value"),
+     State("lattice-c", "value"),
+     State("lattice-alpha", "value"),
+     State("lattice-beta", "value"),
+     State("lattice-gamma", "value"),
+     State("lattice-centering", "value")],
+    prevent_initial_call=True,
+)
+def build_lattice(n_clicks, cif_contents, preset_slug, cif_filename, a, b, c, alpha, beta, gamma, centering):
+    source = "lattice parameters"
+    if ctx.triggered_id == "lattice-preset":
+        preset = preset_library().get(preset_slug)
+        if preset is None:
+            raise PreventUpdate
+        # Vectors are stored exactly as typed so the zone is looked up instead of rebuilt
+        return *preset['vectors'], *preset['parameters'], preset['centering'], f"Loaded preset {preset['label']}."
+    try:
+        if ctx.triggered_id == "cif-upload":
+            if not cif_contents:
+                raise PreventUpdate
+            a, b, c, alpha, beta, gamma, centering = parse_cif(base64.b64decode(cif_contents.split(",", 1)[1]))
+            source = cif_filename or "CIF file"
+        reciprocal_lattice = primitive_reciprocal_lattice(a, b, c, alpha, beta, gamma, centering)
+    except ValueError as e:
+        vectors = [dash.no_update] * 3
+        parameters = [dash.no_update] * 7
+        return *vectors, *parameters, f"Could not build lattice: {e}"
+    vectors = [",".join(f"{x:.6g}" for x in vector) for vector in reciprocal_lattice]
+    return *vectors, a, b, c, alpha, beta, gamma, centering, f"Reciprocal lattice built from {source}."
+
+@callback(
+    [Output("photon-energy", "value", allow_duplicate=True),
+     Output("sample-normal", "value", allow_duplicate=True),
+     Output("slit-direction", "value", allow_duplicate=True),
+     Output("offset-along-slit", "value", allow_duplicate=True),
+     Output("offset-perpendicular-slit", "value", allow_duplicate=True),
+     Output("optimizer-summary", "children")],
+    Input("optimize-btn", "n_clicks"),
+    [State("optimizer-targets", "value"),
+     State("optimizer-hv-min", "value"),
+     State("optimizer-hv-max", "value"),
+     State("optimizer-max-offset", "value"),
+     State("coverage-tolerance", "value"),
+     State("inner-potential", "value"),
+     State("work-function", "value"),
+     State("sample-normal", "value"),
+     State("slit-direction", "value"),
+     State("slit-angle-start", "value"),
+     State("slit-angle-end", "value"),
+     State("slit-angle-count", "value"),
+     State("deflector-angle-start", "value"),
+     State("deflector-angle-end", "value"),
+     State("deflector-angle-count", "value"),
+     State("b1-vec", "value"),
+     State("b2-vec", "value"),
+     State("b3-vec", "value"),
+     State("binding-energy-start", "value"),
+     State("binding-energy-end", "value"),
+     State("binding-energy-count", "value"),
+     State("slit-orientation", "value"),
+     State("scan-axis", "value"),
+     State("zone-mode", "value")],
+    prevent_initial_call=True,
+)
+def run_optimizer(n_clicks, targets_str, hv_min, hv_max, max_offset, tolerance,
+                  inner_potential, work_function, sample_normal_str, slit_direction_str,
+                  slit_start, slit_end, slit_count, deflector_start, deflector_end, deflector_count,
+                  b1_str, b2_str, b3_str, binding_start, binding_end, binding_count,
+                  slit_orientation, scan_axis, zone_mode):
+    unchanged = [dash.no_update] * 5
+    inputs = [hv_min, hv_max, max_offset, tolerance, inner_potential, work_function,
+              slit_start, slit_end, slit_count, deflector_start, deflector_end, deflector_count,
+              binding_start, binding_end, binding_count]
+    if any(i is None for i in inputs):
+        return *unchanged, "Fill in the photon energy range, offsets, tolerance, analyzer angles and binding energies first."
+    if slit_orientation not in SLIT_ORIENTATIONS or scan_axis not in SCAN_AXES or zone_mode not in ZONE_MODES:
+        return *unchanged, "Choose the slit orientation, scan axis and zone first."
+    vectors = [parse_text_input(value) for value in (sample_normal_str, slit_direction_str, b1_str, b2_str, b3_str)]
+    if any(vector is None or len(vector) != 3 or not np.any(vector) for vector in vectors):
+        return *unchanged, "Sample normal, slit direction and b1/b2/b3 must be non-zero x,y,z vectors."
+    sample_normal, slit_direction, b1, b2, b3 = vectors
+    reciprocal_lattice = np.array([b1, b2, b3])
+    try:
+        targets = parse_targets(targets_str, reciprocal_lattice)
+        best = optimize_plan(
+            targets, reciprocal_lattice,
+            np.linspace(slit_start, slit_end, slit_count),
+            np.linspace(deflector_start, deflector_end, deflector_count),
+            (hv_min, hv_max), max_offset, inner_potential, work_function, tolerance,
+            sample_normal / np.linalg.norm(sample_normal), slit_direction / np.linalg.norm(slit_direction),
+            np.linspace(binding_start, binding_end, max(int(binding_count), 1)), (slit_orientation, scan_axis),
+            zone_mode == 'surface'
+        )
+    except (QhullError, np.linalg.LinAlgError):
+        # A singular lattice has no Brillouin zone to place the targets in
+        return *unchanged, "Could not optimize: b1, b2 and b3 are coplanar."
+    except ValueError as e:
+        return *unchanged, f"Could not optimize: {e}"
+    return (
+        round(best['photon_energy'], 2),
+        ",".join(f"{x:.4g}" for x in best['sample_normal']),
+        ",".join(f"{x:.4g}" for x in best['slit_direction']),
+        round(best['offset_along_slit'], 2),
+        round(best['offset_perpendicular_slit'], 2),
+        f"Best plan covers {best['covered']} of {len(targets)} targets "
+        f"({best['evaluated']} candidates evaluated).",
+    )
+
+def absolute_and_projected_momentum_coords(
+    photon_energies, # (n, )
+    slit_values, # (n,)
+    deflector_values, # (n,)
+    inner_potentials, # (n,)
+    work_functions, # (n,)
+    sample_normal_offset_along_slit, # (n,)
+    sample_normal_offset_perpendicular_to_slit, # (n,)
+    sample_normals, # (n, 3)
+    slit_directions, # (n, 3)
+    reciprocal_lattice, # (3, 3)
+    binding_energies=0.0, # (n,)
+    dtype=np.float64,
+    engine='exact',
+    geometry=DEFAULT_GEOMETRY,
+    surface_normal=None, # (3,)
+):
+    # Every per-point argument may also be a scalar (or (3,) vector) or any shape that
+    # broadcasts against the others; the outputs then have the broadcast shape + (3,).
+    # All arithmetic runs in dtype. engine='factorized' reuses the angle-only terms from
+    # emission_directions. Geometries other than the default
+    # horizontal slit with deflector go through geometry_emission_factors. With a surface_normal,
+    # only the momentum parallel to that surface is folded, into the surface Brillouin zone.
+    default_geometry = geometry == DEFAULT_GEOMETRY
+    if surface_normal is None:
+        fold = lambda coords: fold_to_first_zone(coords, reciprocal_lattice)
+    else:
+        fold = lambda coords: fold_to_surface_zone(coords, reciprocal_lattice, surface_normal)
+    if engine == 'exact' and default_geometry and surface_normal is None and JIT_READY.is_set():
+        # The kernel runs in float64; rounding its results to float32 stays within the float32 engine's error
+        return tuple(coords.astype(dtype, copy=False) for coords in jit_momentum_coords(
+            photon_energies, slit_values, deflector_values, inner_potentials, work_functions,
+            sample_normal_offset_along_slit, sample_normal_offset_perpendicular_to_slit,
+            sample_normals, slit_directions, reciprocal_lattice, binding_energies
+        ))
+    slit_angles = np.asarray(slit_values, dtype=dtype) - np.asarray(sample_normal_offset_along_slit, dtype=dtype)
+    deflector_angles = np.asarray(deflector_values, dtype=dtype) - np.asarray(sample_normal_offset_perpendicular_to_slit, dtype=dtype)
+    if engine == 'factorized':
+        in_plane, cos_theta_squared = emission_directions(
+            slit_angles, deflector_angles, sample_normals, slit_directions, dtype, geometry
+        )
+        k_free, k_normal = kinetic_momentum(
+            photon_energies, inner_potentials, work_functions, binding_energies, cos_theta_squared, dtype
+        )
+        final_momentum_coords = k_free[..., None] * in_plane + k_normal[..., None] * np.asarray(sample_normals, dtype=dtype)
+        projected_coords, rounded_coords = fold(final_momentum_coords)
+        return final_momentum_coords, projected_coords, rounded_coords
+    components = analyzer_momentum_components(
+        photon_energies, slit_angles, deflector_angles,
+        inner_potentials, work_functions, binding_energies, dtype=dtype, geometry=geometry
+    )
+    k_slit, k_deflector, k_normal = (np.asarray(component, dtype=dtype) for component in components)
+    final_momentum_coords = sample_frame_momentum(k_slit, k_deflector, k_normal, sample_normals, slit_directions, dtype)
+    projected_coords, rounded_coords = fold(final_momentum_coords)
+    return final_momentum_coords, projected_coords, rounded_coords
+
+def emission_angle_factors(
+    slit_angles, # (n,) degrees from normal emission
+    deflector_angles, # (n,) degrees from normal emission
+    dtype=np.float64,
+    geometry=DEFAULT_GEOMETRY,
+):
+    """sin θ cos φ, sin θ sin φ and cos² θ of the emission direction; everything in the engine that needs trig"""
+    if geometry != DEFAULT_GEOMETRY:
+        return geometry_emission_factors(slit_angles, deflector_angles, geometry, dtype)
+    rad_per_deg = np.pi / 180.0
+    slit_angles = rad_per_deg * np.asarray(slit_angles, dtype=dtype)
+    deflector_angles = rad_per_deg * np.asarray(deflector_angles, dtype=dtype)
+
+    cos_slit = np.cos(slit_angles)
+    sin_slit = np.sin(slit_angles)
+    cos_deflector = np.cos(deflector_angles)
+    sin_deflector = np.sin(deflector_angles)
+
+    cos_slit_squared = cos_slit**2
+    sin_defl_squared = sin_deflector**2
+    sin_slit_squared = sin_slit**2
+
+    cos_theta = cos_deflector * cos_slit
+    cos_theta_squared = cos_theta**2
+    sin_theta = np.sqrt(1 - cos_theta_squared)
+    denom = np.sqrt(sin_slit_squared + sin_defl_squared * cos_slit_squared)
+    denom = np.where(denom == 0, 1e-10, denom)
+    cos_phi = sin_slit / denom
+    sin_phi =  - sin_deflector * cos_slit / denom
+    return sin_theta * cos_phi, sin_theta * sin_phi, cos_theta_squared
+
+def rotation_matrices(axis, angles, derivative=False):
+    """(n, 3, 3) right-handed rotations by angles (degrees) about the x, y or z axis, or their derivatives per radian"""
+    angles = np.radians(np.asarray(angles, dtype=float))
+    cos, sin = np.cos(angles), np.sin(angles)
+    if derivative:
+        cos, sin = -sin, cos
+    i, j = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}[axis]
+    rotations = np.zeros(angles.shape + (3, 3))
+    rotations[..., 3 - i - j, 3 - i - j] = 0 if derivative else 1
+    rotations[..., i, i] = cos
+    rotations[..., j, j] = cos
+    rotations[..., i, j] = -sin
+    rotations[..., j, i] = sin
+    return rotations
+
+def scan_rotations(geometry, scan_angles, derivative=False):
+    """(n, 3, 3) rotations taking the analyzer-frame emission direction into the sample frame per scan angle"""
+    slit_orientation, scan_axis = geometry
+    if scan_axis == 'deflector':
+        # The deflector sweeps the acceptance perpendicular to the slit
+        return rotation_matrices('x' if slit_orientation == 'horizontal' else 'y', scan_angles, derivative)
+    # Manipulator scans turn the sample, which the emission direction sees as the inverse rotation
+    return rotation_matrices({'polar': 'y', 'tilt': 'x', 'azimuth': 'z'}[scan_axis], scan_angles, derivative).swapaxes(-1, -2)
+
+def geometry_emission_factors(slit_angles, scan_angles, geometry, dtype=np.float64):
+    """Sample-frame emission direction as (x, y, z²), like emission_angle_factors, for any slit orientation and scan axis.
+
+    Rotations are built once per distinct scan angle and slit vectors once per distinct slit angle,
+    then gathered for every point; the default geometry reduces to the closed form.
+    """
+    slit_orientation, scan_axis = geometry
+    if slit_orientation not in SLIT_ORIENTATIONS or scan_axis not in SCAN_AXES:
+        raise ValueError(f"unknown geometry {geometry!r}")
+    slit_angles, scan_angles = np.broadcast_arrays(np.asarray(slit_angles, dtype=float), np.asarray(scan_angles, dtype=float))
+    slit_unique, slit_index = np.unique(slit_angles, return_inverse=True)
+    scan_unique, scan_index = np.unique(scan_angles, return_inverse=True)
+    # Acceptance direction at each slit angle in the analyzer frame, lens axis along z
+    along_slit = np.zeros((len(slit_unique), 3))
+    along_slit[:, 0 if slit_orientation == 'horizontal' else 1] = np.sin(np.radians(slit_unique))
+    along_slit[:, 2] = np.cos(np.radians(slit_unique))
+    directions = np.einsum(
+        'nij,nj->ni', scan_rotations(geometry, scan_unique)[scan_index.ravel()], along_slit[slit_index.ravel()]
+    ).reshape(slit_angles.shape + (3,)).astype(dtype)
+    return directions[..., 0], directions[..., 1], directions[..., 2]**2
+
+def kinetic_momentum(photon_energies, inner_potentials, work_functions, binding_energies, cos_theta_squared, dtype=np.float64):
+    """Free-electron momentum and its component along the sample normal inside the crystal"""
+    kinetic_energies = (
+        np.asarray(photon_energies, dtype=dtype)
+        - np.asarray(work_functions, dtype=dtype)
+        - np.asarray(binding_energies, dtype=dtype)
+    )
+    k_free = np.sqrt(ELECTRON_SCHRODINGER_CONSTANT * kinetic_energies)
+    k_normal = np.sqrt(ELECTRON_SCHRODINGER_CONSTANT * (kinetic_energies * cos_theta_squared + np.asarray(inner_potentials, dtype=dtype)))
+    return k_free, k_normal
+
+def analyzer_momentum_components(
+    photon_energies,
+    slit_angles, # (n,) degrees from normal emission
+    deflector_angles, # (n,) degrees from normal emission
+    inner_potentials,
+    work_functions,
+    binding_energies=0.0,
+    dtype=np.float64,
+    geometry=DEFAULT_GEOMETRY,
+):
+    """Momentum along the slit, along the deflector axis and along the sample normal, each broadcast to (n,)"""
+    slit_factor, deflector_factor, cos_theta_squared = emission_angle_factors(slit_angles, deflector_angles, dtype, geometry)
+    k_free, k_normal = kinetic_momentum(
+        photon_energies, inner_potentials, work_functions, binding_energies, cos_theta_squared, dtype
+    )
+    return k_free * slit_factor, k_free * deflector_factor, k_normal
+
+def emission_direction_derivatives(slit_angles, scan_angles, geometry=DEFAULT_GEOMETRY):
+    """Emission directions (n, 3) and their derivatives (n, 3, 2) per degree of slit and scan angle.
+
+    Like geometry_emission_factors, rotations and slit vectors are built once per distinct angle and gathered.
+    """
+    slit_orientation, scan_axis = geometry
+    if slit_orientation not in SLIT_ORIENTATIONS or scan_axis not in SCAN_AXES:
+        raise ValueError(f"unknown geometry {geometry!r}")
+    slit_angles, scan_angles = np.broadcast_arrays(np.asarray(slit_angles, dtype=float), np.asarray(scan_angles, dtype=float))
+    slit_unique, slit_index = np.unique(slit_angles, return_inverse=True)
+    scan_unique, scan_index = np.unique(scan_angles, return_inverse=True)
+    slit_index, scan_index = slit_index.ravel(), scan_index.ravel()
+    # Acceptance direction along the slit and its derivative, lens axis along z
+    slit_radians = np.radians(slit_unique)
+    axis = 0 if slit_orientation == 'horizontal' else 1
+    along_slit = np.zeros((len(slit_unique), 3))
+    along_slit[:, axis] = np.sin(slit_radians)
+    along_slit[:, 2] = np.cos(slit_radians)
+    along_slit_derivative = np.zeros((len(slit_unique), 3))
+    along_slit_derivative[:, axis] = np.cos(slit_radians)
+    along_slit_derivative[:, 2] = -np.sin(slit_radians)
+    rotations = scan_rotations(geometry, scan_unique)[scan_index]
+    along_slit = along_slit[slit_index, :, None]
+    directions = np.matmul(rotations, along_slit)[..., 0]
+    direction_derivatives = np.stack([
+        np.matmul(rotations, along_slit_derivative[slit_index, :, None])[..., 0],
+        np.matmul(scan_rotations(geometry, scan_unique, derivative=True)[scan_index], along_slit)[..., 0],
+    ], axis=-1) * (np.pi / 180.0)
+    shape = slit_angles.shape
+    return directions.reshape(shape + (3,)), direction_derivatives.reshape(shape + (3, 2))
+
+def momentum_jacobian(
+    photon_energy,
+    slit_angles, # (n,) degrees
+    scan_angles, # (n,) degrees
+    inner_potential,
+    work_function,
+    binding_energies=0.0,
+    geometry=DEFAULT_GEOMETRY,
+    directions=None,
+):
+    """(n, 3, 3) derivatives of the analyzer_momentum_components per degree of slit and scan angle
+    and per eV of kinetic energy, in closed form.
+
+    directions may be the emission_direction_derivatives of the angles, computed once for many energies.
+    """
+    if directions is None:
+        directions = emission_direction_derivatives(slit_angles, scan_angles, geometry)
+    directions, direction_derivatives = directions
+    binding_energies = np.asarray(binding_energies, dtype=float)
+    shape = np.broadcast_shapes(directions.shape[:-1], binding_energies.shape)
+
+    kinetic_energies = (photon_energy - work_function - binding_energies)[..., None]
+    k_free, k_normal = kinetic_momentum(photon_energy, inner_potential, work_function, binding_energies, directions[..., 2]**2)
+    k_free, k_normal = k_free[..., None], k_normal[..., None]
+    jacobian = np.empty(shape + (3, 3))
+    jacobian[..., :2, :2] = k_free[..., None] * direction_derivatives[..., :2, :]
+    # k_normal² = c (E cos² θ + V0), so dk_normal = c E cos θ dcos θ / k_normal
+    jacobian[..., 2, :2] = (ELECTRON_SCHRODINGER_CONSTANT * kinetic_energies * directions[..., 2:3]
+                            * direction_derivatives[..., 2, :] / k_normal)
+    # k_free² = c E, so dk/dE = c / 2 k for the in-plane part and c cos² θ / 2 k_normal along the normal
+    jacobian[..., :2, 2] = ELECTRON_SCHRODINGER_CONSTANT * directions[..., :2] / (2 * k_free)
+    jacobian[..., 2, 2] = ELECTRON_SCHRODINGER_CONSTANT * directions[..., 2]**2 / (2 * k_normal[..., 0])
+    return jacobian
+
+def symmetric_eigenvalues(a00, a11, a22, a01, a02, a12):
+    """Eigenvalues of stacked symmetric 3x3 matrices from their six entries, largest first, in closed form"""
+    q = (a00 + a11 + a22) / 3
+    off_diagonal = a01**2 + a02**2 + a12**2
+    p = np.sqrt(((a00 - q)**2 + (a11 - q)**2 + (a22 - q)**2 + 2 * off_diagonal) / 6)
+    safe_p = np.where(p == 0, 1.0, p)
+    b00, b11, b22 = (a00 - q) / safe_p, (a11 - q) / safe_p, (a22 - q) / safe_p
+    b01, b02, b12 = a01 / safe_p, a02 / safe_p, a12 / safe_p
+    half_determinant = (b00 * (b11 * b22 - b12**2) - b01 * (b01 * b22 - b12 * b02) + b02 * (b01 * b12 - b11 * b02)) / 2
+    phi = np.arccos(np.clip(half_determinant, -1, 1)) / 3
+    largest = q + 2 * p * np.cos(phi)
+    smallest = q + 2 * p * np.cos(phi + 2 * np.pi / 3)
+    return largest, 3 * q - largest - smallest, smallest
+
+def resolution_volume(
+    photon_energy,
+    slit_values, # (n,)
+    scan_values, # (n,)
+    inner_potential,
+    work_function,
+    binding_energies, # (m,)
+    angular_resolution,
+    energy_resolution,
+    photon_bandwidth,
+    chunk_points=VOLUME_CHUNK_POINTS,
+    geometry=DEFAULT_GEOMETRY,
+    dtype=np.float64,
+    out=None,
+    indices=None,
+):
+    """(m, n, 3) FWHMs (1/Å) along the principal axes of the k-space resolution ellipsoid, largest first.
+
+    The angles are emission angles, with the sample normal offsets already subtracted. The angular resolution
+    (degrees) applies to both angles; the energy resolution and photon bandwidth (eV) add in quadrature to the
+    kinetic energy spread. The ellipsoid is J diag(widths²) Jᵀ with the momentum_jacobian of a whole chunk at
+    once, and the angle-only terms are shared by all its energies. indices place the angles in out like in
+    momentum_volume.
+    """
+    binding_energies = np.asarray(binding_energies, dtype=float)
+    if out is None:
+        out = np.empty((len(binding_energies), len(slit_values), 3), dtype=dtype)
+    widths = np.array([angular_resolution, angular_resolution, np.hypot(energy_resolution, photon_bandwidth)])
+    energy_step, angle_step = chunk_steps(len(slit_values), chunk_points)
+    for angle_start in range(0, len(slit_values), angle_step):
+        angles = slice(angle_start, angle_start + angle_step)
+        directions = emission_direction_derivatives(slit_values[angles], scan_values[angles], geometry)
+        for energy_start in range(0, len(binding_energies), energy_step):
+            energies = slice(energy_start, energy_start + energy_step)
+            jacobian = momentum_jacobian(
+                photon_energy, None, None, inner_potential, work_function, binding_energies[energies, None],
+                directions=directions
+            ) * widths
+            rows = jacobian[..., 0, :], jacobian[..., 1, :], jacobian[..., 2, :]
+            covariance = [np.einsum('...k,...k->...', rows[i], rows[j]) for i, j in ((0, 0), (1, 1), (2, 2), (0, 1), (0, 2), (1, 2))]
+            eigenvalues = np.stack(symmetric_eigenvalues(*covariance), axis=-1)
+            out[energies, angles if indices is None else indices[angles]] = np.sqrt(np.clip(eigenvalues, 0, None))
+    return out
+
+def adaptive_axis(probe_angles, speeds, k_spacing):
+    """Angles along one axis whose k steps stay within k_spacing, given |dk/dangle| at the probe angles,
+    and the count a uniform axis needs for the same largest step; raises ValueError past COUNT_LIMIT angles"""
+    # Each probe interval is charged its faster end, so steps never exceed k_spacing between probes
+    steps = np.maximum(speeds[1:], speeds[:-1]) * np.abs(np.diff(probe_angles))
+    arc = np.concatenate(([0.0], np.cumsum(steps)))
+    if arc[-1] == 0:
+        return probe_angles[:1], 1
+    # Bounded before the axis is built, so a tiny k_spacing cannot allocate a huge one
+    if not arc[-1] / k_spacing < COUNT_LIMIT:
+        raise ValueError(f"k_spacing {k_spacing:g} needs more than {COUNT_LIMIT} angles")
+    count = int(np.ceil(arc[-1] / k_spacing)) + 1
+    uniform_count = int(np.ceil(abs(probe_angles[-1] - probe_angles[0]) * speeds.max() / k_spacing)) + 1
+    return np.interp(np.linspace(0, arc[-1], count), arc, probe_angles), uniform_count
+
+@lru_cache(maxsize=32)
+def adaptive_angle_axes(photon_energy, inner_potential, work_function, slit_range, scan_range, binding_range,
+                        k_spacing, geometry=DEFAULT_GEOMETRY, offsets=(0.0, 0.0), probe_points=ADAPTIVE_PROBE_POINTS):
+    """Slit and scan angle axes placed so neighbouring grid points are at most k_spacing apart in k,
+    and the point count of the uniform grid with the same worst-case spacing.
+
+    offsets are the sample normal offsets along and perpendicular to the slit, which the emission angles exclude.
+    """
+    if k_spacing is None or not k_spacing > 0:
+        raise ValueError("k_spacing must be positive")
+    slit_probe = np.linspace(*slit_range, probe_points)
+    scan_probe = np.linspace(*scan_range, probe_points)
+    slit_grid, scan_grid = np.meshgrid(slit_probe, scan_probe)
+    # k per degree grows with kinetic energy, so the shallowest binding energy sets the spacing
+    jacobian = momentum_jacobian(
+        photon_energy, slit_grid - offsets[0], scan_grid - offsets[1], inner_potential, work_function,
+        min(binding_range), geometry
+    ) # (scan, slit, 3, 3)
+    speeds = np.linalg.norm(jacobian[..., :2], axis=-2)
+    # Every slit angle has to be fine enough at its worst scan angle, and the other way round
+    slit_angles, slit_uniform = adaptive_axis(slit_probe, speeds[..., 0].max(axis=0), k_spacing)
+    scan_angles, scan_uniform = adaptive_axis(scan_probe, speeds[..., 1].max(axis=1), k_spacing)
+    return slit_angles, scan_angles, slit_uniform * scan_uniform
+
+def emission_directions(slit_angles, deflector_angles, sample_normals, slit_directions, dtype=np.float64,
+                        geometry=DEFAULT_GEOMETRY):
+    """(n, 3) in-plane momentum per unit k_free in crystal coordinates and (n,) cos² θ, cached per angles and orientation.
+
+    Only the photon energy, work function, inner potential and binding energy are left to apply, so
+    changing those reuses the trig and the basis change of the previous call.
+    """
+    arrays = [np.ascontiguousarray(values, dtype=dtype)
+              for values in (slit_angles, deflector_angles, sample_normals, slit_directions)]
+    digest = hashlib.blake2b(digest_size=16)
+    for values in arrays:
+        digest.update(repr(values.shape).encode())
+        digest.update(values)
+    key = (np.dtype(dtype).str, geometry, digest.hexdigest())
+    cached = EMISSION_DIRECTIONS.get(key)
+    if cached is None:
+        slit_angles, deflector_angles, sample_normals, slit_directions = arrays
+        slit_factor, deflector_factor, cos_theta_squared = emission_angle_factors(
+            slit_angles, deflector_angles, dtype, geometry
+        )
+        in_plane = (
+            slit_factor[..., None] * slit_directions
+            + deflector_factor[..., None] * np.cross(sample_normals, slit_directions)
+        )
+        cached = (in_plane, cos_theta_squared)
+        for values in cached:
+            values.flags.writeable = False
+        EMISSION_DIRECTIONS.put(key, cached)
+    return cached
+
+def sample_frame_momentum(k_slit, k_deflector, k_normal, sample_normals, slit_directions, dtype=np.float64):
+    """(n, 3) crystal momenta from the analyzer-frame components"""
+    sample_normals = np.asarray(sample_normals, dtype=dtype)
+    slit_directions = np.asarray(slit_directions, dtype=dtype)
+    undeflected_slit_rotation_axes = np.cross(sample_normals, slit_directions)
+    return (
+        k_slit[..., None] * slit_directions
+        + k_deflector[..., None] * undeflected_slit_rotation_axes
+        + k_normal[..., None] * sample_normals
+    )
+
+def fold_to_first_zone(final_momentum_coords, reciprocal_lattice):
+    """Momenta folded into the first Brillouin zone, and the lattice coefficients that were subtracted"""
+    reciprocal_lattice = np.asarray(reciprocal_lattice, dtype=final_momentum_coords.dtype)
+    B_inv = np.linalg.inv(reciprocal_lattice)
+    rounded_coords = np.round(np.dot(final_momentum_coords, B_inv))
+    relative_vecs = final_momentum_coords - np.dot(rounded_coords, reciprocal_lattice)
+    # subtract nearest BZ center; argmin |r - c|^2 == argmin |c|^2 - 2 r.c
+    adjacent_bz_centers = np.dot(ZONE_COEFFICENTS.T, reciprocal_lattice)
+    distances = np.sum(adjacent_bz_centers**2, axis=1) - 2 * np.dot(relative_vecs, adjacent_bz_centers.T)
+    projected_coords = relative_vecs - adjacent_bz_centers[np.argmin(distances, axis=-1)]
+    return projected_coords, rounded_coords
+
+def fold_to_surface_zone(final_momentum_coords, reciprocal_lattice, surface_normal):
+    """Momenta with the part parallel to the surface folded into the surface Brillouin zone, and the
+    surface lattice coefficients that were subtracted; the part along the normal is kept"""
+    zone = surface_brillouin_zone(reciprocal_lattice, surface_normal)
+    basis = zone.basis.astype(final_momentum_coords.dtype)
+    # The pseudo-inverse ignores the component along the normal, which the basis has none of
+    rounded_coords = np.round(np.dot(final_momentum_coords, np.linalg.pinv(basis)))
+    relative_vecs = final_momentum_coords - np.dot(rounded_coords, basis)
+    # Nearest of the 9 surface zone centers, as in fold_to_first_zone
+    adjacent_centers = np.dot(SURFACE_ZONE_COEFFICIENTS.T, basis)
+    distances = np.sum(adjacent_centers**2, axis=1) - 2 * np.dot(relative_vecs, adjacent_centers.T)
+    nearest = np.argmin(distances, axis=-1)
+    return relative_vecs - adjacent_centers[nearest], rounded_coords + SURFACE_ZONE_COEFFICIENTS.T[nearest]
+
+def _momentum_kernel(photon_energies, slit_values, deflector_values, inner_potentials, work_functions,
+                     offsets_along_slit, offsets_perpendicular_slit, binding_energies,
+                     sample_normals, slit_directions, reciprocal_lattice, B_inv, adjacent_bz_centers,
+                     final_momentum_coords, projected_coords, rounded_coords):
+    # The NumPy engine fused into one loop over points, same operations in the same order
+    rad_per_deg = np.pi / 180.0
+    center_norms = np.empty(len(adjacent_bz_centers))
+    for c in range(len(adjacent_bz_centers)):
+        center_norms[c] = adjacent_bz_centers[c, 0]**2 + adjacent_bz_centers[c, 1]**2 + adjacent_bz_centers[c, 2]**2
+    for i in prange(len(final_momentum_coords)):
+        slit_angle = rad_per_deg * (slit_values[i] - offsets_along_slit[i])
+        deflector_angle = rad_per_deg * (deflector_values[i] - offsets_perpendicular_slit[i])
+        cos_slit = np.cos(slit_angle)
+        sin_slit = np.sin(slit_angle)
+        cos_deflector = np.cos(deflector_angle)
+        sin_deflector = np.sin(deflector_angle)
+        cos_theta = cos_deflector * cos_slit
+        cos_theta_squared = cos_theta**2
+        sin_theta = np.sqrt(1 - cos_theta_squared)
+        denom = np.sqrt(sin_slit**2 + sin_deflector**2 * cos_slit**2)
+        if denom == 0:
+            denom = 1e-10
+        cos_phi = sin_slit / denom
+        sin_phi = - sin_deflector * cos_slit / denom
+        kinetic_energy = photon_energies[i] - work_functions[i] - binding_energies[i]
+        k_free = np.sqrt(ELECTRON_SCHRODINGER_CONSTANT * kinetic_energy)
+        k_slit = k_free * (sin_theta * cos_phi)
+        k_deflector = k_free * (sin_theta * sin_phi)
+        k_normal = np.sqrt(ELECTRON_SCHRODINGER_CONSTANT * (kinetic_energy * cos_theta_squared + inner_potentials[i]))
+
+        n = sample_normals[i]
+        d = slit_directions[i]
+        axis = (n[1] * d[2] - n[2] * d[1], n[2] * d[0] - n[0] * d[2], n[0] * d[1] - n[1] * d[0])
+        k = np.empty(3)
+        for j in range(3):
+            k[j] = k_slit * d[j] + k_deflector * axis[j] + k_normal * n[j]
+        relative = k.copy()
+        for j in range(3):
+            rounded = np.rint(k[0] * B_inv[0, j] + k[1] * B_inv[1, j] + k[2] * B_inv[2, j])
+            rounded_coords[i, j] = rounded
+            for l in range(3):
+                relative[l] -= rounded * reciprocal_lattice[j, l]
+        best, best_distance = 0, np.inf
+        for c in range(len(adjacent_bz_centers)):
+            distance = center_norms[c] - 2 * (relative[0] * adjacent_bz_centers[c, 0]
+                                              + relative[1] * adjacent_bz_centers[c, 1]
+                                              + relative[2] * adjacent_bz_centers[c, 2])
+            if distance < best_distance:
+                best, best_distance = c, distance
+        for j in range(3):
+            final_momentum_coords[i, j] = k[j]
+            projected_coords[i, j] = relative[j] - adjacent_bz_centers[best, j]
+
+if numba is not None:
+    prange = numba.prange
+    # TBB hangs at interpreter exit once a parallel region has run off the main thread, as the warm-up does
+    if 'NUMBA_THREADING_LAYER' not in os.environ:
+        numba.config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+    _momentum_kernel = numba.njit(parallel=True, fastmath=ENGINE_FASTMATH, cache=True)(_momentum_kernel)
+    # The one signature the kernel is compiled for: read-only inputs of any layout (broadcast views
+    # included) and C-ordered outputs, so no input combination triggers a compile mid-request
+    _vector = numba.types.Array(numba.float64, 1, 'A', readonly=True)
+    _matrix = numba.types.Array(numba.float64, 2, 'A', readonly=True)
+    MOMENTUM_KERNEL_SIGNATURE = (_vector,) * 8 + (_matrix,) * 5 + (numba.float64[:, ::1],) * 3
+else:
+    prange = range
+
+# Set once the compiled kernel is warm and verified; until then every request takes the NumPy path
+JIT_READY = threading.Event()
+# numba's default threading layer must not be entered from several threads at once, and the kernel
+# already uses every core, so engine threads take turns
+JIT_LOCK = threading.Lock()
+
+def jit_momentum_coords(photon_energies, slit_values, deflector_values, inner_potentials, work_functions,
+                        sample_normal_offset_along_slit, sample_normal_offset_perpendicular_to_slit,
+                        sample_normals, slit_directions, reciprocal_lattice, binding_energies=0.0):
+    """absolute_and_projected_momentum_coords in float64 through the compiled kernel"""
+    per_point = [np.asarray(value, dtype=float) for value in (
+        photon_energies, slit_values, deflector_values, inner_potentials, work_functions,
+        sample_normal_offset_along_slit, sample_normal_offset_perpendicular_to_slit, binding_energies
+    )]
+    sample_normals = np.asarray(sample_normals, dtype=float)
+    slit_directions = np.asarray(slit_directions, dtype=float)
+    shape = np.broadcast_shapes(*(value.shape for value in per_point),
+                                sample_normals.shape[:-1], slit_directions.shape[:-1])
+    # Broadcast views stay stride-0 where the shape allows it, so scalars are not copied per point
+    per_point = [np.broadcast_to(value, shape).reshape(-1) for value in per_point]
+    sample_normals = np.broadcast_to(sample_normals, shape + (3,)).reshape((-1, 3))
+    slit_directions = np.broadcast_to(slit_directions, shape + (3,)).reshape((-1, 3))
+    reciprocal_lattice = np.asarray(reciprocal_lattice, dtype=float)
+    outputs = [np.empty((len(sample_normals), 3)) for _ in range(3)]
+    with JIT_LOCK:
+        _momentum_kernel(*per_point, sample_normals, slit_directions, reciprocal_lattice,
+                         np.linalg.inv(reciprocal_lattice), np.dot(ZONE_COEFFICENTS.T, reciprocal_lattice).astype(float),
+                         *outputs)
+    return tuple(output.reshape(shape + (3,)) for output in outputs)
+
+def warm_up_momentum_kernel():
+    """Compile the kernel (or load it from numba's cache) and enable it if it agrees with the NumPy engine"""
+    _momentum_kernel.compile(MOMENTUM_KERNEL_SIGNATURE)
+    _momentum_kernel.disable_compile()
+    rng = np.random.default_rng(0)
+    count = 4096
+    sample_normals = rng.normal(size=(count, 3))
+    sample_normals /= np.linalg.norm(sample_normals, axis=1, keepdims=True)
+    slit_directions = np.cross(sample_normals, rng.normal(size=(count, 3)))
+    slit_directions /= np.linalg.norm(slit_directions, axis=1, keepdims=True)
+    reciprocal_lattice = np.array([[1.2, 0.1, 0.0], [-0.3, 1.5, 0.2], [0.0, 0.4, 0.9]])
+    args = (
+        rng.uniform(10, 1000, count), rng.uniform(-45, 45, count), rng.uniform(-45, 45, count),
+        rng.uniform(0, 20, count), rng.uniform(3, 6, count), rng.uniform(-5, 5, count), rng.uniform(-5, 5, count),
+        sample_normals, slit_directions, reciprocal_lattice,
+    )
+    binding_energies = rng.uniform(0, 3, count)
+    expected = absolute_and_projected_momentum_coords(*args, binding_energies=binding_energies)
+    result = jit_momentum_coords(*args, binding_energies=binding_energies)
+    if (np.abs(result[0] - expected[0]).max() <= JIT_TOLERANCE
+            and folded_difference(result[1], expected[1], reciprocal_lattice).max() <= JIT_TOLERANCE):
+        JIT_READY.set()
+
+if numba is not None and ENGINE_JIT:
+    threading.Thread(target=warm_up_momentum_kernel, name="momentum-kernel-warm-up", daemon=True).start()
+
+# One block of results from momentum_chunks or PlanResult.chunks: energies
+# energy_start.. and grid points angle_start.. of an (energy, angle, 3) volume;
+# resolution is only filled for stored plans with the resolution channel on
+MomentumChunk = namedtuple(
+    'MomentumChunk',
+    ['energy_start', 'angle_start', 'slit_values', 'deflector_values', 'binding_energies', 'absolute', 'projected',
+     'resolution'],
+    defaults=(None,)
 )
-def update_plot(photon_energy, inner_potential, work_function,
-                offset_along_slit, offset_perpendicular_slit,
-                sample_normal_str, slit_direction_str,
-                slit_start, slit_end, slit_count,
-                deflector_start, deflector_end, deflector_count,
-                b1_str, b2_str, b3_str):
-    
-    inputs = [photon_energy, inner_potential, work_function, offset_along_slit, offset_perpendicular_slit,
-              sample_normal_str, slit_direction_str, slit_start, slit_end, slit_count,
-              deflector_start, deflector_end, deflector_count, b1_str, b2_str, b3_str]
-    if any(i is None for i in inputs):
-        raise PreventUpdate
 
-    if slit_count > COUNT_LIMIT or deflector_count > COUNT_LIMIT:
-        return go.Figure(), go.Figure(), {}
+def chunk_steps(angle_count, chunk_points):
+    """(energies, angles) per chunk so that a chunk holds at most chunk_points points"""
+    angle_step = max(1, min(angle_count, chunk_points))
+    return max(1, chunk_points // angle_step), angle_step
 
-    # Create angle grids
-    slit_angles = np.linspace(slit_start, slit_end, slit_count)
-    deflector_angles = np.linspace(deflector_start, deflector_end, deflector_count)
-    slit_values_grid, deflector_values_grid = np.meshgrid(slit_angles, deflector_angles)
-    
-    slit_values = slit_values_grid.flatten()
-    deflector_values = deflector_values_grid.flatten()
-    n_points = len(slit_values)
+def momentum_chunks(
+    photon_energy,
+    angle_chunks, # iterable of (slit_values, deflector_values) pairs
+    inner_potential,
+    work_function,
+    sample_normal_offset_along_slit,
+    sample_normal_offset_perpendicular_to_slit,
+    sample_normal, # (3,)
+    slit_direction, # (3,)
+    reciprocal_lattice, # (3, 3)
+    binding_energies=(0.0,), # (m,)
+    chunk_points=VOLUME_CHUNK_POINTS,
+    dtype=np.float64,
+    engine='exact',
+    geometry=DEFAULT_GEOMETRY,
+    surface_normal=None,
+):
+    """Yield MomentumChunks for every angle chunk and binding energy, holding at most chunk_points points at a time.
 
-    # Parse single inputs and expand them for all points
-    photon_energies = np.full(n_points, photon_energy)
-    inner_potentials = np.full(n_points, inner_potential)
-    work_functions = np.full(n_points, work_function)
-    sample_normal_offsets_along_slit = np.full(n_points, offset_along_slit)
-    sample_normal_offsets_perpendicular_to_slit = np.full(n_points, offset_perpendicular_slit)
+    Scalar parameters are broadcast by the engine, so memory depends on the chunk size only, including
+    the (points, 27) fold distances; angle chunks larger than chunk_points are split further.
+    """
+    binding_energies = np.asarray(binding_energies, dtype=float)
+    angle_start = 0
+    for slit_values, deflector_values in angle_chunks:
+        energy_step, angle_step = chunk_steps(len(slit_values), chunk_points)
+        for offset in range(0, len(slit_values), angle_step):
+            angles = slice(offset, offset + angle_step)
+            for energy_start in range(0, len(binding_energies), energy_step):
+                energies = binding_energies[energy_start:energy_start + energy_step]
+                absolute, projected, _ = absolute_and_projected_momentum_coords(
+                    photon_energy, slit_values[angles], deflector_values[angles], inner_potential, work_function,
+                    sample_normal_offset_along_slit, sample_normal_offset_perpendicular_to_slit,
+                    sample_normal, slit_direction, reciprocal_lattice,
+                    binding_energies=energies[:, None], dtype=dtype, engine=engine, geometry=geometry,
+                    surface_normal=surface_normal
+                )
+                yield MomentumChunk(energy_start, angle_start + offset, slit_values[angles], deflector_values[angles],
+                                    energies, absolute, projected)
+        angle_start += len(slit_values)
 
-    sample_normal = parse_text_input(sample_normal_str)
-    sample_normal = np.array([sample_normal])
-    sample_normal /= np.linalg.norm(sample_normal)
-    slit_direction = parse_text_input(slit_direction_str)
-    slit_direction = np.array([slit_direction])
-    slit_direction /= np.linalg.norm(slit_direction)
-    
-    b1 = parse_text_input(b1_str)
-    b2 = parse_text_input(b2_str)
-    b3 = parse_text_input(b3_str)
+def chunk_columns(chunk):
+    """Export columns of a MomentumChunk, energy-major like the plots"""
+    energy_count, angle_count = chunk.absolute.shape[:2]
+    absolute = chunk.absolute.reshape((-1, 3))
+    projected = chunk.projected.reshape((-1, 3))
+    columns = {
+        'slit_angle': np.tile(chunk.slit_values, energy_count),
+        'deflector_angle': np.tile(chunk.deflector_values, energy_count),
+        'binding_energy': np.repeat(chunk.binding_energies, angle_count),
+        'kx': absolute[:, 0], 'ky': absolute[:, 1], 'kz': absolute[:, 2],
+        'kx_rel': projected[:, 0], 'ky_rel': projected[:, 1], 'kz_rel': projected[:, 2],
+    }
+    if chunk.resolution is not None:
+        resolution = chunk.resolution.reshape((-1, 3))
+        columns.update({'dk_fwhm_major': resolution[:, 0], 'dk_fwhm_middle': resolution[:, 1],
+                        'dk_fwhm_minor': resolution[:, 2]})
+    return columns
 
-    if sample_normal is None or slit_direction is None or b1 is None or b2 is None or b3 is None:
-        return go.Figure(), go.Figure(), {}
+def momentum_volume(
+    photon_energy,
+    slit_values, # (n,)
+    deflector_values, # (n,)
+    inner_potential,
+    work_function,
+    sample_normal_offset_along_slit,
+    sample_normal_offset_perpendicular_to_slit,
+    sample_normal, # (3,)
+    slit_direction, # (3,)
+    reciprocal_lattice, # (3, 3)
+    binding_energies, # (m,)
+    chunk_points=VOLUME_CHUNK_POINTS,
+    dtype=np.float64,
+    engine='exact',
+    out=None,
+    geometry=DEFAULT_GEOMETRY,
+    surface_normal=None,
+    indices=None,
+):
+    """(m, n, 3) absolute and projected momenta for every binding energy, filled from momentum_chunks.
 
-    reciprocal_lattice = np.array([b1, b2, b3])
-    sample_normals = np.tile(sample_normal, (n_points, 1))
-    slit_directions = np.tile(slit_direction, (n_points, 1))
+    out may be a pair of preallocated (m, n, 3) arrays, such as memory maps, to write into. With indices, the
+    angles fill those columns of larger out arrays, chunk by chunk.
+    """
+    binding_energies = np.asarray(binding_energies, dtype=float)
+    shape = (len(binding_energies), len(slit_values), 3)
+    if out is None:
+        out = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+    final_momentum_coords, projected_coords = out
+    chunks = momentum_chunks(
+        photon_energy, [(slit_values, deflector_values)], inner_potential, work_function,
+        sample_normal_offset_along_slit, sample_normal_offset_perpendicular_to_slit,
+        sample_normal, slit_direction, reciprocal_lattice, binding_energies,
+        chunk_points=chunk_points, dtype=dtype, engine=engine, geometry=geometry, surface_normal=surface_normal
+    )
+    for chunk in chunks:
+        energies = slice(chunk.energy_start, chunk.energy_start + len(chunk.binding_energies))
+        angles = slice(chunk.angle_start, chunk.angle_start + len(chunk.slit_values))
+        if indices is not None:
+            angles = indices[angles]
+        final_momentum_coords[energies, angles] = chunk.absolute
+        projected_coords[energies, angles] = chunk.projected
+    return final_momentum_coords, projected_coords
 
-    try:
-        # Call the function
-        final_momentum_coords, projected_coords, _ = absolute_and_projected_momentum_coords(
-            photon_energies, slit_values, deflector_values, inner_potentials, work_functions,
-            sample_normal_offsets_along_slit, sample_normal_offsets_perpendicular_to_slit,
-            sample_normals, slit_directions, reciprocal_lattice
+def folded_difference(a, b, reciprocal_lattice):
+    """Length of a - b up to a reciprocal lattice vector, so equivalent zone-boundary folds compare equal"""
+    fractional = np.dot(np.asarray(a, dtype=float) - b, np.linalg.inv(reciprocal_lattice))
+    return np.linalg.norm(np.dot(fractional - np.round(fractional), reciprocal_lattice), axis=-1)
+
+def float32_error_bound(reciprocal_lattice):
+    """Worst-case float32 vs float64 momentum error (1/Å) over a stress sweep, cached per lattice"""
+    return _float32_error_bound(tuple(np.asarray(reciprocal_lattice, dtype=float).ravel()))
+
+@lru_cache(maxsize=32)
+def _float32_error_bound(lattice_key):
+    reciprocal_lattice = np.array(lattice_key).reshape((3, 3))
+    # Wide angles, UV to soft x-ray photon energies and a tilted geometry cover the worst cases for planning
+    angles = np.linspace(-45, 45, 41)
+    slit_values, deflector_values = (grid[None, :, :] for grid in np.meshgrid(angles, angles))
+    photon_energies = np.geomspace(10, 1000, 12)[:, None, None]
+    worst = 0.0
+    for sample_normal, slit_direction in (((0, 0, 1), (1, 0, 0)), ((1, 1, 1), (1, -1, 0))):
+        sample_normal = np.array(sample_normal) / np.linalg.norm(sample_normal)
+        slit_direction = np.array(slit_direction) / np.linalg.norm(slit_direction)
+        results = [absolute_and_projected_momentum_coords(
+            photon_energies, slit_values, deflector_values, 15.0, 4.5, 0.0, 0.0,
+            sample_normal, slit_direction, reciprocal_lattice, dtype=dtype
+        ) for dtype in (np.float64, np.float32)]
+        (absolute_64, projected_64, _), (absolute_32, projected_32, _) = results
+        worst = max(
+            worst,
+            np.linalg.norm(absolute_32 - absolute_64, axis=-1).max(),
+            folded_difference(projected_32, projected_64, reciprocal_lattice).max(),
         )
-        
-        # Create 3D scatter plot for absolute coordinates
-        hover_data = np.stack((slit_values, deflector_values), axis=-1)
+    return float(worst)
+
+def parse_targets(targets_str, reciprocal_lattice):
+    """(t, 3) target momenta from "label; kx,ky,kz; ..." text, labels taken from the zone's high-symmetry points"""
+    labels = dict(first_brillouin_zone(reciprocal_lattice).high_symmetry_points)
+    labels.setdefault('Γ', np.zeros(3))
+    labels.setdefault('G', labels['Γ'])
+    targets = []
+    for item in (targets_str or "").split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        if item in labels:
+            targets.append(labels[item])
+            continue
+        point = parse_text_input(item)
+        if point is None or len(point) != 3:
+            raise ValueError(f"target {item!r} is neither a high-symmetry label nor kx,ky,kz")
+        targets.append(point)
+    if not targets:
+        raise ValueError("no targets given")
+    return np.array(targets, dtype=float)
+
+def candidate_sample_normals(reciprocal_lattice, sample_normal):
+    """Current normal plus the low-index surface normals G_hkl, h, k, l in {-1, 0, 1}, unique up to sign"""
+    normals = np.dot(ZONE_COEFFICENTS.T[ZONE_COEFFICENTS.T.any(axis=1)], reciprocal_lattice)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    # Point every candidate to the same side as the current normal, then drop duplicates
+    normals *= np.where(np.dot(normals, sample_normal) < 0, -1.0, 1.0)[:, None]
+    normals = np.vstack((sample_normal, normals))
+    _, first = np.unique(np.round(normals, 8), axis=0, return_index=True)
+    return normals[np.sort(first)]
+
+def score_candidates(targets, reciprocal_lattice, slit_values, deflector_values, inner_potential, work_function,
+                     tolerance, photon_energies, sample_normals, slit_directions, offsets_along, offsets_perpendicular,
+                     binding_energies=(0.0,), geometry=DEFAULT_GEOMETRY, surface=False):
+    """(covered targets, summed target distance) for a batch of (b,) candidate settings.
+
+    With surface, targets count as covered by momenta within tolerance parallel to each candidate's surface,
+    up to a surface reciprocal lattice vector, as in the surface zone view.
+    """
+    binding_energies = np.asarray(binding_energies, dtype=float)
+    absolute_coords, projected_coords, _ = absolute_and_projected_momentum_coords(
+        photon_energies[:, None, None], slit_values[None, None, :], deflector_values[None, None, :],
+        inner_potential, work_function, offsets_along[:, None, None], offsets_perpendicular[:, None, None],
+        sample_normals[:, None, None, :], slit_directions[:, None, None, :], reciprocal_lattice,
+        binding_energies=binding_energies[None, :, None], geometry=geometry
+    )
+    if surface:
+        # Each candidate has its own surface, so its in-plane differences are folded one at a time
+        distances = np.empty((len(sample_normals), len(targets)))
+        for i, normal in enumerate(sample_normals):
+            differences = absolute_coords[i].reshape((-1, 1, 3)) - targets
+            folded = fold_to_surface_zone(differences.reshape((-1, 3)), reciprocal_lattice, normal)[0]
+            in_plane = folded - np.outer(np.dot(folded, normal), normal)
+            distances[i] = np.linalg.norm(in_plane, axis=-1).reshape(differences.shape[:2]).min(axis=0)
+    else:
+        # (b, points, targets) -> closest point to each target
+        projected_coords = projected_coords.reshape((len(sample_normals), -1, 3))
+        distances = folded_difference(projected_coords[:, :, None, :], targets, reciprocal_lattice).min(axis=1)
+    return np.count_nonzero(distances <= tolerance, axis=1), distances.sum(axis=1)
+
+def optimize_plan(targets, reciprocal_lattice, slit_angles, deflector_angles, photon_energy_range, max_offset,
+                  inner_potential, work_function, tolerance, sample_normal, slit_direction,
+                  binding_energies=(0.0,), geometry=DEFAULT_GEOMETRY, surface=False,
+                  candidates=OPTIMIZER_CANDIDATES, seed=0):
+    """Search normal, slit azimuth, offsets and hν for the settings covering the most targets.
+
+    Candidates are scored with the plan's geometry and binding energies, in the surface zone when surface is set.
+    """
+    hv_min, hv_max = sorted(photon_energy_range)
+    if hv_min - work_function - np.max(binding_energies) <= 0:
+        raise ValueError("the photon energy range must lie above the work function plus the binding energies")
+    # A decimated copy of the analyzer grid keeps every candidate cheap
+    slit_angles = slit_angles[decimated_indices(len(slit_angles), OPTIMIZER_GRID_SIZE)]
+    deflector_angles = deflector_angles[decimated_indices(len(deflector_angles), OPTIMIZER_GRID_SIZE)]
+    slit_values, deflector_values = (grid.ravel() for grid in np.meshgrid(slit_angles, deflector_angles))
+    binding_energies = np.asarray(binding_energies, dtype=float)
+    binding_energies = binding_energies[decimated_indices(len(binding_energies), OPTIMIZER_ENERGY_COUNT)]
+
+    normals = candidate_sample_normals(reciprocal_lattice, sample_normal)
+    rng = np.random.default_rng(seed)
+    count = candidates
+    settings = {
+        'normal_index': rng.integers(len(normals), size=count),
+        'azimuth': rng.uniform(0, 360, count),
+        'photon_energy': rng.uniform(hv_min, hv_max, count),
+        'offset_along_slit': rng.uniform(-max_offset, max_offset, count),
+        'offset_perpendicular_slit': rng.uniform(-max_offset, max_offset, count),
+    }
+    # The current orientation is always a candidate, with the slit azimuth measured from its slit direction
+    settings['normal_index'][0] = 0
+    settings['azimuth'][0] = 0
+
+    def evaluate(settings):
+        sample_normals = normals[settings['normal_index']]
+        slit_directions = np.array([in_plane_direction(normal, slit_direction, azimuth)
+                                    for normal, azimuth in zip(sample_normals, settings['azimuth'])])
+        batches = [slice(start, start + OPTIMIZER_BATCH_SIZE)
+                   for start in range(0, len(sample_normals), OPTIMIZER_BATCH_SIZE)]
+        with ThreadPoolExecutor() as executor:
+            scores = list(executor.map(lambda batch: score_candidates(
+                targets, reciprocal_lattice, slit_values, deflector_values, inner_potential, work_function,
+                tolerance, settings['photon_energy'][batch], sample_normals[batch], slit_directions[batch],
+                settings['offset_along_slit'][batch], settings['offset_perpendicular_slit'][batch],
+                binding_energies, geometry, surface
+            ), batches))
+        covered = np.concatenate([score[0] for score in scores])
+        distance = np.concatenate([score[1] for score in scores])
+        # Most targets covered first, then closest to the rest
+        return np.lexsort((distance, -covered)), covered, slit_directions
+
+    order, covered, _ = evaluate(settings)
+    # Refine around the best few candidates with small perturbations
+    parents = np.repeat(order[:OPTIMIZER_REFINE_PARENTS], candidates // (4 * OPTIMIZER_REFINE_PARENTS))
+    hv_step = 0.02 * (hv_max - hv_min)
+    refined = {
+        'normal_index': settings['normal_index'][parents],
+        'azimuth': settings['azimuth'][parents] + rng.normal(0, 3, len(parents)),
+        'photon_energy': np.clip(settings['photon_energy'][parents] + rng.normal(0, hv_step, len(parents)), hv_min, hv_max),
+        'offset_along_slit': np.clip(settings['offset_along_slit'][parents] + rng.normal(0, 1, len(parents)),
+                                     -max_offset, max_offset),
+        'offset_perpendicular_slit': np.clip(settings['offset_perpendicular_slit'][parents] + rng.normal(0, 1, len(parents)),
+                                             -max_offset, max_offset),
+    }
+    settings = {key: np.concatenate((settings[key], refined[key])) for key in settings}
+    order, covered, slit_directions = evaluate(settings)
+    best = order[0]
+    return {
+        'photon_energy': float(settings['photon_energy'][best]),
+        'sample_normal': normals[settings['normal_index'][best]],
+        'slit_direction': slit_directions[best],
+        'offset_along_slit': float(settings['offset_along_slit'][best]),
+        'offset_perpendicular_slit': float(settings['offset_perpendicular_slit'][best]),
+        'covered': int(covered[best]),
+        'evaluated': len(order),
+    }
+
+def in_plane_direction(normal, reference, azimuth):
+    """reference projected into the plane normal to normal, rotated by azimuth degrees about normal"""
+    u = reference - np.dot(reference, normal) * normal
+    if np.linalg.norm(u) < 1e-8:
+        u = plane_basis(normal)[0]
+    u = u / np.linalg.norm(u)
+    v = np.cross(normal, u)
+    angle = np.radians(azimuth)
+    return np.cos(angle) * u + np.sin(angle) * v
+
+
+# Vertices per grid axis and iso-angle lines per direction in surface render mode
+SURFACE_GRID_SIZE = 25
+# Markers drawn per plot; larger plans show every n-th slit and scan angle, export and coverage use all points
+MARKER_POINTS = 100_000
+ISO_ANGLE_LINE_COUNT = 7
+
+@lru_cache(maxsize=32)
+def grid_triangles(rows, cols):
+    """Mesh3d (i, j, k) connectivity of a row-major rows x cols grid, two triangles per cell"""
+    corners = (np.arange(rows - 1, dtype=np.int32)[:, None] * cols + np.arange(cols - 1, dtype=np.int32)[None, :]).ravel()
+    i = np.concatenate((corners, corners + 1))
+    j = np.concatenate((corners + 1, corners + cols + 1))
+    k = np.concatenate((corners + cols, corners + cols))
+    for indices in (i, j, k):
+        indices.flags.writeable = False
+    return i, j, k
+
+def decimated_indices(count, target):
+    """At most target evenly spaced indices into range(count), always keeping both ends"""
+    return np.unique(np.linspace(0, count - 1, min(count, target)).round().astype(int))
+
+def marker_mask(grid_shape, shown):
+    """Thin the mask shown over stacked row-major angle grids of grid_shape to about MARKER_POINTS by keeping
+    every stride-th row and column of each grid; returns the mask and the stride"""
+    count = np.count_nonzero(shown)
+    if count <= MARKER_POINTS:
+        return shown, 1
+    stride = int(np.ceil(np.sqrt(count / MARKER_POINTS)))
+    kept = np.zeros(grid_shape, dtype=bool)
+    kept[::stride, ::stride] = True
+    return shown & np.tile(kept.reshape(-1), len(shown) // kept.size), stride
+
+def marker_title(title, stride):
+    """Plot title noting the share of angles drawn when markers were thinned"""
+    return title if stride == 1 else f"{title} (1 in {stride ** 2} angles shown)"
+
+def surface_traces(coords, absolute_coords, grid_shape, color_values, color_title, hover_data, hovertemplate,
+                   zone_coords=None):
+    """Decimated Mesh3d sheets plus iso-angle lines for (n, 3) coords made of stacked row-major angle grids.
+
+    zone_coords are the first-zone coordinates that coords were folded from further, e.g. into the irreducible wedge.
+    """
+    rows = decimated_indices(grid_shape[0], SURFACE_GRID_SIZE)
+    cols = decimated_indices(grid_shape[1], SURFACE_GRID_SIZE)
+    # One sheet per stacked grid (e.g. per binding energy), sharing the same connectivity
+    layer_size = grid_shape[0] * grid_shape[1]
+    layers = len(coords) // layer_size
+    vertex_count = len(rows) * len(cols)
+    vertex_offsets = vertex_count * np.arange(layers, dtype=np.int32)[:, None]
+    flat = (rows[:, None] * grid_shape[1] + cols[None, :]).ravel()
+    flat = (layer_size * np.arange(layers)[:, None] + flat[None, :]).ravel()
+    vertices = coords[flat]
+    zone_vertices = vertices if zone_coords is None else zone_coords[flat]
+    # Folding into the first zone tears the sheet; an edge is torn when it differs from its unfolded twin
+    jumps = zone_vertices - absolute_coords[flat]
+    scale = 1e-6 * max(np.abs(absolute_coords).max(), 1.0)
+
+    def torn(a, b):
+        translated = np.any(np.abs(jumps[a] - jumps[b]) > scale, axis=-1)
+        # Symmetry images are isometries: folding across a mirror only shortens an edge, a seam between
+        # images lengthens it
+        stretched = (np.linalg.norm(vertices[a] - vertices[b], axis=-1)
+                     > np.linalg.norm(zone_vertices[a] - zone_vertices[b], axis=-1) + scale)
+        return translated | stretched
+
+    i, j, k = ((indices[None, :] + vertex_offsets).ravel() for indices in grid_triangles(len(rows), len(cols)))
+    keep = ~(torn(i, j) | torn(j, k) | torn(k, i))
+    traces = [go.Mesh3d(
+        x=vertices[:, 0],
+        y=vertices[:, 1],
+        z=vertices[:, 2],
+        i=i[keep],
+        j=j[keep],
+        k=k[keep],
+        intensity=color_values[flat],
+        colorscale='Viridis',
+        colorbar_title=color_title,
+        customdata=hover_data[flat],
+        hovertemplate=hovertemplate,
+        opacity=0.8,
+        flatshading=True,
+        showlegend=False
+    )]
+
+    # Iso-angle lines as (start, end, gap) segment triples so torn segments can simply be dropped
+    grid = np.arange(vertex_count).reshape((len(rows), len(cols)))
+    line_rows = grid[decimated_indices(len(rows), ISO_ANGLE_LINE_COUNT)]
+    line_cols = grid[:, decimated_indices(len(cols), ISO_ANGLE_LINE_COUNT)].T
+    starts = np.concatenate((line_rows[:, :-1].ravel(), line_cols[:, :-1].ravel()))
+    ends = np.concatenate((line_rows[:, 1:].ravel(), line_cols[:, 1:].ravel()))
+    starts = (starts[None, :] + vertex_offsets).ravel()
+    ends = (ends[None, :] + vertex_offsets).ravel()
+    segments = ~torn(starts, ends)
+    starts, ends = starts[segments], ends[segments]
+    lines = np.full((len(starts), 3, 3), np.nan, dtype=vertices.dtype)
+    lines[:, 0] = vertices[starts]
+    lines[:, 1] = vertices[ends]
+    lines = lines.reshape((-1, 3))
+    traces.append(go.Scatter3d(
+        x=lines[:, 0],
+        y=lines[:, 1],
+        z=lines[:, 2],
+        mode='lines',
+        line=dict(color='#1e40af', width=2),
+        hoverinfo='skip',
+        showlegend=False
+    ))
+    return traces
+
+def plane_basis(normal):
+    """Orthonormal in-plane axes (u, v) for a plane with the given normal, u as close to x as possible"""
+    normal = np.asarray(normal, dtype=float) / np.linalg.norm(normal)
+    reference = np.eye(3)[0] if abs(normal[0]) < 0.9 else np.eye(3)[1]
+    u = reference - np.dot(reference, normal) * normal
+    u /= np.linalg.norm(u)
+    return u, np.cross(normal, u)
+
+def zone_cross_section(reciprocal_lattice, normal, offset):
+    """Edges of the first Brillouin zone cut by the plane normal·k = offset, as NaN-separated 3D segments"""
+    normal = np.asarray(normal, dtype=float) / np.linalg.norm(normal)
+    segments = []
+    for face in first_brillouin_zone(reciprocal_lattice).ridges:
+        heights = np.dot(face, normal) - offset
+        starts, ends = heights[:-1], heights[1:]
+        crossing = (starts <= 0) != (ends <= 0)
+        if np.count_nonzero(crossing) != 2:
+            continue
+        t = starts[crossing] / (starts[crossing] - ends[crossing])
+        points = face[:-1][crossing] + t[:, None] * (face[1:][crossing] - face[:-1][crossing])
+        segments.append(np.vstack((points, np.full((1, 3), np.nan))))
+    if not segments:
+        return np.empty((0, 3))
+    return np.concatenate(segments)
+
+def volume_figures(final_momentum_coords, projected_coords, color_values, color_title, hover_data,
+                   reciprocal_lattice, render_mode, grid_shape, symmetry_reduction, scan_label=SCAN_AXIS_LABELS['deflector'],
+                   zone_coords=None):
+    """3D views of the absolute and first-zone coordinates, as markers or as surfaces over the angle grid.
+
+    zone_coords are the first-zone coordinates when projected_coords were folded further into the irreducible wedge.
+    """
+    # Create 3D scatter plot for absolute coordinates
+    absolute_hovertemplate = (
+        "<b>kx:</b> %{x:.3f} Å⁻¹<br>"
+        "<b>ky:</b> %{y:.3f} Å⁻¹<br>"
+        "<b>kz:</b> %{z:.3f} Å⁻¹<br>"
+        "<b>Slit Angle:</b> %{customdata[0]:.2f}°<br>"
+        f"<b>{scan_label}:</b> %{{customdata[1]:.2f}}°<br>"
+        "<b>Binding Energy:</b> %{customdata[2]:.2f} eV"
+        "<extra></extra>"
+    )
+    stride = 1
+    if render_mode == 'surface':
+        absolute_fig = go.Figure(data=surface_traces(
+            final_momentum_coords, final_momentum_coords, grid_shape,
+            color_values, color_title, hover_data, absolute_hovertemplate
+        ))
+    else:
+        shown, stride = marker_mask(grid_shape, np.ones(len(final_momentum_coords), dtype=bool))
         absolute_fig = go.Figure(data=[go.Scatter3d(
-            x=final_momentum_coords[:, 0],
-            y=final_momentum_coords[:, 1],
-            z=final_momentum_coords[:, 2],
-            customdata=hover_data,
-            hovertemplate=(
-                "<b>kx:</b> %{x:.3f} Å⁻¹<br>"
-                "<b>ky:</b> %{y:.3f} Å⁻¹<br>"
-                "<b>kz:</b> %{z:.3f} Å⁻¹<br>"
-                "<b>Slit Angle:</b> %{customdata[0]:.2f}°<br>"
-                "<b>Deflector Angle:</b> %{customdata[1]:.2f}°"
-                "<extra></extra>"
-            ),
+            x=final_momentum_coords[shown, 0],
+            y=final_momentum_coords[shown, 1],
+            z=final_momentum_coords[shown, 2],
+            customdata=hover_data[shown],
+            hovertemplate=absolute_hovertemplate,
             mode='markers',
             marker=dict(
                 size=4,
-                color=slit_values,
+                color=color_values[shown],
                 colorscale='Viridis',
-                colorbar_title='Slit Angle (deg)',
+                colorbar_title=color_title,
                 opacity=0.8
             )
         )])
-        
-        absolute_fig.update_layout(
-            title=dict(
-                text="Absolute Momentum Coordinates",
-                font=dict(size=16),
-                x=0.5,
-                xanchor='center'
-            ),
-            scene=dict(
-                xaxis_title="k_x (Å⁻¹)",
-                yaxis_title="k_y (Å⁻¹)",
-                zaxis_title="k_z (Å⁻¹)",
-                aspectmode='data',
-                camera=dict(
-                    eye=dict(x=1.5, y=1.5, z=1.5)
-                )
+    
+    absolute_fig.update_layout(
+        title=dict(
+            text=marker_title("Absolute Momentum Coordinates", stride),
+            font=dict(size=16),
+            x=0.5,
+            xanchor='center'
+        ),
+        scene=dict(
+            xaxis_title="k_x (Å⁻¹)",
+            yaxis_title="k_y (Å⁻¹)",
+            zaxis_title="k_z (Å⁻¹)",
+            aspectmode='data',
+            camera=dict(
+                eye=dict(x=1.5, y=1.5, z=1.5)
+            )
+        ),
+        margin=dict(l=0, r=0, b=0, t=50),
+        height=500,
+        autosize=True
+    )
+    
+    # Create 3D scatter plot for projected coordinates
+    projected_hovertemplate = (
+        "<b>kx_rel:</b> %{x:.3f} Å⁻¹<br>"
+        "<b>ky_rel:</b> %{y:.3f} Å⁻¹<br>"
+        "<b>kz_rel:</b> %{z:.3f} Å⁻¹<br>"
+        "<b>Slit Angle:</b> %{customdata[0]:.2f}°<br>"
+        f"<b>{scan_label}:</b> %{{customdata[1]:.2f}}°<br>"
+        "<b>Binding Energy:</b> %{customdata[2]:.2f} eV"
+        "<extra></extra>"
+    )
+    if render_mode == 'surface':
+        projected_fig = go.Figure(data=surface_traces(
+            projected_coords, final_momentum_coords, grid_shape,
+            color_values, color_title, hover_data, projected_hovertemplate, zone_coords
+        ))
+    else:
+        projected_fig = go.Figure(data=[go.Scatter3d(
+            x=projected_coords[shown, 0],
+            y=projected_coords[shown, 1],
+            z=projected_coords[shown, 2],
+            customdata=hover_data[shown],
+            hovertemplate=projected_hovertemplate,
+            mode='markers',
+            marker=dict(
+                size=4,
+                color=color_values[shown],
+                colorscale='Viridis',
+                colorbar_title=color_title,
+                opacity=0.8
             ),
-            margin=dict(l=0, r=0, b=0, t=50),
-            height=500,
-            autosize=True
+            showlegend=False
+        )])
+    
+    projected_fig.update_layout(
+        title=dict(
+            text=marker_title("Momentum coordinates in the irreducible wedge" if symmetry_reduction == 'on'
+                              else "Momentum coordinates in the first Brillouin zone", stride),
+            font=dict(size=16),
+            x=0.5,
+            xanchor='center'
+        ),
+        scene=dict(
+            xaxis_title="k_x_rel (Å⁻¹)",
+            yaxis_title="k_y_rel (Å⁻¹)",
+            zaxis_title="k_z_rel (Å⁻¹)",
+            aspectmode='data',
+            camera=dict(
+                eye=dict(x=1.5, y=1.5, z=1.5)
+            )
+        ),
+        margin=dict(l=0, r=0, b=0, t=50),
+        height=500,
+        autosize=True
+    )
+
+
+    for ridge_starts in first_brillouin_zone(reciprocal_lattice).ridges:
+        projected_fig.add_trace(go.Scatter3d(
+            x=ridge_starts[:, 0],
+            y=ridge_starts[:, 1],
+            z=ridge_starts[:, 2],
+            mode='lines',
+            line=dict(color='black', width=1),
+            showlegend=False,
+        ))
+    high_symmetry_points = first_brillouin_zone(reciprocal_lattice).high_symmetry_points
+    if high_symmetry_points:
+        labels, points = zip(*high_symmetry_points)
+        points = np.array(points)
+        projected_fig.add_trace(go.Scatter3d(
+            x=points[:, 0],
+            y=points[:, 1],
+            z=points[:, 2],
+            text=labels,
+            mode='markers+text',
+            marker=dict(size=3, color='black'),
+            textposition='top center',
+            hoverinfo='text',
+            showlegend=False,
+        ))
+    return absolute_fig, projected_fig
+
+# Marker colors of overlaid measured scans, in selection order
+MEASURED_COLORS = ('#6b7280', '#d97706', '#059669', '#7c3aed', '#db2777')
+
+def overlay_trace(coords, plane_normal, name, marker):
+    """Markers at (n, 3) coords over a plot, in 3D or projected onto the plane with the given normal"""
+    if plane_normal is None:
+        return go.Scatter3d(x=coords[:, 0], y=coords[:, 1], z=coords[:, 2], mode='markers', marker=marker,
+                            name=name, hovertext=name, hoverinfo='text', showlegend=False)
+    u, v = plane_basis(plane_normal)
+    return go.Scattergl(x=np.dot(coords, u), y=np.dot(coords, v), mode='markers', marker=marker,
+                        name=name, hovertext=name, hoverinfo='text', showlegend=False)
+
+def within_cut(coords, normal, offset, thickness):
+    """Mask of the (n, 3) coords within thickness / 2 of the plane normal·k = offset"""
+    normal = np.asarray(normal, dtype=float) / np.linalg.norm(normal)
+    return np.abs(np.dot(coords, normal.astype(coords.dtype)) - offset) <= thickness / 2
+
+def cut_view_figures(absolute_coords, projected_coords, color_values, color_title, hover_data, grid_shape,
+                     reciprocal_lattice, normal, offset, thickness, scan_label=SCAN_AXIS_LABELS['deflector']):
+    """WebGL 2D views of the absolute and first-zone coordinates in a slab of the given thickness around a
+    cut plane, projected onto it"""
+    return plane_view_figures(
+        absolute_coords, projected_coords, color_values, color_title, hover_data, grid_shape, normal,
+        zone_cross_section(reciprocal_lattice, normal, offset),
+        ("Absolute Momentum Coordinates (cut plane slab)",
+         "Momentum coordinates in the first Brillouin zone (cut plane slab)"),
+        scan_label, lambda coords: within_cut(coords, normal, offset, thickness)
+    )
+
+def surface_zone_figures(absolute_coords, projected_coords, color_values, color_title, hover_data, grid_shape,
+                         reciprocal_lattice, surface_normal, scan_label=SCAN_AXIS_LABELS['deflector']):
+    """WebGL 2D views of the momentum parallel to the surface, absolute and folded into the surface Brillouin zone"""
+    zone = surface_brillouin_zone(reciprocal_lattice, surface_normal)
+    return plane_view_figures(
+        absolute_coords, projected_coords, color_values, color_title, hover_data, grid_shape, surface_normal,
+        np.dot(zone.outline, zone.axes),
+        ("Absolute momentum parallel to the surface", "Momentum coordinates in the surface Brillouin zone"),
+        scan_label
+    )
+
+def plane_view_figures(absolute_coords, projected_coords, color_values, color_title, hover_data, grid_shape,
+                       normal, boundary, titles, scan_label, selection=None):
+    """Absolute and folded coordinates projected onto the plane with the given normal, the folded ones
+    outlined by the (k, 3) boundary; selection maps each panel's coordinates to a mask of the points it shows,
+    which is thinned to MARKER_POINTS over the grid_shape angle grids"""
+    u, v = (axis.astype(absolute_coords.dtype) for axis in plane_basis(normal))
+    axis_titles = [f"k along ({axis[0]:.2g}, {axis[1]:.2g}, {axis[2]:.2g}) (Å⁻¹)" for axis in (u, v)]
+    figures = []
+    for coords, title, boundary in (
+        (absolute_coords, titles[0], None),
+        (projected_coords, titles[1], boundary),
+    ):
+        shown, stride = marker_mask(
+            grid_shape, np.ones(len(coords), dtype=bool) if selection is None else selection(coords)
         )
-        
-        # Create 3D scatter plot for projected coordinates
-        projected_fig = go.Figure(data=[go.Scatter3d(
-            x=projected_coords[:, 0],
-            y=projected_coords[:, 1],
-            z=projected_coords[:, 2],
-            customdata=hover_data,
+        fig = go.Figure(data=[go.Scattergl(
+            x=np.dot(coords[shown], u),
+            y=np.dot(coords[shown], v),
+            customdata=hover_data[shown],
             hovertemplate=(
-                "<b>kx_rel:</b> %{x:.3f} Å⁻¹<br>"
-                "<b>ky_rel:</b> %{y:.3f} Å⁻¹<br>"
-                "<b>kz_rel:</b> %{z:.3f} Å⁻¹<br>"
+                "<b>k_u:</b> %{x:.3f} Å⁻¹<br>"
+                "<b>k_v:</b> %{y:.3f} Å⁻¹<br>"
                 "<b>Slit Angle:</b> %{customdata[0]:.2f}°<br>"
-                "<b>Deflector Angle:</b> %{customdata[1]:.2f}°"
+                f"<b>{scan_label}:</b> %{{customdata[1]:.2f}}°<br>"
+                "<b>Binding Energy:</b> %{customdata[2]:.2f} eV"
                 "<extra></extra>"
             ),
             mode='markers',
             marker=dict(
                 size=4,
-                color=slit_values,
+                color=color_values[shown],
                 colorscale='Viridis',
-                colorbar_title='Slit Angle (deg)',
+                colorbar_title=color_title,
                 opacity=0.8
             ),
             showlegend=False
         )])
-        
-        projected_fig.update_layout(
+        if boundary is not None and len(boundary):
+            fig.add_trace(go.Scattergl(
+                x=np.dot(boundary, u),
+                y=np.dot(boundary, v),
+                mode='lines',
+                line=dict(color='black', width=1),
+                hoverinfo='skip',
+                showlegend=False
+            ))
+        fig.update_layout(
             title=dict(
-                text="Momentum coordinates in the first Brillouin zone",
+                text=marker_title(title, stride),
                 font=dict(size=16),
                 x=0.5,
                 xanchor='center'
             ),
-            scene=dict(
-                xaxis_title="k_x_rel (Å⁻¹)",
-                yaxis_title="k_y_rel (Å⁻¹)",
-                zaxis_title="k_z_rel (Å⁻¹)",
-                aspectmode='data',
-                camera=dict(
-                    eye=dict(x=1.5, y=1.5, z=1.5)
-                )
-            ),
+            xaxis=dict(title=axis_titles[0]),
+            yaxis=dict(title=axis_titles[1], scaleanchor='x', scaleratio=1),
             margin=dict(l=0, r=0, b=0, t=50),
             height=500,
             autosize=True
         )
+        figures.append(fig)
+    return figures
+
+# Primitive cell vectors (rows) in units of the conventional cell vectors for each lattice centering
+CENTERING_MATRICES = {
+    'P': np.eye(3),
+    'I': np.array([[-0.5, 0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, -0.5]]),
+    'F': np.array([[0.0, 0.5, 0.5], [0.5, 0.0, 0.5], [0.5, 0.5, 0.0]]),
+    'C': np.array([[0.5, 0.5, 0.0], [-0.5, 0.5, 0.0], [0.0, 0.0, 1.0]]),
+    'A': np.array([[1.0, 0.0, 0.0], [0.0, 0.5, 0.5], [0.0, -0.5, 0.5]]),
+    'B': np.array([[0.5, 0.0, 0.5], [0.0, 1.0, 0.0], [-0.5, 0.0, 0.5]]),
+    'R': np.array([[2, 1, 1], [-1, 1, 1], [-1, -2, 1]]) / 3.0,
+}
+
+def real_space_lattice(a, b, c, alpha, beta, gamma):
+    """Conventional cell vectors (rows, Å) with a along x and b in the xy plane"""
+    if any(value is None for value in (a, b, c, alpha, beta, gamma)):
+        raise ValueError("all six lattice parameters are required")
+    if min(a, b, c) <= 0:
+        raise ValueError("lattice constants must be positive")
+    if not all(0 < angle < 180 for angle in (alpha, beta, gamma)):
+        raise ValueError("lattice angles must be between 0 and 180 degrees")
+    cos_alpha, cos_beta, cos_gamma = np.cos(np.radians([alpha, beta, gamma]))
+    sin_gamma = np.sin(np.radians(gamma))
+    c_y = (cos_alpha - cos_beta * cos_gamma) / sin_gamma
+    c_z_squared = 1 - cos_beta**2 - c_y**2
+    if c_z_squared <= 0:
+        raise ValueError("α, β and γ do not describe a valid cell")
+    return np.array([
+        [a, 0.0, 0.0],
+        [b * cos_gamma, b * sin_gamma, 0.0],
+        [c * cos_beta, c * c_y, c * np.sqrt(c_z_squared)],
+    ])
+
+def primitive_reciprocal_lattice(a, b, c, alpha, beta, gamma, centering='P'):
+    """Primitive reciprocal lattice vectors (rows, 1/Å) including the 2π factor"""
+    if centering not in CENTERING_MATRICES:
+        raise ValueError(f"unknown lattice centering {centering!r}")
+    primitive = np.dot(CENTERING_MATRICES[centering], real_space_lattice(a, b, c, alpha, beta, gamma))
+    reciprocal_lattice = 2 * np.pi * np.linalg.inv(primitive).T
+    # Clean up round-off so e.g. hexagonal vectors read 0 instead of -2.6e-16 (+ 0.0 also drops -0.0)
+    return np.where(np.abs(reciprocal_lattice) < 1e-12, 0.0, reciprocal_lattice) + 0.0
+
+CIF_CELL_TAGS = ('_cell_length_a', '_cell_length_b', '_cell_length_c',
+                 '_cell_angle_alpha', '_cell_angle_beta', '_cell_angle_gamma')
+CIF_SPACE_GROUP_TAGS = ('_space_group_name_H-M_alt', '_symmetry_space_group_name_H-M')
+# Parsed CIF cells keyed by the SHA-256 of the file, so reloading a known file skips parsing
+CIF_CACHE = SnapshotCache(CIF_CACHE_SIZE)
+# Multi-line text fields run from a line starting with ';' to the next such line, or the end of a damaged file
+CIF_TEXT_FIELD = re.compile(r"^;.*?(^;|\Z)", re.MULTILINE | re.DOTALL)
+
+def parse_cif(raw):
+    """(a, b, c, α, β, γ, centering) from the bytes of a CIF file"""
+    digest = hashlib.sha256(raw).hexdigest()
+    cell = CIF_CACHE.get(digest)
+    if cell is None:
+        cell = _parse_cif_cell(raw.decode('utf-8', errors='replace'))
+        CIF_CACHE.put(digest, cell)
+    return cell
+
+def _parse_cif_cell(text):
+    # Text fields hold free text such as comments or whole quoted files, never tags of this block
+    text = CIF_TEXT_FIELD.sub("", text)
+    tags = {}
+    for match in re.finditer(r"^[ \t]*(_[\w.\-/\[\]]+)[ \t]+(.+?)[ \t]*$", text, re.MULTILINE):
+        tags.setdefault(match.group(1).lower(), match.group(2))
+    parameters = []
+    for tag in CIF_CELL_TAGS:
+        if tag not in tags:
+            raise ValueError(f"CIF file has no {tag}")
+        # Drop standard uncertainties such as 5.4310(2)
+        number = re.match(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?", tags[tag])
+        if number is None:
+            raise ValueError(f"CIF value {tags[tag]!r} for {tag} is not a number")
+        parameters.append(float(number.group(0)))
+    centering = 'P'
+    for tag in CIF_SPACE_GROUP_TAGS:
+        if tag.lower() in tags:
+            symbol = tags[tag.lower()].strip("'\" ")
+            if symbol and symbol[0].upper() in CENTERING_MATRICES:
+                centering = symbol[0].upper()
+            break
+    # Rhombohedral groups given on rhombohedral axes are already primitive
+    if centering == 'R' and abs(parameters[5] - 120) > 1e-3:
+        centering = 'P'
+    return (*parameters, centering)
+
+# High-symmetry points in fractional coordinates of the primitive reciprocal vectors built by
+# primitive_reciprocal_lattice for each lattice type
+HIGH_SYMMETRY_POINTS = {
+    'cubic': {'Γ': (0, 0, 0), 'X': (0, 0.5, 0), 'M': (0.5, 0.5, 0), 'R': (0.5, 0.5, 0.5)},
+    'fcc': {'Γ': (0, 0, 0), 'X': (0.5, 0, 0.5), 'L': (0.5, 0.5, 0.5), 'W': (0.5, 0.25, 0.75),
+            'K': (0.375, 0.375, 0.75), 'U': (0.625, 0.25, 0.625)},
+    'bcc': {'Γ': (0, 0, 0), 'H': (0.5, -0.5, 0.5), 'P': (0.25, 0.25, 0.25), 'N': (0, 0, 0.5)},
+    'hexagonal': {'Γ': (0, 0, 0), 'M': (0.5, 0, 0), 'K': (1 / 3, 1 / 3, 0), 'A': (0, 0, 0.5),
+                  'L': (0.5, 0, 0.5), 'H': (1 / 3, 1 / 3, 0.5)},
+    'tetragonal': {'Γ': (0, 0, 0), 'X': (0, 0.5, 0), 'M': (0.5, 0.5, 0), 'Z': (0, 0, 0.5),
+                   'R': (0, 0.5, 0.5), 'A': (0.5, 0.5, 0.5)},
+}
+LATTICE_CENTERINGS = {'cubic': 'P', 'fcc': 'F', 'bcc': 'I', 'hexagonal': 'P', 'tetragonal': 'P'}
+# (material, lattice type, a, c) in Å; c is ignored for the cubic types
+PRESET_MATERIALS = [
+    ("SrTiO3", 'cubic', 3.905, None),
+    ("Cu", 'fcc', 3.615, None),
+    ("Ag", 'fcc', 4.086, None),
+    ("Au", 'fcc', 4.078, None),
+    ("Al", 'fcc', 4.050, None),
+    ("Si", 'fcc', 5.431, None),
+    ("W", 'bcc', 3.165, None),
+    ("Fe", 'bcc', 2.867, None),
+    ("Graphite", 'hexagonal', 2.464, 6.711),
+    ("MoS2", 'hexagonal', 3.160, 12.294),
+    ("WSe2", 'hexagonal', 3.282, 12.960),
+    ("FeSe", 'tetragonal', 3.770, 5.521),
+]
+
+def write_preset_library(directory=PRESET_DIRECTORY):
+    """Precompute the zone data of PRESET_MATERIALS into directory (index.json plus one .npz per preset)"""
+    os.makedirs(directory, exist_ok=True)
+    index = []
+    for material, lattice_type, a, c in PRESET_MATERIALS:
+        c = a if c is None else c
+        gamma = 120 if lattice_type == 'hexagonal' else 90
+        centering = LATTICE_CENTERINGS[lattice_type]
+        vectors = [",".join(f"{x:.6g}" for x in vector)
+                   for vector in primitive_reciprocal_lattice(a, a, c, 90, 90, gamma, centering)]
+        # Build the zone from the vectors exactly as the UI will parse them so lookups match
+        reciprocal_lattice = np.array([parse_text_input(vector) for vector in vectors])
+        zone = voronoi_brillouin_zone(reciprocal_lattice)
+        labels = list(HIGH_SYMMETRY_POINTS[lattice_type])
+        points = np.dot(np.array(list(HIGH_SYMMETRY_POINTS[lattice_type].values())), reciprocal_lattice)
+        slug = re.sub(r"[^a-z0-9]+", "-", material.lower())
+        np.savez_compressed(
+            os.path.join(directory, f"{slug}.npz"),
+            vertices=zone.vertices,
+            ridges=np.concatenate(zone.ridges),
+            ridge_lengths=np.array([len(ridge) for ridge in zone.ridges]),
+            neighbours=zone.neighbours,
+            high_symmetry_labels=np.array(labels),
+            high_symmetry_points=points,
+        )
+        index.append({
+            'slug': slug,
+            'label': f"{material} ({lattice_type}, a = {a} Å" + (f", c = {c} Å)" if c != a else ")"),
+            'parameters': [a, a, c, 90, 90, gamma],
+            'centering': centering,
+            'vectors': vectors,
+        })
+    with open(os.path.join(directory, "index.json"), "w") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+
+@lru_cache(maxsize=1)
+def _presets_by_lattice():
+    return {
+        tuple(np.array([parse_text_input(vector) for vector in preset['vectors']]).ravel()): preset
+        for preset in preset_library().values()
+    }
+
+# Tight-binding bands on a shared set of real-space hopping vectors (h, 3), in units of the lattice dual to
+# b1, b2, b3: onsite (bands,) and hoppings (bands, h) in eV; version is the file's modification time
+BandModel = namedtuple("BandModel", ["name", "version", "fermi_level", "labels", "onsite", "vectors", "hoppings"])
+
+def load_band_model(name):
+    """BandModel from MODEL_DIRECTORY/<name>.json, read again when the file changes.
+
+    The file holds {"fermi_level": eV, "bands": [{"label", "onsite": eV, "hoppings": [{"R": [n1, n2, n3], "t": eV}]}]},
+    each hopping listed once for the pair ±R, so that E(k) = onsite + Σ 2 t cos(k·R).
+    """
+    if name not in band_model_names():
+        raise ValueError(f"unknown band model {name!r}")
+    path = os.path.join(MODEL_DIRECTORY, f"{name}.json")
+    return _load_band_model(name, path, os.path.getmtime(path))
+
+@lru_cache(maxsize=16)
+def _load_band_model(name, path, version):
+    with open(path) as f:
+        model = json.load(f)
+    bands = model["bands"]
+    vectors = sorted({tuple(int(n) for n in hopping["R"]) for band in bands for hopping in band["hoppings"]})
+    column = {vector: i for i, vector in enumerate(vectors)}
+    hoppings = np.zeros((len(bands), len(vectors)))
+    for i, band in enumerate(bands):
+        for hopping in band["hoppings"]:
+            hoppings[i, column[tuple(int(n) for n in hopping["R"])]] += float(hopping["t"])
+    return BandModel(
+        name, version, float(model.get("fermi_level", 0.0)), tuple(band.get("label", str(i)) for i, band in enumerate(bands)),
+        np.array([float(band.get("onsite", 0.0)) for band in bands]), np.array(vectors, dtype=float).reshape((-1, 3)), hoppings
+    )
+
+def band_energies(model, points, reciprocal_lattice, chunk_points=VOLUME_CHUNK_POINTS):
+    """(n, bands) energies of a BandModel relative to its Fermi level at (n, 3) momenta"""
+    # k·R = 2π c·n for fractional coordinates c of k in the reciprocal lattice
+    phase_vectors = 2 * np.pi * np.dot(np.linalg.inv(np.asarray(reciprocal_lattice, dtype=float)), model.vectors.T) # (3, h)
+    energies = np.empty((len(points), len(model.onsite)))
+    step = max(1, chunk_points // max(len(model.vectors), 1))
+    for start in range(0, len(points), step):
+        phases = np.dot(np.asarray(points[start:start + step], dtype=float), phase_vectors)
+        energies[start:start + step] = model.onsite - model.fermi_level + 2 * np.dot(np.cos(phases), model.hoppings.T)
+    return energies
+
+def band_crossings(name, result_key, points, binding_energies, reciprocal_lattice, window):
+    """(n,) mask of the points where a band of the named model lies within window (eV) of the point's energy.
+
+    Band energies are cached per model version and stored plan result, so changing the window is cheap.
+    """
+    model = load_band_model(name)
+    cache_key = (name, model.version, result_key)
+    energies = BAND_ENERGIES.get(cache_key)
+    if energies is None:
+        energies = band_energies(model, points, reciprocal_lattice)
+        BAND_ENERGIES.put(cache_key, energies)
+    # Binding energies count down from the Fermi level
+    return np.any(np.abs(energies + np.asarray(binding_energies)[:, None]) <= window, axis=1)
+
+# Axes of a measured scan: energies (e,) are kinetic, or binding when kinetic is False, or undecided (None)
+# when the file does not say; photon_energy and work_function are None when the file does not record them
+MeasuredScan = namedtuple(
+    "MeasuredScan", ["photon_energy", "work_function", "slit_angles", "scan_angles", "energies", "kinetic"]
+)
+# Names (lower case) of scalar HDF5 datasets and Igor note keys holding the photon energy and work function
+PHOTON_ENERGY_NAMES = ('photon_energy', 'photon energy', 'excitation energy', 'excitation_energy', 'incident_energy', 'hv')
+WORK_FUNCTION_NAMES = ('work_function', 'work function', 'workfunction')
 
+def index_measurements(directory=MEASUREMENT_DIRECTORY):
+    """{path relative to directory: MeasuredScan} for every readable ARPES file below it.
 
-        voronoi_points = np.dot(ZONE_COEFFICENTS.T, reciprocal_lattice)
-        voronoi = Voronoi(voronoi_points)
-        for ridge_points, ridge in zip(voronoi.ridge_points, voronoi.ridge_vertices):
-            if -1 in ridge or len(ridge) < 2:
+    Only headers are read, once per file version, so large scans index as fast as small ones.
+    """
+    scans = {}
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if os.path.splitext(file)[1].lower() not in MEASUREMENT_READERS:
                 continue
-            # 13 is the (0,0,0) BZ center
-            if 13 not in ridge_points:
+            path = os.path.join(root, file)
+            try:
+                stat = os.stat(path)
+                scans[os.path.relpath(path, directory)] = _read_measurement(path, stat.st_mtime, stat.st_size)
+            except (OSError, ValueError, KeyError):
                 continue
-            ridge_starts = voronoi.vertices[list(ridge) + [ridge[0]]]
+    return scans
 
-            projected_fig.add_trace(go.Scatter3d(
-                x=ridge_starts[:, 0],
-                y=ridge_starts[:, 1],
-                z=ridge_starts[:, 2],
-                mode='lines',
-                line=dict(color='black', width=1),
-                showlegend=False,
-            ))
+@lru_cache(maxsize=1024)
+def _read_measurement(path, mtime, size):
+    return MEASUREMENT_READERS[os.path.splitext(path)[1].lower()](path)
 
+def scan_from_axes(axes, metadata):
+    """MeasuredScan from (values, units, name) axes and a {lower-case key: value} metadata dict.
 
+    The energy axis is the one in eV (or named like one), and the remaining axes are the slit angle then the scan angle.
+    """
+    def is_energy(axis):
+        values, units, name = axis
+        return units.strip().lower() == 'ev' or 'energ' in name.lower()
 
-        data_to_store = {
-            'slit_angle': slit_values.tolist(),
-            'deflector_angle': deflector_values.tolist(),
-            'kx': final_momentum_coords[:, 0].tolist(),
-            'ky': final_momentum_coords[:, 1].tolist(),
-            'kz': final_momentum_coords[:, 2].tolist(),
-            'kx_rel': projected_coords[:, 0].tolist(),
-            'ky_rel': projected_coords[:, 1].tolist(),
-            'kz_rel': projected_coords[:, 2].tolist(),
-        }
+    energy_axes = [axis for axis in axes if is_energy(axis)]
+    angle_axes = [axis for axis in axes if not is_energy(axis)]
+    if len(energy_axes) != 1 or not 1 <= len(angle_axes) <= 2:
+        raise ValueError("expected one energy axis and one or two angle axes")
+    scale = str(metadata.get('energy scale', '')).lower()
+    kinetic = True if 'kinetic' in scale else False if 'binding' in scale else None
 
-        return absolute_fig, projected_fig, data_to_store
-        
-    except Exception as e:
-        return go.Figure(), go.Figure(), {}
+    def number(names):
+        for name in names:
+            try:
+                return float(metadata[name])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return None
 
-@callback(
-    Output("download-csv", "data"),
-    Input("download-btn", "n_clicks"),
-    State("calculated-data-store", "data"),
-    prevent_initial_call=True,
+    return MeasuredScan(
+        number(PHOTON_ENERGY_NAMES), number(WORK_FUNCTION_NAMES), angle_axes[0][0],
+        angle_axes[1][0] if len(angle_axes) == 2 else np.zeros(1), energy_axes[0][0], kinetic
+    )
+
+def read_ibw_axes(path):
+    """MeasuredScan from an Igor binary wave (version 5) header and wave note, without reading the wave data"""
+    with open(path, 'rb') as f:
+        header = f.read(64 + 320)
+        if len(header) < 64 + 320:
+            raise ValueError("truncated Igor binary wave")
+        order = '<' if struct.unpack('<h', header[:2])[0] == 5 else '>'
+        if struct.unpack(order + 'h', header[:2])[0] != 5:
+            raise ValueError("only version 5 Igor binary waves are supported")
+        # BinHeader5: sizes of the wave (header and data), formula and note that follow each other
+        wave_size, formula_size, note_size = struct.unpack(order + '3i', header[4:16])
+        wave = header[64:]
+        dimensions = struct.unpack(order + '4i', wave[68:84])
+        deltas = struct.unpack(order + '4d', wave[84:116])
+        offsets = struct.unpack(order + '4d', wave[116:148])
+        units = [wave[152 + 4 * i:156 + 4 * i].split(b'\0')[0].decode('latin-1') for i in range(4)]
+        f.seek(64 + wave_size + formula_size)
+        note = f.read(note_size).decode('latin-1')
+    metadata = {}
+    for line in re.split(r"[\r\n]+", note):
+        key, separator, value = line.partition('=')
+        if separator:
+            metadata[key.strip().lower()] = value.strip()
+    # Scienta-style waves are (energy, slit angle[, scan angle]); units, when present, say which is which
+    names = ('energy', 'slit angle', 'scan angle')
+    axes = [(offsets[i] + deltas[i] * np.arange(dimensions[i]), units[i] or ('eV' if i == 0 else 'deg'), names[min(i, 2)])
+            for i in range(4) if dimensions[i] > 1]
+    return scan_from_axes(axes, metadata)
+
+def read_nexus_axes(path):
+    """MeasuredScan from the axes of the NXdata group of an HDF5/NeXus file; the signal dataset is never read"""
+    if h5py is None:
+        raise ValueError("reading HDF5 files needs h5py")
+
+    def text(value):
+        if isinstance(value, bytes):
+            return value.decode('utf-8', 'replace')
+        if isinstance(value, np.ndarray):
+            return [text(item) for item in value.tolist()]
+        return value
+
+    with h5py.File(path, 'r') as f:
+        groups, metadata = [], {}
+
+        def visit(name, item):
+            if isinstance(item, h5py.Group) and text(item.attrs.get('NX_class')) == 'NXdata':
+                groups.append(item)
+            elif isinstance(item, h5py.Dataset) and item.size == 1:
+                key = name.rsplit('/', 1)[-1].lower()
+                if key in PHOTON_ENERGY_NAMES + WORK_FUNCTION_NAMES or 'monochromator' in name.lower() and key == 'energy':
+                    # Scalars come back as NumPy scalars, bytes or str depending on how they were written
+                    metadata.setdefault('photon_energy' if key == 'energy' else key, text(np.asarray(item[()]).item()))
+                elif key in ('energy_scale', 'energy scale'):
+                    metadata['energy scale'] = text(item[()])
+        f.visititems(visit)
+        if not groups:
+            raise ValueError("no NXdata group")
+        group = groups[0]
+        axis_names = text(group.attrs.get('axes', []))
+        axis_names = [axis_names] if isinstance(axis_names, str) else axis_names
+        axes = []
+        for name in axis_names:
+            if name in group and group[name].ndim == 1:
+                axes.append((group[name][()], text(group[name].attrs.get('units', '')), name))
+    return scan_from_axes(axes, metadata)
+
+MEASUREMENT_READERS = {'.h5': read_nexus_axes, '.hdf5': read_nexus_axes, '.nxs': read_nexus_axes, '.ibw': read_ibw_axes}
+
+def measured_coverage(scan, binding_energies, inner_potential, work_function, offset_along_slit,
+                      offset_perpendicular_slit, sample_normal, slit_direction, reciprocal_lattice,
+                      geometry=DEFAULT_GEOMETRY, surface_normal=None):
+    """(n, 3) absolute and projected momenta of a measured scan with this plan's sample settings, or None.
+
+    The scan's angles are subsampled, at the plan binding energies that fall inside its energy window.
+    """
+    if scan.photon_energy is None:
+        return None
+    work_function = scan.work_function if scan.work_function is not None else work_function
+    energies = np.asarray(scan.energies, dtype=float)
+    if scan.kinetic is not None:
+        scan_binding = scan.photon_energy - work_function - energies if scan.kinetic else energies
+    elif energies.min() > 0.3 * scan.photon_energy:
+        scan_binding = scan.photon_energy - work_function - energies
+    else:
+        # An unlabelled axis near zero is taken as E - E_F, which is minus the binding energy
+        scan_binding = -energies
+    inside = binding_energies[(binding_energies >= scan_binding.min()) & (binding_energies <= scan_binding.max())]
+    if not len(inside):
+        return None
+    inside = inside[np.unique(np.linspace(0, len(inside) - 1, MEASURED_OVERLAY_ENERGIES).round().astype(int))]
+
+    def subsample(angles):
+        return angles[np.unique(np.linspace(0, len(angles) - 1, MEASURED_OVERLAY_ANGLES).round().astype(int))]
+
+    slit_grid, scan_grid = (grid.ravel() for grid in np.meshgrid(subsample(scan.slit_angles), subsample(scan.scan_angles)))
+    absolute, projected, _ = absolute_and_projected_momentum_coords(
+        scan.photon_energy, slit_grid[None, :], scan_grid[None, :], inner_potential, work_function,
+        offset_along_slit, offset_perpendicular_slit, sample_normal, slit_direction, reciprocal_lattice,
+        binding_energies=inside[:, None], geometry=geometry, surface_normal=surface_normal
+    )
+    return absolute.reshape((-1, 3)), projected.reshape((-1, 3))
+
+def preset_for_lattice(lattice_key):
+    """Preset whose reciprocal lattice is exactly lattice_key, if any"""
+    return _presets_by_lattice().get(tuple(lattice_key))
+
+def load_preset_zone(slug):
+    """Precomputed BrillouinZone of a preset, skipping the Voronoi construction"""
+    with np.load(os.path.join(PRESET_DIRECTORY, f"{slug}.npz")) as data:
+        ridges = np.split(data['ridges'], np.cumsum(data['ridge_lengths'])[:-1])
+        high_symmetry_points = tuple(zip(data['high_symmetry_labels'].tolist(), data['high_symmetry_points']))
+        return BrillouinZone(data['vertices'], tuple(ridges), data['neighbours'], high_symmetry_points)
+
+BrillouinZone = namedtuple(
+    "BrillouinZone", ["vertices", "ridges", "neighbours", "high_symmetry_points"], defaults=((),)
 )
-def download_csv(n_clicks, data):
-    if not data:
-        raise PreventUpdate
-    df = pd.DataFrame(data)
-    return dcc.send_data_frame(df.to_csv, "arpes_data.csv", index=False)
 
-def absolute_and_projected_momentum_coords(
-    photon_energies, # (n, )
-    slit_values, # (n,)
-    deflector_values, # (n,)
-    inner_potentials, # (n,)
-    work_functions, # (n,)
-    sample_normal_offset_along_slit, # (n,)
-    sample_normal_offset_perpendicular_to_slit, # (n,)
-    sample_normals, # (n, 3)
-    slit_directions, # (n, 3)
-    reciprocal_lattice, # (3, 3)
-):
-    N = photon_energies.shape[0]
-    final_momentum_coords = np.zeros((N, 3))
-    projected_coords = np.zeros((N, 3))
-    rounded_coords = np.zeros((N, 3))
-    rad_per_deg = np.pi / 180.0
+# basis: (2, 3) surface reciprocal lattice vectors; axes: (2, 3) in-plane plot axes (u, v) from plane_basis;
+# outline: closed (k, 2) polygon of the zone in (u, v)
+SurfaceZone = namedtuple("SurfaceZone", ["basis", "axes", "outline"])
 
-    B_inv = np.linalg.inv(reciprocal_lattice)
+def surface_brillouin_zone(reciprocal_lattice, surface_normal):
+    """2D Voronoi cell of the reciprocal lattice projected onto a surface, cached per lattice and normal"""
+    normal = np.asarray(surface_normal, dtype=float)
+    return _surface_brillouin_zone(tuple(np.asarray(reciprocal_lattice, dtype=float).ravel()),
+                                   tuple(normal / np.linalg.norm(normal)))
 
+@lru_cache(maxsize=32)
+def _surface_brillouin_zone(lattice_key, normal_key):
+    reciprocal_lattice = np.array(lattice_key).reshape((3, 3))
+    normal = np.array(normal_key)
+    # Projections of the nearby bulk lattice points span the surface reciprocal lattice when the normal is a lattice direction
+    projections = np.dot((np.indices((5, 5, 5)) - 2).reshape((3, -1)).T, reciprocal_lattice)
+    projections -= np.outer(np.dot(projections, normal), normal)
+    lengths = np.linalg.norm(projections, axis=1)
+    scale = lengths.max()
+    candidates = projections[np.argsort(lengths)][lengths[np.argsort(lengths)] > 1e-9 * scale]
+    first = candidates[0]
+    independent = np.linalg.norm(np.cross(first, candidates), axis=1) > 1e-6 * scale**2
+    second = candidates[np.argmax(independent)]
+    # Lagrange-Gauss reduction so the 9 nearest centers hold all the cell's neighbours
+    while True:
+        if np.dot(second, second) < np.dot(first, first):
+            first, second = second, first
+        shift = np.round(np.dot(first, second) / np.dot(first, first))
+        if shift == 0:
+            break
+        second = second - shift * first
+    basis = np.array([first, second])
+    axes = np.array(plane_basis(normal))
+    centers = np.dot(SURFACE_ZONE_COEFFICIENTS.T, np.dot(basis, axes.T)) # (9, 2), Γ at index 4
+    voronoi = Voronoi(centers)
+    vertices = voronoi.vertices[voronoi.regions[voronoi.point_region[4]]]
+    vertices = vertices[np.argsort(np.arctan2(vertices[:, 1], vertices[:, 0]))]
+    return SurfaceZone(basis, axes, np.vstack([vertices, vertices[:1]]))
 
-    for i in range(N):
-        hv = photon_energies[i]
-        slit_dir = slit_directions[i]
-        normal = sample_normals[i]
-        slit_angle = slit_values[i]
-        deflector_angle = deflector_values[i]
-        V0 = inner_potentials[i]
-        phi = work_functions[i]
-        offset_slit = sample_normal_offset_along_slit[i]
-        offset_deflector = sample_normal_offset_perpendicular_to_slit[i]
+def first_brillouin_zone(reciprocal_lattice):
+    """Voronoi cell of the Γ point, cached per reciprocal lattice and read from disk for presets"""
+    return _first_brillouin_zone(tuple(np.asarray(reciprocal_lattice, dtype=float).ravel()))
 
-        undeflected_slit_rotation_axis = np.cross(normal, slit_dir)
-        basis = np.empty((3, 3))
-        basis[0] = slit_dir
-        basis[1] = undeflected_slit_rotation_axis
-        basis[2] = normal
+@lru_cache(maxsize=32)
+def _first_brillouin_zone(lattice_key):
+    preset = preset_for_lattice(lattice_key)
+    if preset is not None:
+        return load_preset_zone(preset['slug'])
+    return voronoi_brillouin_zone(np.array(lattice_key).reshape((3, 3)))
 
-        slit_angle = rad_per_deg * (slit_angle - offset_slit)
-        deflector_angle = rad_per_deg * (deflector_angle - offset_deflector)
+def voronoi_brillouin_zone(reciprocal_lattice):
+    """First Brillouin zone from the Voronoi diagram of the 27 nearest reciprocal lattice points"""
+    voronoi_points = np.dot(ZONE_COEFFICENTS.T, reciprocal_lattice)
+    voronoi = Voronoi(voronoi_points)
+    ridges = []
+    neighbours = []
+    for ridge_points, ridge in zip(voronoi.ridge_points, voronoi.ridge_vertices):
+        if -1 in ridge or len(ridge) < 2:
+            continue
+        # 13 is the (0,0,0) BZ center
+        if 13 not in ridge_points:
+            continue
+        ridges.append(voronoi.vertices[list(ridge) + [ridge[0]]])
+        neighbours.append(voronoi_points[ridge_points[0] + ridge_points[1] - 13])
+    vertices = np.unique(np.concatenate(ridges), axis=0)
+    return BrillouinZone(vertices, tuple(ridges), np.array(neighbours))
 
-        cos_slit = np.cos(slit_angle)
-        sin_slit = np.sin(slit_angle)
-        cos_deflector = np.cos(deflector_angle)
-        sin_deflector = np.sin(deflector_angle)
+def lattice_point_group(reciprocal_lattice):
+    """(g, 3, 3) rotations mapping the lattice onto itself and a reference direction that none of them
+    but the identity fixes, cached per reciprocal lattice"""
+    return _lattice_point_group(tuple(np.asarray(reciprocal_lattice, dtype=float).ravel()))
 
-        cos_slit_squared = cos_slit**2
-        sin_defl_squared = sin_deflector**2
-        sin_slit_squared = sin_slit**2
+def reduced_basis(basis, delta=0.99):
+    """LLL reduction of a basis given as columns: short, nearly orthogonal columns spanning the same lattice"""
+    basis = np.array(basis, dtype=float)
+    k = 1
+    while k < basis.shape[1]:
+        # Gram-Schmidt of the current columns, redone every step as there are only three;
+        # entry (i, j) is the component of column j along the i-th orthogonal direction
+        projections = np.linalg.qr(basis)[1]
+        for j in range(k - 1, -1, -1):
+            factor = np.round(projections[j, k] / projections[j, j])
+            if factor:
+                basis[:, k] -= factor * basis[:, j]
+                projections[:, k] -= factor * projections[:, j]
+        previous = projections[k - 1, k - 1]
+        if projections[k, k]**2 >= (delta - (projections[k - 1, k] / previous)**2) * previous**2:
+            k += 1
+        else:
+            basis[:, [k - 1, k]] = basis[:, [k, k - 1]]
+            k = max(k - 1, 1)
+    return basis
 
-        cos_theta = cos_deflector * cos_slit
-        cos_theta_squared = cos_theta**2
-        sin_theta = np.sqrt(1 - cos_theta_squared)
-        denom = np.sqrt(sin_slit_squared + sin_defl_squared * cos_slit_squared)
-        denom = np.where(denom == 0, 1e-10, denom)
-        cos_phi = sin_slit / denom
-        sin_phi =  - sin_deflector * cos_slit / denom
+@lru_cache(maxsize=32)
+def _lattice_point_group(lattice_key):
+    # Any basis of the lattice gives the same group; the reduced one keeps the integer maps small
+    basis = reduced_basis(np.array(lattice_key).reshape((3, 3)).T) # b1, b2, b3 as columns
+    # Every operation is basis @ M @ basis⁻¹ for an integer M; entries of -1..1 cover reduced bases
+    integer_maps = (np.indices((3,) * 9).reshape((9, -1)).T - 1).reshape((-1, 3, 3))
+    operations = basis @ integer_maps @ np.linalg.inv(basis)
+    error = np.abs(operations.transpose((0, 2, 1)) @ operations - np.eye(3)).max(axis=(1, 2))
+    operations = operations[error <= SYMMETRY_TOLERANCE]
+    # The identity first, so ties on the wedge boundary keep a point where it is
+    operations = operations[np.argsort(np.abs(operations - np.eye(3)).max(axis=(1, 2)), kind='stable')]
+    rng = np.random.default_rng(0)
+    while True:
+        reference = rng.normal(size=3)
+        reference /= np.linalg.norm(reference)
+        if np.linalg.norm(operations[1:] @ reference - reference, axis=1).min(initial=np.inf) > 1e-3:
+            return operations, reference
 
-        k_slit = np.sqrt(ELECTRON_SCHRODINGER_CONSTANT * (hv - phi)) * sin_theta * cos_phi
-        k_deflector = np.sqrt(ELECTRON_SCHRODINGER_CONSTANT * (hv - phi)) * sin_theta * sin_phi
-        k_normal = np.sqrt(ELECTRON_SCHRODINGER_CONSTANT * ((hv - phi) * cos_theta_squared + V0))
+def fold_to_irreducible_wedge(points, reciprocal_lattice, chunk_points=VOLUME_CHUNK_POINTS):
+    """Symmetry-equivalent images of (n, 3) points in the irreducible wedge of the lattice point group.
 
-        k_vec_weird_basis = np.array([k_slit, k_deflector, k_normal])
-        k = np.dot(k_vec_weird_basis, basis)
+    The wedge is where a point lies further along the reference direction than any of its images,
+    so each point takes the image with the largest (R p)·r = p·(Rᵀ r).
+    """
+    operations, reference = lattice_point_group(reciprocal_lattice)
+    points = np.asarray(points)
+    weights = operations.transpose((0, 2, 1)) @ reference # (g, 3)
+    folded = np.empty(points.shape, dtype=points.dtype)
+    step = max(1, chunk_points // len(operations))
+    for start in range(0, len(points), step):
+        chunk = np.asarray(points[start:start + step], dtype=float)
+        best = np.argmax(chunk @ weights.T, axis=1)
+        folded[start:start + step] = np.matmul(operations[best], chunk[:, :, None])[:, :, 0]
+    return folded
 
-        final_momentum_coords[i] = k
-        coords = np.dot(k, B_inv)
-        rounded_coord = np.round(coords)
-        rounded_coords[i] = rounded_coord
-        relative_vec = k - np.dot(rounded_coord, reciprocal_lattice)
-        # subtract nearest BZ center
-        adjacent_bz_centers = np.dot(ZONE_COEFFICENTS.T, reciprocal_lattice)
-        distances = np.sum((relative_vec - adjacent_bz_centers)**2, axis=1)
-        nearest_bz_center = adjacent_bz_centers[np.argmin(distances)]
-        relative_vec -= nearest_bz_center
+@lru_cache(maxsize=8)
+def _wedge_voxel_images(lattice_key, resolution):
+    """Flat index of the voxel holding the wedge image of every coverage voxel center"""
+    lower, voxel_size, inside = _zone_voxels(lattice_key, resolution)
+    axes = [lower[i] + voxel_size * (np.arange(inside.shape[i]) + 0.5) for i in range(3)]
+    centers = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape((-1, 3))
+    folded = fold_to_irreducible_wedge(centers, np.array(lattice_key).reshape((3, 3)))
+    voxels = np.clip(np.floor((folded - lower) / voxel_size).astype(int), 0, np.array(inside.shape) - 1)
+    return np.ravel_multi_index(voxels.T, inside.shape)
 
-        projected_coords[i] = relative_vec
+@lru_cache(maxsize=32)
+def _zone_voxels(lattice_key, resolution):
+    zone = _first_brillouin_zone(lattice_key)
+    lower = zone.vertices.min(axis=0)
+    voxel_size = (zone.vertices.max(axis=0) - lower).max() / resolution
+    shape = np.maximum(np.ceil((zone.vertices.max(axis=0) - lower) / voxel_size).astype(int), 1)
+    axes = [lower[i] + voxel_size * (np.arange(shape[i]) + 0.5) for i in range(3)]
+    centers = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1)
+    # A voxel is inside the zone when it is closer to Γ than to every neighbouring lattice point
+    half_distances = 0.5 * np.sum(zone.neighbours**2, axis=1)
+    inside = np.all(np.dot(centers, zone.neighbours.T) <= half_distances + 1e-9, axis=-1)
+    return lower, voxel_size, inside
 
-    return final_momentum_coords, projected_coords, rounded_coords
+def binned_counts(positions, shape):
+    """Number of the (n, d) positions, in cell units, falling in each cell of a grid of the given shape.
+
+    Positions up to one cell outside the grid, such as zone-boundary points after rounding, count in the edge cell.
+    """
+    cells = np.floor(positions).astype(int)
+    near = np.all((cells >= -1) & (cells <= shape), axis=1)
+    cells = np.clip(cells[near], 0, np.array(shape) - 1)
+    return np.bincount(np.ravel_multi_index(cells.T, shape), minlength=int(np.prod(shape))).reshape(shape)
+
+def within_tolerance(occupied, radius):
+    """Cells whose centers are within radius (in cells) of an occupied cell's center.
+
+    One distance transform of the grid, so the cost does not grow with the radius or the number of points.
+    """
+    if radius <= 0 or not occupied.any():
+        return occupied
+    return distance_transform_edt(~occupied) <= radius * (1 + 1e-12)
+
+class ZoneCoverage:
+    """Voxel occupancy of the first Brillouin zone built up from projected momentum points"""
+
+    def __init__(self, reciprocal_lattice, tolerance=0.0, resolution=COVERAGE_RESOLUTION, symmetry=False):
+        lattice_key = tuple(np.asarray(reciprocal_lattice, dtype=float).ravel())
+        self.reciprocal_lattice = np.array(lattice_key).reshape((3, 3))
+        self.lower, self.voxel_size, self.inside = _zone_voxels(lattice_key, resolution)
+        # With symmetry, points are folded into the irreducible wedge and every voxel reads its wedge image
+        self.images = _wedge_voxel_images(lattice_key, resolution) if symmetry else None
+        # Points per voxel; the tolerance is applied to the occupied voxels when the fraction is read
+        self.counts = np.zeros(self.inside.shape, dtype=np.int32)
+        self.tolerance = max(tolerance, 0)
+
+    def _hit_counts(self, points):
+        return binned_counts((np.asarray(points) - self.lower) / self.voxel_size, self.counts.shape)
+
+    def add(self, points):
+        """Count each (n, 3) point in its voxel"""
+        self.counts += self._hit_counts(self._folded(points))
+
+    def remove(self, points):
+        """Undo a previous add() of the same points"""
+        self.counts -= self._hit_counts(self._folded(points))
+
+    def _folded(self, points):
+        if self.images is None:
+            return points
+        return fold_to_irreducible_wedge(points, self.reciprocal_lattice)
+
+    def fraction(self, kz=None):
+        """Covered fraction of the zone, or of the voxel layer closest to kz"""
+        covered = within_tolerance(self.counts > 0, self.tolerance / self.voxel_size)
+        if self.images is not None:
+            covered = covered.reshape(-1)[self.images].reshape(covered.shape)
+        covered &= self.inside
+        inside = self.inside
+        if kz is not None:
+            layer = int(np.floor((kz - self.lower[2]) / self.voxel_size))
+            if layer < 0 or layer >= inside.shape[2]:
+                return np.nan
+            covered = covered[:, :, layer]
+            inside = inside[:, :, layer]
+        total = np.count_nonzero(inside)
+        if total == 0:
+            return np.nan
+        return np.count_nonzero(covered) / total
+
+class SurfaceZoneCoverage:
+    """Pixel occupancy of the surface Brillouin zone built up from projected momentum points"""
+
+    def __init__(self, reciprocal_lattice, surface_normal, tolerance=0.0, resolution=COVERAGE_RESOLUTION):
+        zone = surface_brillouin_zone(reciprocal_lattice, surface_normal)
+        self.axes = zone.axes
+        self.lower = zone.outline.min(axis=0)
+        self.pixel_size = (zone.outline.max(axis=0) - self.lower).max() / resolution
+        shape = np.maximum(np.ceil((zone.outline.max(axis=0) - self.lower) / self.pixel_size).astype(int), 1)
+        axes = [self.lower[i] + self.pixel_size * (np.arange(shape[i]) + 0.5) for i in range(2)]
+        centers = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1)
+        # A pixel is inside the zone when it is closer to Γ than to every neighbouring surface zone center
+        neighbours = np.delete(np.dot(SURFACE_ZONE_COEFFICIENTS.T, np.dot(zone.basis, zone.axes.T)), 4, axis=0)
+        half_distances = 0.5 * np.sum(neighbours**2, axis=1)
+        self.inside = np.all(np.dot(centers, neighbours.T) <= half_distances + 1e-9, axis=-1)
+        self.counts = np.zeros(self.inside.shape, dtype=np.int32)
+        self.tolerance = max(tolerance, 0)
+
+    def add(self, points):
+        """Count each (n, 3) point, projected onto the surface, in its pixel"""
+        self.counts += binned_counts((np.dot(points, self.axes.T) - self.lower) / self.pixel_size, self.counts.shape)
+
+    def fraction(self):
+        """Covered fraction of the surface zone"""
+        total = np.count_nonzero(self.inside)
+        if total == 0:
+            return np.nan
+        covered = within_tolerance(self.counts > 0, self.tolerance / self.pixel_size)
+        return np.count_nonzero(covered & self.inside) / total
+
+def parse_api_points(body, content_type):
+    """{column: (n,) float64} of a JSON or .npy batch, with the API_POINT_COLUMNS defaults for missing columns.
+
+    JSON is a list of parameter sets or an object of columns. A .npy payload is a structured array with named
+    columns or an (n, k) array holding the first k of API_POINT_COLUMNS. Raises ValueError if it is malformed.
+    """
+    names = [name for name, _ in API_POINT_COLUMNS]
+    if content_type == 'application/json':
+        # Values a record leaves out, or gives as null, take their column's default
+        table = pd.DataFrame(json.loads(body)).fillna(dict(API_POINT_COLUMNS))
+        columns = {str(name): table[name].to_numpy(dtype=float) for name in table.columns}
+    elif not body.startswith(b"\x93NUMPY"):
+        raise ValueError("binary batches must be .npy payloads")
+    else:
+        array = np.load(io.BytesIO(body), allow_pickle=False)
+        if array.dtype.names:
+            columns = {name: array[name].reshape(-1).astype(float) for name in array.dtype.names}
+        elif array.ndim == 2 and array.shape[1] <= len(names):
+            columns = dict(zip(names, array.astype(float).T))
+        else:
+            raise ValueError(f"expected a structured array or (n, k<={len(names)}) array, got shape {array.shape}")
+    unknown = set(columns) - set(names)
+    if unknown:
+        raise ValueError(f"unknown columns {sorted(unknown)}")
+    count = len(next(iter(columns.values()))) if columns else 0
+    return {name: columns.get(name, np.full(count, default)) for name, default in API_POINT_COLUMNS}
+
+def api_momentum(columns, settings):
+    """(n, 2, 3) float64 absolute and projected momenta of parsed batch columns, through the UI's engine"""
+    vectors = {name: parse_text_input(settings[name]) for name in
+               ("sample-normal", "slit-direction", "b1-vec", "b2-vec", "b3-vec")}
+    if any(vector is None or vector.shape != (3,) for vector in vectors.values()):
+        raise ValueError("vectors must be three comma-separated numbers")
+    geometry = (settings["slit-orientation"], settings["scan-axis"])
+    if geometry[0] not in SLIT_ORIENTATIONS or geometry[1] not in SCAN_AXES or settings["zone-mode"] not in ZONE_MODES:
+        raise ValueError("unknown slit orientation, scan axis or zone mode")
+    if not all(np.all(np.isfinite(vector)) for vector in vectors.values()):
+        raise ValueError("vectors must be finite")
+    for name in ("sample-normal", "slit-direction"):
+        if not np.any(vectors[name]):
+            raise ValueError(f"{name} must not be zero")
+    sample_normal = vectors["sample-normal"] / np.linalg.norm(vectors["sample-normal"])
+    slit_direction = vectors["slit-direction"] / np.linalg.norm(vectors["slit-direction"])
+    if np.linalg.norm(np.cross(sample_normal, slit_direction)) < 1e-6:
+        raise ValueError("slit-direction must not be parallel to sample-normal")
+    reciprocal_lattice = np.array([vectors["b1-vec"], vectors["b2-vec"], vectors["b3-vec"]])
+    if np.linalg.matrix_rank(reciprocal_lattice) < 3:
+        raise ValueError("b1, b2 and b3 must be linearly independent")
+    final_momentum_coords, projected_coords, _ = absolute_and_projected_momentum_coords(
+        columns["photon-energy"], columns["slit-angle"], columns["deflector-angle"], columns["inner-potential"],
+        columns["work-function"], columns["offset-along-slit"], columns["offset-perpendicular-slit"],
+        sample_normal, slit_direction, reciprocal_lattice, binding_energies=columns["binding-energy"],
+        geometry=geometry, surface_normal=sample_normal if settings["zone-mode"] == 'surface' else None
+    )
+    return np.stack((final_momentum_coords, projected_coords), axis=1)
+
+def open_api_result(key):
+    """Open file of a stored API batch response, or None if it was never computed or has been evicted"""
+    path = os.path.join(API_RESULT_DIRECTORY, key)
+    try:
+        payload = open(os.path.join(path, "momentum.npy"), 'rb')
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return payload
+
+@app.server.route("/api/momentum", methods=["POST"])
+def momentum_api():
+    """Momenta of a batch of parameter sets as an (n, 2, 3) float64 .npy: absolute, then projected, per set.
+
+    Responses are stored in API_RESULT_DIRECTORY, evicted apart from the UI's plans, so repeated batches are
+    streamed from disk. Identical batches in flight share one computation through API_REQUESTS, whose compute slots are
+    separate from the UI's.
+    """
+    body = request.get_data(cache=False)
+    settings = {name: request.args.get(name, default) for name, default in API_SETTINGS.items()}
+    key = "api-" + hashlib.sha256(json.dumps([request.mimetype, settings]).encode() + body).hexdigest()
+    payload = open_api_result(key)
+    if payload is None:
+        try:
+            columns = parse_api_points(body, request.mimetype)
+        except (ValueError, KeyError, TypeError) as e:
+            return Response(f"Invalid batch: {e}\n", status=400, mimetype='text/plain')
+        if len(columns["slit-angle"]) > API_MAX_POINTS:
+            return Response(f"Batches are limited to {API_MAX_POINTS} parameter sets\n", status=413, mimetype='text/plain')
+
+        def compute():
+            momenta = api_momentum(columns, settings)
+            path = partial_result_directory(key, API_RESULT_DIRECTORY)
+            try:
+                np.save(os.path.join(path, "momentum.npy"), momenta, allow_pickle=False)
+            except BaseException:
+                shutil.rmtree(path, ignore_errors=True)
+                raise
+            store_result_directory(path, key, API_RESULT_DIRECTORY, API_RESULT_CACHE_SIZE)
+
+        try:
+            API_REQUESTS.run(None, key, compute)
+        except ValueError as e:
+            return Response(f"Invalid settings: {e}\n", status=400, mimetype='text/plain')
+        payload = open_api_result(key)
+        if payload is None:
+            # Evicted by other results before it could be sent
+            return Response("Server busy, retry the batch\n", status=503, mimetype='text/plain')
+    response = send_file(payload, mimetype='application/x-npy')
+    response.content_length = os.fstat(payload.fileno()).st_size
+    return response
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 8050))
     host = os.environ.get('HOST', 'localhost')
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
@@ -0,0 +1,10 @@
+import pytest
+
+import app
+
+
+@pytest.fixture(autouse=True)
+def result_directories(tmp_path, monkeypatch):
+    """Stored plans and API responses go to a per-test directory, never the checkout's results/"""
+    monkeypatch.setattr(app, "RESULT_DIRECTORY", str(tmp_path / "results"))
+    monkeypatch.setattr(app, "API_RESULT_DIRECTORY", str(tmp_path / "api-results"))
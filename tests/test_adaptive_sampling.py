@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import app
+
+DEFAULTS = [
+    21.2, 13, 4.5, 1, 0, "0,0,1", "1,0,0", -15, 15, 31, -15, 15, 31, 0, 2, 10, "1,0,0", "0,1,0", "0,0,1",
+    "markers", "3d", "float32", "0,0,1", 0, "horizontal", "deflector", "adaptive", 0.05, "off", 0.1, 10, 5,
+    "off", "bulk", None, 0.05, None, 0.1,
+]
+
+
+@pytest.mark.parametrize("geometry, offsets", [
+    (app.DEFAULT_GEOMETRY, (0.0, 0.0)),
+    (app.DEFAULT_GEOMETRY, (10.0, -5.0)),
+    (("vertical", "polar"), (0.0, 0.0)),
+    (("horizontal", "azimuth"), (3.0, 0.0)),
+])
+def test_neighbours_are_within_the_k_spacing(geometry, offsets):
+    k_spacing = 0.02
+    slit_angles, scan_angles, uniform_points = app.adaptive_angle_axes(
+        60.0, 13.0, 4.5, (-20.0, 20.0), (-20.0, 20.0), (0.5, 2.0), k_spacing, geometry, offsets
+    )
+    assert len(slit_angles) * len(scan_angles) <= uniform_points
+    assert (slit_angles[0], slit_angles[-1], scan_angles[0], scan_angles[-1]) == (-20.0, 20.0, -20.0, 20.0)
+    # The shallowest binding energy has the largest steps
+    slit_grid, scan_grid = np.meshgrid(slit_angles, scan_angles)
+    k = np.stack(app.analyzer_momentum_components(
+        60.0, slit_grid - offsets[0], scan_grid - offsets[1], 13.0, 4.5, 0.5, geometry=geometry
+    ), axis=-1)
+    along_slit = np.linalg.norm(np.diff(k, axis=1), axis=-1)
+    along_scan = np.linalg.norm(np.diff(k, axis=0), axis=-1)
+    assert along_slit.max() <= k_spacing and along_scan.max() <= k_spacing
+    # Only just: the axes are not finer than they need to be
+    assert along_slit.max() > 0.9 * k_spacing and along_scan.max() > 0.9 * k_spacing
+
+
+@pytest.mark.parametrize("k_spacing", [None, 0, -0.01, float("nan")])
+def test_invalid_spacings_are_rejected(k_spacing):
+    with pytest.raises(ValueError, match="k_spacing must be positive"):
+        app.adaptive_angle_axes(21.2, 13.0, 4.5, (-15.0, 15.0), (-15.0, 15.0), (0.0, 2.0), k_spacing)
+    values = list(DEFAULTS)
+    values[app.PLAN_INPUTS.index("k-spacing")] = k_spacing
+    assert app.preview_stride(values) == 1
+    absolute_fig, projected_fig, data = app.compute_plan(*values, "adaptive-plan")
+    assert data == {} and not absolute_fig.data and not projected_fig.data
+
+
+def test_spacings_needing_too_many_angles_are_rejected():
+    with pytest.raises(ValueError, match="needs more than"):
+        app.adaptive_angle_axes(21.2, 13.0, 4.5, (-15.0, 15.0), (-15.0, 15.0), (0.0, 2.0), 1e-6)
@@ -0,0 +1,79 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client():
+    return app.server.test_client()
+
+
+def npy(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def test_batch_matches_engine(client):
+    rng = np.random.default_rng(2)
+    angles = np.stack([rng.uniform(-15, 15, 500), rng.uniform(-15, 15, 500), rng.uniform(0, 1, 500)], axis=1)
+    response = client.post("/api/momentum?b3-vec=0,0,0.5", data=npy(angles), content_type="application/x-npy")
+    assert response.status_code == 200
+    assert response.content_length == len(response.data)
+    momenta = np.load(io.BytesIO(response.data))
+    expected = app.absolute_and_projected_momentum_coords(
+        21.2, angles[:, 0], angles[:, 1], 13.0, 4.5, 0.0, 0.0, np.array([0.0, 0.0, 1.0]), np.array([1.0, 0.0, 0.0]),
+        np.diag([1.0, 1.0, 0.5]), binding_energies=angles[:, 2]
+    )
+    np.testing.assert_array_equal(momenta[:, 0], expected[0])
+    np.testing.assert_array_equal(momenta[:, 1], expected[1])
+    # A repeated batch is streamed from the stored response
+    repeated = client.post("/api/momentum?b3-vec=0,0,0.5", data=npy(angles), content_type="application/x-npy")
+    assert repeated.data == response.data
+
+
+def test_json_records_and_columns_agree(client):
+    records = [{"slit-angle": 5.0, "binding-energy": 0.2}, {"slit-angle": -3.0, "photon-energy": 60.0}]
+    columns = {"slit-angle": [5.0, -3.0], "binding-energy": [0.2, 0.0], "photon-energy": [21.2, 60.0]}
+    from_records = client.post("/api/momentum", json=records)
+    from_columns = client.post("/api/momentum", json=columns)
+    assert from_records.status_code == from_columns.status_code == 200
+    assert np.load(io.BytesIO(from_records.data)).shape == (2, 2, 3)
+    np.testing.assert_array_equal(np.load(io.BytesIO(from_records.data)), np.load(io.BytesIO(from_columns.data)))
+
+
+@pytest.mark.parametrize("query, body, reason", [
+    ("", {"json": {"tilt": [1.0]}}, "Invalid batch: unknown columns ['tilt']"),
+    ("", {"data": b"not numpy", "content_type": "application/x-npy"}, "Invalid batch: binary batches must be .npy"),
+    ("", {"data": npy(np.zeros((2, 9))), "content_type": "application/x-npy"}, "Invalid batch: expected"),
+    ("?b1-vec=1,0", {"json": [{}]}, "Invalid settings: vectors must be three comma-separated numbers"),
+    ("?scan-axis=roll", {"json": [{}]}, "Invalid settings: unknown slit orientation, scan axis or zone mode"),
+    ("?sample-normal=0,0,0", {"json": [{}]}, "Invalid settings: sample-normal must not be zero"),
+    ("?slit-direction=0,0,0", {"json": [{}]}, "Invalid settings: slit-direction must not be zero"),
+    ("?slit-direction=0,0,-2", {"json": [{}]}, "Invalid settings: slit-direction must not be parallel to sample-normal"),
+    ("?b3-vec=1,1,0", {"json": [{}]}, "Invalid settings: b1, b2 and b3 must be linearly independent"),
+    ("?b1-vec=inf,0,0", {"json": [{}]}, "Invalid settings: vectors must be finite"),
+])
+def test_invalid_requests_are_rejected(client, query, body, reason):
+    response = client.post(f"/api/momentum{query}", **body)
+    assert response.status_code == 400
+    assert response.get_data(as_text=True).startswith(reason)
+
+
+def test_oversized_batches_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(app, "API_MAX_POINTS", 3)
+    response = client.post("/api/momentum", json={"slit-angle": [0.0, 1.0, 2.0, 3.0]})
+    assert response.status_code == 413
+
+
+def test_responses_are_evicted_apart_from_plans(client, monkeypatch):
+    monkeypatch.setattr(app, "API_RESULT_CACHE_SIZE", 2)
+    os.makedirs(os.path.join(app.RESULT_DIRECTORY, "plan"))
+    for angle in range(4):
+        assert client.post("/api/momentum", json=[{"slit-angle": float(angle)}]).status_code == 200
+    assert len(os.listdir(app.API_RESULT_DIRECTORY)) == 2
+    assert os.listdir(app.RESULT_DIRECTORY) == ["plan"]
@@ -0,0 +1,60 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import app
+
+CUBIC = np.eye(3) * 2 * np.pi / 3.6
+FCC = app.primitive_reciprocal_lattice(3.6, 3.6, 3.6, 90, 90, 90, 'F')
+
+
+def test_nearest_neighbour_cosine_band():
+    model = app.load_band_model("nearest_neighbour")
+    rng = np.random.default_rng(4)
+    points = rng.uniform(-2, 2, (1000, 3))
+    energies = app.band_energies(model, points, CUBIC, chunk_points=100)
+    # t = -0.5 eV to each neighbour, so E = -(cos kx a + cos ky a + cos kz a)
+    np.testing.assert_allclose(energies[:, 0], -np.cos(3.6 * points).sum(axis=1), rtol=0, atol=1e-12)
+    corners = np.dot([[0, 0, 0], [0.5, 0, 0], [0.5, 0.5, 0.5]], CUBIC)
+    np.testing.assert_allclose(app.band_energies(model, corners, CUBIC)[:, 0], [-3, -1, 3], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("name, lattice", [("nearest_neighbour", FCC), ("square_lattice_2d", CUBIC)])
+def test_hoppings_are_in_the_dual_lattice(name, lattice):
+    model = app.load_band_model(name)
+    rng = np.random.default_rng(5)
+    points = rng.uniform(-2, 2, (500, 3))
+    # Real-space vectors a_i with a_i · b_j = 2π δ_ij
+    hopping_vectors = np.dot(model.vectors, 2 * np.pi * np.linalg.inv(lattice).T)
+    expected = model.onsite - model.fermi_level + 2 * np.dot(np.cos(np.dot(points, hopping_vectors.T)), model.hoppings.T)
+    np.testing.assert_allclose(app.band_energies(model, points, lattice), expected, rtol=0, atol=1e-12)
+    # Every reciprocal lattice vector leaves the energies unchanged
+    shifted = points + np.dot(rng.integers(-2, 3, (500, 3)), lattice)
+    np.testing.assert_allclose(app.band_energies(model, shifted, lattice), expected, rtol=0, atol=1e-11)
+
+
+def test_energies_are_cached_per_model_version_and_plan(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "MODEL_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(app, "BAND_ENERGIES", app.SnapshotCache(4))
+    calls = []
+    band_energies = app.band_energies
+    monkeypatch.setattr(app, "band_energies", lambda *args: calls.append(1) or band_energies(*args))
+    path = tmp_path / "flat.json"
+    path.write_text(json.dumps({"fermi_level": 0.0, "bands": [{"onsite": -0.5, "hoppings": []}]}))
+    points = np.zeros((3, 3))
+    binding_energies = np.array([0.5, 0.6, 1.0])
+    assert app.band_crossings("flat", "plan", points, binding_energies, CUBIC, 0.05).tolist() == [True, False, False]
+    # A new window reuses the energies
+    assert app.band_crossings("flat", "plan", points, binding_energies, CUBIC, 0.15).tolist() == [True, True, False]
+    assert len(calls) == 1
+    app.band_crossings("flat", "other-plan", points, binding_energies, CUBIC, 0.05)
+    assert len(calls) == 2
+    # An edited model file is a new version
+    path.write_text(json.dumps({"fermi_level": 0.0, "bands": [{"onsite": -1.0, "hoppings": []}]}))
+    os.utime(path, (1, 1))
+    assert app.band_crossings("flat", "plan", points, binding_energies, CUBIC, 0.05).tolist() == [False, False, True]
+    assert len(calls) == 3
+    with pytest.raises(ValueError, match="unknown band model"):
+        app.band_crossings("missing", "plan", points, binding_energies, CUBIC, 0.05)
@@ -0,0 +1,53 @@
+import pytest
+
+import app
+
+SILICON = """data_Si
+_symmetry_space_group_name_H-M   'F d -3 m'
+_cell_length_a   5.4310(2)
+_cell_length_b   5.4310(2)
+_cell_length_c   5.4310(2)
+_cell_angle_alpha   90
+_cell_angle_beta    90.000
+_cell_angle_gamma   90.
+"""
+
+
+def test_cell_and_centering():
+    assert app._parse_cif_cell(SILICON) == (5.431, 5.431, 5.431, 90.0, 90.0, 90.0, 'F')
+
+
+def test_text_fields_are_skipped():
+    commented = SILICON.replace("_cell_length_a", """_publ_section_comment
+;
+The cell was first refined as
+_cell_length_a 99
+;
+_cell_length_a""")
+    assert app._parse_cif_cell(commented)[0] == 5.431
+    # A text field that is never closed runs to the end of the file
+    with pytest.raises(ValueError, match="no _cell_length_b"):
+        app._parse_cif_cell(SILICON.replace("_cell_length_b", ";\n_cell_length_b"))
+
+
+def test_rhombohedral_axes_are_primitive():
+    hexagonal = SILICON.replace("'F d -3 m'", "'R -3 m'").replace("90.\n", "120\n")
+    assert app._parse_cif_cell(hexagonal)[6] == 'R'
+    assert app._parse_cif_cell(SILICON.replace("'F d -3 m'", "'R -3 m'"))[6] == 'P'
+
+
+@pytest.mark.parametrize("text, reason", [
+    (SILICON.replace("_cell_angle_gamma   90.\n", ""), "CIF file has no _cell_angle_gamma"),
+    (SILICON.replace("90.000", "?"), "CIF value '?' for _cell_angle_beta is not a number"),
+])
+def test_incomplete_cells_are_rejected(text, reason):
+    with pytest.raises(ValueError, match=reason.replace("?", r"\?")):
+        app._parse_cif_cell(text)
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(app, "CIF_CACHE", app.SnapshotCache(2))
+    files = [SILICON.replace("5.4310(2)", f"5.43{i}").encode() for i in range(3)]
+    assert [app.parse_cif(raw)[0] for raw in files] == [5.430, 5.431, 5.432]
+    assert len(app.CIF_CACHE.entries) == 2
+    assert app.parse_cif(files[2]) is app.parse_cif(files[2])
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import app
+
+CUBIC = np.eye(3) * 2 * np.pi / 3.6
+
+
+def cube_points(count=400_000, seed=3):
+    """Random points filling the first Brillouin zone of CUBIC, which is the cube of half-integer fractions"""
+    rng = np.random.default_rng(seed)
+    return np.dot(rng.uniform(-0.5, 0.5, (count, 3)), CUBIC)
+
+
+def test_filled_zone_is_fully_covered():
+    coverage = app.ZoneCoverage(CUBIC, resolution=24)
+    assert coverage.fraction() == 0
+    coverage.add(cube_points())
+    assert coverage.fraction() == pytest.approx(1.0, abs=0.01)
+    assert coverage.fraction(kz=0.0) == pytest.approx(1.0, abs=0.01)
+
+
+def test_remove_undoes_add():
+    coverage = app.ZoneCoverage(CUBIC, tolerance=0.05, resolution=24)
+    points = cube_points(count=1000)
+    coverage.add(points)
+    assert 0 < coverage.fraction() < 1
+    coverage.remove(points)
+    assert coverage.fraction() == 0
+
+
+def test_tolerance_widens_each_point():
+    point = np.zeros((1, 3))
+    exact = app.ZoneCoverage(CUBIC, resolution=24)
+    exact.add(point)
+    widened = app.ZoneCoverage(CUBIC, tolerance=0.2, resolution=24)
+    widened.add(point)
+    assert exact.fraction() == pytest.approx(1 / np.count_nonzero(exact.inside))
+    assert widened.fraction() > 20 * exact.fraction()
+
+
+def test_symmetry_counts_equivalent_momenta_once():
+    # One octant of a cubic zone is equivalent to all of it under the 48 cubic operations
+    octant = np.abs(cube_points())
+    plain = app.ZoneCoverage(CUBIC, resolution=24)
+    plain.add(octant)
+    symmetric = app.ZoneCoverage(CUBIC, resolution=24, symmetry=True)
+    symmetric.add(octant)
+    assert plain.fraction() == pytest.approx(0.125, abs=0.02)
+    assert symmetric.fraction() == pytest.approx(1.0, abs=0.02)
+
+
+def test_surface_coverage_of_filled_surface_zone():
+    coverage = app.SurfaceZoneCoverage(CUBIC, np.array([0.0, 0.0, 1.0]), resolution=32)
+    points = cube_points(count=200_000)
+    coverage.add(points)
+    assert coverage.fraction() == pytest.approx(1.0, abs=0.01)
+    half = app.SurfaceZoneCoverage(CUBIC, np.array([0.0, 0.0, 1.0]), resolution=32)
+    half.add(points[points[:, 0] > 0])
+    assert half.fraction() == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.parametrize("tolerance", [0.05, 0.3])
+def test_tolerance_matches_a_ball_around_every_point(tolerance):
+    points = cube_points(count=300)
+    coverage = app.ZoneCoverage(CUBIC, tolerance=tolerance, resolution=24)
+    coverage.add(points)
+    # Reference: every voxel whose center is within the tolerance of a hit voxel's center
+    reach = int(np.ceil(tolerance / coverage.voxel_size))
+    offsets = (np.indices((2 * reach + 1,) * 3) - reach).reshape((3, -1)).T
+    ball = offsets[np.sum(offsets**2, axis=1) * coverage.voxel_size**2 <= tolerance**2]
+    voxels = np.floor((points - coverage.lower) / coverage.voxel_size).astype(int)
+    voxels = (voxels[:, None, :] + ball[None, :, :]).reshape((-1, 3))
+    voxels = voxels[np.all((voxels >= 0) & (voxels < coverage.counts.shape), axis=1)]
+    covered = np.zeros(coverage.counts.shape, dtype=bool)
+    covered[tuple(voxels.T)] = True
+    assert coverage.fraction() == np.count_nonzero(covered & coverage.inside) / np.count_nonzero(coverage.inside)
@@ -0,0 +1,51 @@
+import numpy as np
+
+import app
+
+
+def test_within_cut_selects_the_slab_around_the_plane():
+    coords = np.array([[0.0, 0.0, 0.96], [1.0, 2.0, 1.04], [0.0, 0.0, 1.06], [0.0, 0.0, -1.0]])
+    assert app.within_cut(coords, [0, 0, 2], 1.0, 0.1).tolist() == [True, True, False, False]
+
+
+def test_cut_view_shows_only_points_near_the_plane():
+    rng = np.random.default_rng(1)
+    absolute = rng.uniform(-2, 2, (5000, 3))
+    projected = rng.uniform(-0.5, 0.5, (5000, 3))
+    hover_data = rng.uniform(size=(5000, 3))
+    color_values = np.arange(5000.0)
+    absolute_fig, projected_fig = app.cut_view_figures(
+        absolute, projected, color_values, "index", hover_data, (50, 100), np.eye(3), [1, 1, 0], 0.2, 0.05
+    )
+    for figure, coords in ((absolute_fig, absolute), (projected_fig, projected)):
+        shown = np.abs((coords[:, 0] + coords[:, 1]) / np.sqrt(2) - 0.2) <= 0.025
+        assert 0 < np.count_nonzero(shown) < len(coords)
+        points = figure.data[0]
+        np.testing.assert_array_equal(points.marker.color, color_values[shown])
+        np.testing.assert_array_equal(points.customdata, hover_data[shown])
+
+
+def test_markers_are_thinned_to_the_budget(monkeypatch):
+    monkeypatch.setattr(app, "MARKER_POINTS", 1000)
+    # Four energies over a 40 x 50 angle grid, 8000 points
+    rng = np.random.default_rng(2)
+    absolute = rng.uniform(-2, 2, (8000, 3))
+    color_values = np.arange(8000.0)
+    hover_data = np.repeat(color_values[:, None], 3, axis=1)
+    absolute_fig, projected_fig = app.volume_figures(
+        absolute, absolute, color_values, "index", hover_data, np.eye(3), "markers", (40, 50), "off"
+    )
+    # Every third slit and scan angle of each grid is kept
+    grid = np.arange(2000).reshape((40, 50))[::3, ::3].reshape(-1)
+    expected = (2000 * np.arange(4)[:, None] + grid).reshape(-1)
+    for figure in (absolute_fig, projected_fig):
+        np.testing.assert_array_equal(figure.data[0].marker.color, expected)
+        np.testing.assert_array_equal(figure.data[0].customdata[:, 0], expected)
+        assert figure.layout.title.text.endswith("(1 in 9 angles shown)")
+    # Slab selections are thinned only when they exceed the budget themselves
+    figures = app.cut_view_figures(absolute, absolute, color_values, "index", hover_data, (40, 50), np.eye(3),
+                                   [0, 0, 1], 0.0, 4.0)
+    assert len(figures[0].data[0].marker.color) == len(expected)
+    figures = app.cut_view_figures(absolute, absolute, color_values, "index", hover_data, (40, 50), np.eye(3),
+                                   [0, 0, 1], 0.0, 0.4)
+    assert len(figures[0].data[0].marker.color) == np.count_nonzero(np.abs(absolute[:, 2]) <= 0.2)
@@ -0,0 +1,175 @@
+import numpy as np
+import pytest
+
+import app
+
+LATTICE = np.array([[1.1, 0.0, 0.0], [0.2, 0.9, 0.0], [0.0, 0.1, 1.4]])
+
+
+def random_points(count=20_000, seed=5):
+    rng = np.random.default_rng(seed)
+    args = (
+        rng.uniform(10, 200, count), rng.uniform(-40, 40, count), rng.uniform(-40, 40, count), 13.0, 4.5, 1.0, -2.0,
+        np.array([0.0, 0.6, 0.8]), np.array([1.0, 0.0, 0.0]), LATTICE,
+    )
+    return args, rng.uniform(0, 3, count)
+
+
+def numpy_engine(*args, **kwargs):
+    """absolute_and_projected_momentum_coords with the compiled kernel switched off"""
+    ready = app.JIT_READY.is_set()
+    app.JIT_READY.clear()
+    try:
+        return app.absolute_and_projected_momentum_coords(*args, **kwargs)
+    finally:
+        if ready:
+            app.JIT_READY.set()
+
+
+@pytest.fixture(scope="module")
+def kernel():
+    pytest.importorskip("numba")
+    if not app.ENGINE_JIT:
+        pytest.skip("ENGINE_JIT is off")
+    assert app.JIT_READY.wait(300), "the kernel warm-up did not pass its check against the NumPy engine"
+
+
+def test_kernel_matches_numpy_engine(kernel):
+    args, binding_energies = random_points()
+    absolute, projected, rounded = app.jit_momentum_coords(*args, binding_energies=binding_energies)
+    expected = numpy_engine(*args, binding_energies=binding_energies)
+    # Same operations in the same order; only the fold's dot products may round differently
+    np.testing.assert_array_equal(absolute, expected[0])
+    np.testing.assert_array_equal(rounded, expected[2])
+    np.testing.assert_allclose(projected, expected[1], rtol=0, atol=1e-12)
+
+
+def test_kernel_broadcasts_like_numpy_engine(kernel):
+    slit_angles = np.linspace(-15, 15, 31)
+    binding_energies = np.linspace(0, 2, 5)[:, None]
+    args = (21.2, slit_angles[None, :], 0.0, 13.0, 4.5, 0.0, 0.0, np.array([0.0, 0.0, 1.0]), np.array([1.0, 0.0, 0.0]),
+            np.eye(3))
+    result = app.jit_momentum_coords(*args, binding_energies=binding_energies)
+    expected = numpy_engine(*args, binding_energies=binding_energies)
+    assert result[0].shape == (5, 31, 3)
+    np.testing.assert_array_equal(result[0], expected[0])
+
+
+def test_float32_plans_use_the_kernel_within_float32_error(kernel):
+    args, binding_energies = random_points(count=5000)
+    absolute, projected, _ = app.absolute_and_projected_momentum_coords(
+        *args, binding_energies=binding_energies, dtype=np.float32
+    )
+    expected = numpy_engine(*args, binding_energies=binding_energies)
+    assert absolute.dtype == np.float32 and projected.dtype == np.float32
+    np.testing.assert_allclose(absolute, expected[0], rtol=0, atol=app.FLOAT32_TOLERANCE)
+    assert app.folded_difference(projected, expected[1], LATTICE).max() <= app.FLOAT32_TOLERANCE
+
+
+@pytest.mark.parametrize("engine", ["exact", "factorized"])
+def test_volume_engines_agree(engine):
+    slit_values, deflector_values = (grid.ravel() for grid in np.meshgrid(np.linspace(-20, 20, 41), np.linspace(-10, 10, 21)))
+    binding_energies = np.linspace(0, 1, 4)
+    args = (40.0, slit_values, deflector_values, 13.0, 4.5, 0.5, -0.5, np.array([0.0, 0.0, 1.0]),
+            np.array([1.0, 0.0, 0.0]), LATTICE)
+    absolute, projected = app.momentum_volume(*args, binding_energies, chunk_points=500, engine=engine)
+    expected = numpy_engine(*args, binding_energies=binding_energies[:, None])
+    np.testing.assert_allclose(absolute, expected[0], rtol=0, atol=1e-12)
+    assert app.folded_difference(projected, expected[1], LATTICE).max() <= 1e-12
+
+
+# Emission direction (x, y, z) at slit angle a and scan angle b for each geometry, from the rotations by hand
+GEOMETRY_DIRECTIONS = {
+    ('horizontal', 'deflector'): lambda a, b: (np.sin(a), -np.cos(a) * np.sin(b), np.cos(a) * np.cos(b)),
+    ('horizontal', 'polar'): lambda a, b: (np.sin(a - b), 0 * a, np.cos(a - b)),
+    ('horizontal', 'tilt'): lambda a, b: (np.sin(a), np.cos(a) * np.sin(b), np.cos(a) * np.cos(b)),
+    ('horizontal', 'azimuth'): lambda a, b: (np.sin(a) * np.cos(b), -np.sin(a) * np.sin(b), np.cos(a)),
+    ('vertical', 'deflector'): lambda a, b: (np.cos(a) * np.sin(b), np.sin(a), np.cos(a) * np.cos(b)),
+    ('vertical', 'polar'): lambda a, b: (-np.cos(a) * np.sin(b), np.sin(a), np.cos(a) * np.cos(b)),
+    # Tilting about x turns a vertical slit within its own plane
+    ('vertical', 'tilt'): lambda a, b: (0 * a, np.sin(a + b), np.cos(a + b)),
+    ('vertical', 'azimuth'): lambda a, b: (np.sin(a) * np.sin(b), np.sin(a) * np.cos(b), np.cos(a)),
+}
+
+
+@pytest.mark.parametrize("geometry", list(GEOMETRY_DIRECTIONS))
+def test_geometries_at_known_angles(geometry):
+    slit_angles, scan_angles = np.array([0.0, 30.0, 0.0, 30.0, -20.0]), np.array([0.0, 0.0, 30.0, 60.0, 45.0])
+    x, y, z = GEOMETRY_DIRECTIONS[geometry](np.radians(slit_angles), np.radians(scan_angles))
+    factors = app.geometry_emission_factors(slit_angles, scan_angles, geometry)
+    np.testing.assert_allclose(factors, (x, y, z**2), rtol=0, atol=1e-15)
+    if geometry == app.DEFAULT_GEOMETRY:
+        np.testing.assert_allclose(app.emission_angle_factors(slit_angles, scan_angles), factors, rtol=0, atol=1e-15)
+    # The resolution path builds its directions separately
+    directions, _ = app.emission_direction_derivatives(slit_angles, scan_angles, geometry)
+    np.testing.assert_allclose(directions, np.stack([x, y, z], axis=-1), rtol=0, atol=1e-15)
+
+
+def test_unknown_geometries_are_rejected():
+    with pytest.raises(ValueError, match="unknown geometry"):
+        app.geometry_emission_factors(0.0, 0.0, ('diagonal', 'deflector'))
+
+
+def test_volumes_fill_the_given_angle_columns():
+    slit_values, deflector_values = (grid.ravel() for grid in np.meshgrid(np.linspace(-20, 20, 21), np.linspace(-10, 10, 11)))
+    binding_energies = np.linspace(0, 1, 3)
+    args = (13.0, 4.5, 0.5, -0.5, np.array([0.0, 0.0, 1.0]), np.array([1.0, 0.0, 0.0]), LATTICE)
+    indices = np.flatnonzero(np.arange(len(slit_values)) % 3 != 0)
+    expected = app.momentum_volume(40.0, slit_values, deflector_values, *args, binding_energies)
+    out = (np.zeros(expected[0].shape), np.zeros(expected[1].shape))
+    app.momentum_volume(40.0, slit_values[indices], deflector_values[indices], *args, binding_energies,
+                        chunk_points=100, out=out, indices=indices)
+    for filled, full in zip(out, expected):
+        np.testing.assert_array_equal(filled[:, indices], full[:, indices])
+        assert not np.any(filled[:, ::3])
+    resolution = app.resolution_volume(40.0, slit_values, deflector_values, 13.0, 4.5, binding_energies, 0.1, 0.01, 0.005)
+    filled = np.zeros(resolution.shape)
+    app.resolution_volume(40.0, slit_values[indices], deflector_values[indices], 13.0, 4.5, binding_energies,
+                          0.1, 0.01, 0.005, chunk_points=100, out=filled, indices=indices)
+    np.testing.assert_array_equal(filled[:, indices], resolution[:, indices])
+    assert not np.any(filled[:, ::3])
+
+
+@pytest.mark.parametrize("geometry", list(GEOMETRY_DIRECTIONS))
+def test_jacobian_matches_finite_differences(geometry):
+    rng = np.random.default_rng(7)
+    slit_angles, scan_angles, binding_energies = rng.uniform(-30, 30, 50), rng.uniform(-30, 30, 50), rng.uniform(0, 3, 50)
+
+    def components(slit, scan, binding):
+        return np.stack(app.analyzer_momentum_components(40.0, slit, scan, 13.0, 4.5, binding, geometry=geometry),
+                        axis=-1)
+    step = 1e-5
+    # Central differences per degree of each angle and per eV of kinetic energy, which is minus the binding energy
+    differences = np.stack([
+        components(slit_angles + step, scan_angles, binding_energies) - components(slit_angles - step, scan_angles, binding_energies),
+        components(slit_angles, scan_angles + step, binding_energies) - components(slit_angles, scan_angles - step, binding_energies),
+        components(slit_angles, scan_angles, binding_energies - step) - components(slit_angles, scan_angles, binding_energies + step),
+    ], axis=-1) / (2 * step)
+    jacobian = app.momentum_jacobian(40.0, slit_angles, scan_angles, 13.0, 4.5, binding_energies, geometry=geometry)
+    np.testing.assert_allclose(jacobian, differences, rtol=0, atol=1e-9)
+
+
+def test_resolution_ellipsoid_scales_with_the_widths():
+    slit_values, scan_values = np.linspace(-15, 15, 7), np.linspace(-10, 10, 7)
+    binding_energies = np.array([0.0, 1.0])
+
+    def axes(angular, energy, bandwidth):
+        return app.resolution_volume(40.0, slit_values, scan_values, 13.0, 4.5, binding_energies, angular, energy, bandwidth)
+    reference = axes(0.1, 0.01, 0.005)
+    assert np.all(reference[..., 0] >= reference[..., 1]) and np.all(reference[..., 1] >= reference[..., 2])
+    # Every FWHM is linear in a common scale of all widths; the closed-form eigenvalues lose a few digits
+    # where two axes are nearly equal
+    np.testing.assert_allclose(axes(0.3, 0.03, 0.015), 3 * reference, rtol=1e-7)
+    # Energy resolution and photon bandwidth add in quadrature
+    np.testing.assert_allclose(axes(0.1, 0.03, 0.04), axes(0.1, 0.05, 0.0), rtol=1e-7)
+    # Without angular spread the ellipsoid degenerates to the energy direction of the Jacobian
+    jacobian = app.momentum_jacobian(40.0, slit_values, scan_values, 13.0, 4.5, binding_energies[:, None])
+    energy_only = axes(0.0, 0.05, 0.0)
+    np.testing.assert_allclose(energy_only[..., 0], 0.05 * np.linalg.norm(jacobian[..., 2], axis=-1), rtol=1e-7)
+    # Zero eigenvalues come out as round-off, whose square root is far from zero in absolute terms
+    assert np.all(energy_only[..., 1:] <= 1e-4 * energy_only[..., :1])
+    # Without energy spread the axes are the angular Jacobian's singular values
+    angular_only = axes(0.2, 0.0, 0.0)
+    singular_values = np.linalg.svd(jacobian[..., :2], compute_uv=False)
+    np.testing.assert_allclose(angular_only[..., :2], 0.2 * singular_values, rtol=1e-7)
+    assert np.all(angular_only[..., 2] <= 1e-4 * angular_only[..., 1])
@@ -0,0 +1,123 @@
+import struct
+
+import numpy as np
+import pytest
+
+import app
+
+
+def write_ibw(path, dimensions, deltas, offsets, units, note, order="<", version=5):
+    """Igor binary wave (version 5) with zeroed float32 data"""
+    data = np.zeros(int(np.prod([size for size in dimensions if size])), dtype=order + "f4").tobytes()
+    wave = bytearray(320)
+    struct.pack_into(order + "4i", wave, 68, *dimensions)
+    struct.pack_into(order + "4d", wave, 84, *deltas)
+    struct.pack_into(order + "4d", wave, 116, *offsets)
+    for i, unit in enumerate(units):
+        wave[152 + 4 * i:152 + 4 * i + len(unit)] = unit.encode()
+    header = bytearray(64)
+    struct.pack_into(order + "h", header, 0, version)
+    struct.pack_into(order + "3i", header, 4, len(wave) + len(data), 0, len(note.encode()))
+    path.write_bytes(bytes(header) + bytes(wave) + data + note.encode())
+
+
+def test_ibw_cut_axes_and_metadata(tmp_path):
+    path = tmp_path / "cut.ibw"
+    write_ibw(path, (200, 100, 0, 0), (0.005, 0.3, 0, 0), (-0.8, -15, 0, 0), ("eV", "deg", "", ""),
+              "Excitation Energy=21.2\rWork Function=4.4\rEnergy Scale=Binding\r")
+    scan = app.read_ibw_axes(str(path))
+    assert (scan.photon_energy, scan.work_function, scan.kinetic) == (21.2, 4.4, False)
+    np.testing.assert_allclose(scan.energies, -0.8 + 0.005 * np.arange(200))
+    np.testing.assert_allclose(scan.slit_angles, -15 + 0.3 * np.arange(100))
+    np.testing.assert_array_equal(scan.scan_angles, [0.0])
+
+
+def test_big_endian_ibw_map(tmp_path):
+    path = tmp_path / "map.ibw"
+    write_ibw(path, (100, 50, 30, 0), (0.01, 0.6, 1.0, 0), (16.0, -15, -15, 0), ("eV", "", "", ""), "hv=21.2\r",
+              order=">")
+    scan = app.read_ibw_axes(str(path))
+    assert (scan.photon_energy, scan.work_function, scan.kinetic) == (21.2, None, None)
+    assert (len(scan.energies), len(scan.slit_angles), len(scan.scan_angles)) == (100, 50, 30)
+    assert scan.scan_angles[-1] == pytest.approx(14.0)
+
+
+def test_unsupported_ibw_files_are_rejected(tmp_path):
+    old = tmp_path / "old.ibw"
+    write_ibw(old, (10, 10, 0, 0), (1, 1, 0, 0), (0, 0, 0, 0), ("eV", "", "", ""), "", version=2)
+    with pytest.raises(ValueError, match="version 5"):
+        app.read_ibw_axes(str(old))
+    truncated = tmp_path / "truncated.ibw"
+    truncated.write_bytes(b"\x05\x00" + bytes(100))
+    with pytest.raises(ValueError, match="truncated"):
+        app.read_ibw_axes(str(truncated))
+
+
+def test_index_skips_unreadable_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    write_ibw(tmp_path / "sub" / "cut.ibw", (20, 10, 0, 0), (0.01, 1, 0, 0), (16, -5, 0, 0), ("eV", "", "", ""),
+              "hv=21.2\r")
+    (tmp_path / "broken.ibw").write_bytes(b"not a wave")
+    (tmp_path / "notes.txt").write_text("hv=21.2")
+    assert list(app.index_measurements(str(tmp_path))) == ["sub/cut.ibw"]
+
+
+@pytest.mark.parametrize("scale, energies, kinetic", [
+    ("kinetic", np.linspace(15.5, 16.7, 61), True),
+    ("binding", np.linspace(0.0, 1.2, 61), False),
+    ("", np.linspace(-1.2, 0.0, 61), None),
+])
+def test_energy_scales_give_the_same_coverage(scale, energies, kinetic):
+    angles = (np.linspace(-15, 15, 31), "deg", "angle")
+    scan = app.scan_from_axes([(energies, "eV", "energy"), angles], {"energy scale": scale, "hv": "21.2"})
+    assert scan.kinetic is kinetic
+    binding_energies = np.array([0.0, 0.5, 1.0, 3.0])
+    absolute, projected = app.measured_coverage(
+        scan._replace(work_function=4.5), binding_energies, 13.0, 4.5, 0.0, 0.0, np.array([0.0, 0.0, 1.0]),
+        np.array([1.0, 0.0, 0.0]), np.eye(3)
+    )
+    # 3 eV is outside every window; the rest are sampled on up to MEASURED_OVERLAY_ANGLES slit angles
+    assert absolute.shape == projected.shape == (3 * app.MEASURED_OVERLAY_ANGLES, 3)
+
+
+def test_scans_without_photon_energy_are_not_overlaid():
+    scan = app.scan_from_axes([(np.linspace(0, 1, 5), "eV", "energy"), (np.linspace(-5, 5, 5), "deg", "angle")], {})
+    assert app.measured_coverage(scan, np.array([0.5]), 13.0, 4.5, 0.0, 0.0, np.array([0.0, 0.0, 1.0]),
+                                 np.array([1.0, 0.0, 0.0]), np.eye(3)) is None
+
+
+def test_nexus_axes(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    path = tmp_path / "scan.nxs"
+    with h5py.File(path, "w") as f:
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.create_dataset("instrument/monochromator/energy", data=60.0)
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["axes"] = ["angle", "energy"]
+        data.create_dataset("angle", data=np.linspace(-10, 10, 21)).attrs["units"] = "deg"
+        data.create_dataset("energy", data=np.linspace(54, 56, 11)).attrs["units"] = "eV"
+        data.create_dataset("data", data=np.zeros((21, 11)))
+    scan = app.read_nexus_axes(str(path))
+    assert scan.photon_energy == 60.0
+    assert len(scan.slit_angles) == 21 and len(scan.energies) == 11
+
+
+def test_nexus_text_metadata(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    path = tmp_path / "scan.nxs"
+    with h5py.File(path, "w") as f:
+        # Written by hand or by older tools: byte-string attributes and numbers stored as text
+        data = f.create_group("entry/data")
+        data.attrs["NX_class"] = np.bytes_(b"NXdata")
+        data.attrs["axes"] = np.array([b"angle", b"energy"])
+        f["entry/instrument/monochromator/energy"] = np.bytes_(b"60.0")
+        f["entry/instrument/analyzer/work_function"] = "4.3"
+        f["entry/instrument/analyzer/energy_scale"] = b"Kinetic"
+        data.create_dataset("angle", data=np.linspace(-10, 10, 21)).attrs["units"] = b"deg"
+        data.create_dataset("energy", data=np.linspace(54, 56, 11)).attrs["units"] = b"eV"
+    scan = app.read_nexus_axes(str(path))
+    assert (scan.photon_energy, scan.work_function, scan.kinetic) == (60.0, 4.3, True)
+    assert len(scan.slit_angles) == 21 and len(scan.energies) == 11
+    assert list(app.index_measurements(str(tmp_path))) == ["scan.nxs"]
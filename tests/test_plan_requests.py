@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+import app
+
+
+class Blocking:
+    """Compute function that records its calls and blocks until released"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.result
+
+
+def start(requests, session, key, compute, outcomes):
+    """Runs a request on its own thread, recording its result or exception under (session, key)"""
+    def run():
+        try:
+            outcomes[session, key] = requests.run(session, key, compute)
+        except BaseException as e:
+            outcomes[session, key] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_identical_plans_share_one_computation():
+    requests = app.PlanRequests(1)
+    compute = Blocking(object())
+    outcomes = {}
+    first = start(requests, "a", "plan", compute, outcomes)
+    assert compute.started.wait(5)
+    second = start(requests, "b", "plan", compute, outcomes)
+    wait_until(lambda: requests.in_flight["plan"][1] == 1)
+    compute.release.set()
+    first.join(5)
+    second.join(5)
+    assert compute.calls == 1
+    assert outcomes["a", "plan"] is outcomes["b", "plan"] is compute.result
+    assert requests.in_flight == {} and requests.latest == {}
+
+
+def test_newer_request_supersedes_the_queued_one():
+    requests = app.PlanRequests(1)
+    busy, older, newer = Blocking("busy"), Blocking("older"), Blocking("newer")
+    newer.release.set()
+    outcomes = {}
+    threads = [start(requests, "other", "busy", busy, outcomes)]
+    assert busy.started.wait(5)
+    # Both of this session's requests queue behind the busy slot
+    threads.append(start(requests, "session", "older", older, outcomes))
+    wait_until(lambda: requests.counter == 2)
+    threads.append(start(requests, "session", "newer", newer, outcomes))
+    wait_until(lambda: requests.counter == 3)
+    busy.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert isinstance(outcomes["session", "older"], app.PreventUpdate)
+    assert older.calls == 0
+    assert outcomes["session", "newer"] == "newer" and outcomes["other", "busy"] == "busy"
+    assert requests.in_flight == {} and requests.latest == {}
+
+
+def test_superseded_plans_still_run_for_other_sessions():
+    requests = app.PlanRequests(1)
+    busy, shared, newer = Blocking("busy"), Blocking("shared"), Blocking("newer")
+    shared.release.set()
+    newer.release.set()
+    outcomes = {}
+    threads = [start(requests, "other", "busy", busy, outcomes)]
+    assert busy.started.wait(5)
+    threads.append(start(requests, "session", "shared", shared, outcomes))
+    wait_until(lambda: requests.counter == 2)
+    threads.append(start(requests, "watcher", "shared", shared, outcomes))
+    wait_until(lambda: requests.in_flight["shared"][1] == 1)
+    threads.append(start(requests, "session", "newer", newer, outcomes))
+    wait_until(lambda: requests.counter == 4)
+    busy.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert shared.calls == 1
+    assert outcomes["session", "shared"] == outcomes["watcher", "shared"] == "shared"
+    assert outcomes["session", "newer"] == "newer"
+
+
+def test_failures_reach_every_waiting_request():
+    requests = app.PlanRequests(1)
+    compute = Blocking(None)
+    outcomes = {}
+
+    def failing():
+        compute()
+        raise ValueError("no plan")
+    threads = [start(requests, "a", "plan", failing, outcomes)]
+    assert compute.started.wait(5)
+    threads.append(start(requests, "b", "plan", failing, outcomes))
+    wait_until(lambda: requests.in_flight["plan"][1] == 1)
+    compute.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert compute.calls == 1
+    for session in ("a", "b"):
+        with pytest.raises(ValueError, match="no plan"):
+            raise outcomes[session, "plan"]
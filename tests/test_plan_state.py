@@ -0,0 +1,99 @@
+import base64
+import zlib
+
+import pytest
+
+import app
+
+DEFAULTS = [
+    21.2, 13, 4.5, 1, 0, "0,0,1", "1,0,0", -15, 15, 31, -15, 15, 31, 0, 2, 10, "1,0,0", "0,1,0", "0,0,1",
+    "markers", "3d", "float32", "0,0,1", 0, "horizontal", "deflector", "uniform", 0.02, "off", 0.1, 10, 5,
+    "off", "bulk", None, 0.05, None, 0.1,
+]
+
+
+def state_with(index, value):
+    values = list(DEFAULTS)
+    values[index] = value
+    return app.encode_plan_state(values)[0]
+
+
+def test_state_round_trip():
+    state, key = app.encode_plan_state(DEFAULTS)
+    assert app.decode_plan_state(state) == DEFAULTS
+    assert app.restore_plan(f"?plan={state}") == (*DEFAULTS, "")
+    # Whitespace in vector fields does not change the plan
+    spaced = list(DEFAULTS)
+    spaced[5] = " 0, 0, 1 "
+    assert app.encode_plan_state(spaced) == (state, key)
+
+
+def test_display_inputs_share_result_key():
+    changed = list(DEFAULTS)
+    changed[app.PLAN_INPUTS.index("view-mode")] = "cut"
+    assert app.encode_plan_state(changed)[1] != app.encode_plan_state(DEFAULTS)[1]
+    assert app.plan_result_key(changed) == app.plan_result_key(DEFAULTS)
+
+
+@pytest.mark.parametrize("component, value, expected", [
+    ("slit-angle-count", 1e8, app.COUNT_LIMIT),
+    ("slit-angle-count", 31.0, 31),
+    ("slit-angle-count", -3, 1),
+    ("binding-energy-count", 500, app.ENERGY_COUNT_LIMIT),
+    ("k-spacing", -1, 0),
+    ("photon-energy", None, None),
+    ("measured-scans", ["missing.ibw"], []),
+])
+def test_values_are_clamped_to_control_limits(component, value, expected):
+    index = app.PLAN_INPUTS.index(component)
+    assert app.decode_plan_state(state_with(index, value))[index] == expected
+
+
+@pytest.mark.parametrize("component, value, reason", [
+    ("slit-angle-count", 31.5, "slit-angle-count is not a whole number"),
+    ("slit-angle-count", "31", "slit-angle-count is not a number"),
+    ("photon-energy", True, "photon-energy is not a number"),
+    ("photon-energy", float("inf"), "photon-energy is not a number"),
+    ("sample-normal", [0, 0, 1], "sample-normal is not text"),
+    ("view-mode", "side", "view-mode has no option 'side'"),
+    ("band-model", "../secrets", "band model '../secrets' is not available"),
+    ("measured-scans", "scan.ibw", "measured-scans is not a list of scan names"),
+])
+def test_invalid_values_are_reported(component, value, reason):
+    restored = app.restore_plan(f"?plan={state_with(app.PLAN_INPUTS.index(component), value)}")
+    assert restored[-1] == f"Could not open the plan link: {reason}."
+    assert all(value is app.dash.no_update for value in restored[:-1])
+
+
+def test_oversized_and_damaged_states_are_reported():
+    values = list(DEFAULTS)
+    values[app.PLAN_INPUTS.index("measured-scans")] = [f"scan{i:04d}.ibw" for i in range(1000)]
+    # encode_plan_state does not produce such states, but a link can be written by hand
+    payload = app.json.dumps(values).encode()
+    oversized = base64.urlsafe_b64encode(zlib.compress(payload)).decode().rstrip("=")
+    assert "larger than" in app.restore_plan(f"?plan={oversized}")[-1]
+    assert "damaged" in app.restore_plan("?plan=not-a-state")[-1]
+    short = base64.urlsafe_b64encode(zlib.compress(b"[1,2]")).decode().rstrip("=")
+    assert "incompatible" in app.restore_plan(f"?plan={short}")[-1]
+
+
+def test_links_without_a_plan_are_ignored():
+    with pytest.raises(app.PreventUpdate):
+        app.restore_plan("")
+
+
+def test_states_too_large_to_restore_are_not_linked():
+    values = list(DEFAULTS)
+    values[app.PLAN_INPUTS.index("measured-scans")] = [f"scan{i:04d}.ibw" for i in range(1000)]
+    state, key = app.encode_plan_state(values)
+    assert state is None and key
+    assert app.plan_link(state) == ("", f"Plan too large to link (over {app.PLAN_STATE_MAX_BYTES} bytes)")
+    assert app.plan_link(app.encode_plan_state(DEFAULTS)[0])[1] == "Link to this plan"
+
+
+@pytest.mark.parametrize("state", [None, "not-a-state"])
+def test_refinement_polls_survive_states_that_cannot_be_decoded(state):
+    data = {"plan": "none", "refining": "no-such-refinement", "state": state}
+    with pytest.raises(app.PreventUpdate):
+        app.refine_plot(1, data)
+    assert app.refine_plot(app.REFINE_MAX_POLLS, data)[2] == {"plan": "none"}